@@ -31,10 +31,13 @@ from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 from flask_migrate import Migrate, init as migrate_init
 
+from backend.config import Config
 from backend.extensions import db, socketio
 from backend.utils.audit import log_info
 from backend.models import *
+from backend.utils import latest_cache, metrics, sql_metrics, sqlite_tuning
 from backend.mqtt_service import start_mqtt_client, stop_mqtt_client, init_mqtt_system
+from backend.retention_service import start_retention
 
 # Import seeding function (adds predefined users)
 from backend.routes.auth_routes import seed_default_users
@@ -117,6 +120,19 @@ def create_app():
     db.init_app(app)
     Migrate(app, db)
 
+    # WAL / synchronous / mmap / busy_timeout on every SQLite connection
+    with app.app_context():
+        sqlite_tuning.install(db.engine)
+        # Statement count / DB time per route + slow-query log
+        sql_metrics.install(app, db.engine)
+
+    # HTTP latency per route; /metrics also carries the SQL counters
+    if Config.METRICS_ENABLED:
+        metrics.install(app)
+        metrics.REGISTRY.add_collector(sql_metrics.prometheus_lines)
+
+    # Room handlers must be declared before init_app so every app instance gets them
+    import backend.routes.socket_routes  # noqa: F401
     socketio.init_app(app, cors_allowed_origins="*", async_mode="eventlet")
 
     # ==========================================================
@@ -145,6 +161,8 @@ def create_app():
     from backend.routes.history_routes import history_bp
     from backend.routes.dashboardbuilder_routes import dashboardbuilder_bp
     from backend.routes.dashboards_routes import dashboards_bp
+    from backend.routes.system_routes import system_bp
+    from backend.routes.metrics_routes import metrics_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(device_bp, url_prefix="/api")
@@ -157,6 +175,11 @@ def create_app():
     app.register_blueprint(history_bp, url_prefix="/api/history")
     app.register_blueprint(dashboards_bp, url_prefix="/api/dashboards")
     app.register_blueprint(dashboardbuilder_bp, url_prefix="/api/dashboardbuilder")
+    app.register_blueprint(system_bp, url_prefix="/api/system")
+    app.register_blueprint(metrics_bp)
+
+    # Newest reading per device, served from memory by the live endpoints
+    latest_cache.warm(app)
 
 
     # ==========================================================
@@ -225,6 +248,9 @@ if __name__ == "__main__":
 
         init_mqtt_system()
 
+    # Daily purge of expired history/rollups when RETENTION_ENABLED (batched, then incremental vacuum)
+    start_retention(app)
+
     # Prevent duplicate MQTT threads
     lock_path = os.path.join(tempfile.gettempdir(), "mqtt_init.lock")
     mqtt_lock = InterProcessLock(lock_path)
@@ -0,0 +1,140 @@
+"""
+Authorization benchmark — compiled matrix vs per-request role loading.
+
+    python -m backend.benchmarks.bench_authz [--users 5000] [--roles 50] [--permissions 200] [--checks 500000]
+
+Seeds users with 1-3 roles each (roles hold ~20 random permissions plus
+the built-in widget grants) and a few device grants, then reports:
+
+  legacy    the old route pattern: load the user, lazy-load roles,
+            roles[0].name, compare against hard-coded names (checks/s)
+  can / can_on_device / can_use_widget
+            authz checks against the compiled matrix (checks/s)
+  build     full compile of the five tables (ms)
+  refresh   first check after one role's permissions change (ms), i.e.
+            the incremental rebuild of that role and its users
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import insert
+
+from backend.app import create_app  # first: monkey-patches for eventlet before Flask is imported
+from backend.extensions import db
+from backend.models import Device, Permission, Role, User, role_permissions, user_devices, user_roles
+from backend.utils import authz
+
+DEVICES = 500
+LEGACY_CHECKS = 2000
+
+
+def _seed(users, roles, permissions, rnd):
+    names = list(authz.DEFAULT_ROLE_PERMISSIONS) + [f"role-{i}" for i in range(roles)]
+    db.session.execute(insert(Role), [{"name": n} for n in names[:roles]])
+    db.session.execute(insert(Permission), [{"name": f"perm-{i}"} for i in range(permissions)])
+    db.session.execute(insert(Device), [{"name": f"dev-{i}"} for i in range(DEVICES)])
+    db.session.execute(insert(User), [{"username": f"u{i}", "password": "x"} for i in range(users)])
+    db.session.execute(insert(role_permissions), [
+        {"role_id": r, "permission_id": p}
+        for r in range(1, roles + 1) for p in rnd.sample(range(1, permissions + 1), min(20, permissions))
+    ])
+    db.session.execute(insert(user_roles), [
+        {"user_id": u, "role_id": r}
+        for u in range(1, users + 1) for r in rnd.sample(range(1, roles + 1), rnd.randint(1, min(3, roles)))
+    ])
+    db.session.execute(insert(user_devices), [
+        {"user_id": u, "device_id": d}
+        for u in range(1, users + 1) for d in rnd.sample(range(1, DEVICES + 1), rnd.randint(0, 10))
+    ])
+    db.session.commit()
+
+
+def _per_s(n, fn):
+    started = time.perf_counter()
+    fn()
+    return round(n / (time.perf_counter() - started))
+
+
+def _legacy_check(user_id):
+    """What every route did before: a user query, a lazy roles load, roles[0].name."""
+    user = db.session.get(User, user_id)
+    role = user.roles[0].name if user.roles else "user"
+    db.session.expire(user)      # next request = fresh session state
+    return role in ("superadmin", "admin")
+
+
+def run(users=5000, roles=50, permissions=200, checks=500000, seed=1):
+    rnd = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        try:
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+                _seed(users, roles, permissions, rnd)
+
+                started = time.perf_counter()
+                authz.invalidate()
+                authz.stats()
+                build_ms = (time.perf_counter() - started) * 1000
+
+                uids = [rnd.randint(1, users) for _ in range(1024)]
+                perms = [f"perm-{rnd.randrange(permissions)}" for _ in range(1024)]
+                dids = [rnd.randint(1, DEVICES) for _ in range(1024)]
+                widgets = [rnd.choice(authz.WIDGET_TYPES) for _ in range(1024)]
+
+                def loop(check):
+                    def go():
+                        for i in range(checks):
+                            check(i & 1023)
+                    return go
+
+                results = {
+                    "legacy_checks_per_s": _per_s(LEGACY_CHECKS, lambda: [
+                        _legacy_check(uids[i & 1023]) for i in range(LEGACY_CHECKS)]),
+                    "can_per_s": _per_s(checks, loop(lambda i: authz.can(uids[i], perms[i]))),
+                    "can_on_device_per_s": _per_s(checks, loop(
+                        lambda i: authz.can_on_device(uids[i], perms[i], dids[i]))),
+                    "can_use_widget_per_s": _per_s(checks, loop(
+                        lambda i: authz.can_use_widget(uids[i], widgets[i]))),
+                    "build_ms": round(build_ms, 1),
+                }
+
+                role = db.session.get(Role, 1)
+                role.permissions.append(db.session.get(Permission, permissions))
+                db.session.commit()
+                started = time.perf_counter()
+                authz.can(1, "perm-0")
+                results["refresh_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                results["users_in_role"] = len(authz._role_users.get(1, ()))
+
+                db.session.remove()
+                db.engine.dispose()
+            return results
+        finally:
+            os.environ.pop("DATABASE_URL", None)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--users", type=int, default=5000)
+    ap.add_argument("--roles", type=int, default=50)
+    ap.add_argument("--permissions", type=int, default=200)
+    ap.add_argument("--checks", type=int, default=500000, help="checks per matrix measurement")
+    args = ap.parse_args()
+
+    r = run(args.users, args.roles, args.permissions, args.checks)
+    print(f"users={args.users} roles={args.roles} permissions={args.permissions}")
+    print(f"{'legacy (query + roles[0])':<28}{r['legacy_checks_per_s']:>14,} checks/s")
+    print(f"{'can()':<28}{r['can_per_s']:>14,} checks/s")
+    print(f"{'can_on_device()':<28}{r['can_on_device_per_s']:>14,} checks/s")
+    print(f"{'can_use_widget()':<28}{r['can_use_widget_per_s']:>14,} checks/s")
+    print(f"{'full build':<28}{r['build_ms']:>14} ms")
+    print(f"{'refresh one role':<28}{r['refresh_ms']:>14} ms  ({r['users_in_role']} users)")
+
+
+if __name__ == "__main__":
+    main()
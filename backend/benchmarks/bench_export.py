@@ -0,0 +1,115 @@
+"""
+History export benchmark — time-to-first-byte and peak Python memory.
+
+    python -m backend.benchmarks.bench_export [--rows 200000]
+
+"before" replays the original export (History.query.all() + to_dict() +
+json.dumps(indent=2) into one string); "after" streams the same day
+through /api/history/export/{json,csv}. Peak memory is tracemalloc's view
+of Python allocations while the response is produced (taken on a separate
+run, since tracing slows everything down).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from backend.extensions import db
+from backend.ingest_service import Reading, write_readings
+from backend.models import Device, History
+
+DAY = datetime(2025, 1, 1)
+DEVICES = 20
+
+
+def _seed(rows):
+    db.session.add_all([Device(name=f"bench-{i}") for i in range(DEVICES)])
+    db.session.commit()
+    step = 86400 / (rows / DEVICES)
+    batch = []
+    for i in range(rows):
+        batch.append(Reading(i % DEVICES + 1, "t", None, 20.0 + i % 13, 50.0, 1000.0,
+                             DAY + timedelta(seconds=(i // DEVICES) * step)))
+        if len(batch) == 5000:
+            write_readings(batch)
+            batch = []
+    if batch:
+        write_readings(batch)
+    db.session.commit()
+
+
+def _legacy_json():
+    start, end = DAY, DAY + timedelta(days=1)
+    records = History.query.filter(History.timestamp >= start, History.timestamp < end).all()
+    return json.dumps([r.to_dict() for r in records], indent=2)
+
+
+def _measure(fn):
+    """Timings from a clean run, memory from a second run under tracemalloc."""
+    started = time.perf_counter()
+    ttfb, size = fn(started)
+    total = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn(time.perf_counter())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"ttfb_ms": round(ttfb * 1000, 1), "total_ms": round(total * 1000, 1),
+            "peak_mb": round(peak / 1e6, 1), "bytes": size}
+
+
+def run(rows=200000):
+    from backend.app import create_app
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        try:
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+                _seed(rows)
+
+            def legacy(started):
+                with app.app_context():
+                    body = _legacy_json()
+                    db.session.remove()
+                return time.perf_counter() - started, len(body)
+
+            def streamed(path):
+                def inner(started):
+                    res = app.test_client().get(path, buffered=False)
+                    it = iter(res.response)
+                    first = next(it)
+                    ttfb = time.perf_counter() - started
+                    size = len(first) + sum(len(c) for c in it)
+                    res.close()
+                    return ttfb, size
+                return inner
+
+            results["json before"] = _measure(legacy)
+            results["json after"] = _measure(streamed("/api/history/export/json?date=2025-01-01"))
+            results["csv after"] = _measure(streamed("/api/history/export/csv?date=2025-01-01"))
+            with app.app_context():
+                db.engine.dispose()
+        finally:
+            os.environ.pop("DATABASE_URL", None)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200000, help="history rows in the exported day")
+    args = ap.parse_args()
+
+    print(f"rows={args.rows} devices={DEVICES}")
+    print(f"{'export':<14}{'TTFB ms':>10}{'total ms':>11}{'peak MB':>10}{'bytes':>14}")
+    for name, r in run(args.rows).items():
+        print(f"{name:<14}{r['ttfb_ms']:>10}{r['total_ms']:>11}{r['peak_mb']:>10}{r['bytes']:>14,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Parquet vs CSV export benchmark — file size and load time.
+
+    python -m backend.benchmarks.bench_parquet [--rows 200000]
+
+Exports the same day through /api/history/export/csv and
+/api/history/export/parquet, then loads each back into typed columns:
+CSV with the csv module + float()/fromisoformat(), Parquet with
+pyarrow.parquet.read_table (best of 3 loads each).
+"""
+import argparse
+import csv
+import io
+import os
+import tempfile
+import time
+from datetime import datetime
+
+from backend.benchmarks.bench_export import DEVICES, _seed
+from backend.extensions import db
+from backend.utils import parquet_export
+
+
+def _load_csv(body):
+    reader = csv.reader(io.StringIO(body.decode()))
+    next(reader)
+    cols = ([], [], [], [], [])
+    for device, temp, hum, press, ts in reader:
+        cols[0].append(int(device))
+        cols[1].append(float(temp))
+        cols[2].append(float(hum))
+        cols[3].append(float(press))
+        cols[4].append(datetime.fromisoformat(ts))
+    return len(cols[0])
+
+
+def _load_parquet(body):
+    return parquet_export.pq.read_table(io.BytesIO(body)).num_rows
+
+
+def _best(fn, body, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rows = fn(body)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return rows, best
+
+
+def run(rows=200000):
+    from backend.app import create_app
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        try:
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+                _seed(rows)
+            client = app.test_client()
+
+            for name, path, loader in (
+                ("csv", "/api/history/export/csv?date=2025-01-01", _load_csv),
+                ("parquet", "/api/history/export/parquet?date=2025-01-01", _load_parquet),
+            ):
+                started = time.perf_counter()
+                res = client.get(path)
+                body = res.get_data()
+                export_s = time.perf_counter() - started
+                res.close()
+                loaded, load_s = _best(loader, body)
+                results[name] = {"bytes": len(body), "rows": loaded,
+                                 "export_ms": round(export_s * 1000, 1), "load_ms": round(load_s * 1000, 1)}
+            with app.app_context():
+                db.engine.dispose()
+        finally:
+            os.environ.pop("DATABASE_URL", None)
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200000, help="history rows in the exported day")
+    args = ap.parse_args()
+    if not parquet_export.available():
+        raise SystemExit("pyarrow is not installed")
+
+    r = run(args.rows)
+    print(f"rows={args.rows} devices={DEVICES}")
+    print(f"{'format':<10}{'bytes':>14}{'export ms':>11}{'load ms':>10}")
+    for name, x in r.items():
+        print(f"{name:<10}{x['bytes']:>14,}{x['export_ms']:>11}{x['load_ms']:>10}")
+    print(f"size ratio csv/parquet: {r['csv']['bytes'] / r['parquet']['bytes']:.1f}x, "
+          f"load speed-up: {r['csv']['load_ms'] / r['parquet']['load_ms']:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Payload parser microbenchmark — messages/second per encoding.
+
+    python -m backend.benchmarks.bench_payload_parsers [--n 200000]
+
+Helps firmware teams pick the cheapest payload_format for their devices.
+"""
+import argparse
+import json
+import time
+
+from backend.utils import payload_parsers as pp
+
+SAMPLE = {"temperature": 24.37, "humidity": 51.2, "pressure": 1012.85}
+
+
+def _cases():
+    cases = [
+        ("json", "json", json.dumps(SAMPLE).encode()),
+        ("json (short aliases)", "json", b'{"t": 24.37, "h": 51.2, "p": 1012.85}'),
+        ("json (unquoted keys)", "json", b"{temp: 24.37, hum: 51.2, press: 1012.85}"),
+        ("struct <fff", "struct", pp.encode_struct(*SAMPLE.values())),
+    ]
+    if pp.cbor2 is not None:
+        cases.append(("cbor", "cbor", pp.cbor2.dumps(SAMPLE)))
+    return cases
+
+
+def run(n=200000):
+    """Return [{format, bytes, msgs_per_sec, us_per_msg}, ...]."""
+    results = []
+    for label, fmt, payload in _cases():
+        parse = pp.get_parser(fmt)
+        parse(payload)  # warm the schema cache
+        started = time.perf_counter()
+        for _ in range(n):
+            parse(payload)
+        elapsed = time.perf_counter() - started
+        results.append({
+            "format": label,
+            "bytes": len(payload),
+            "msgs_per_sec": round(n / elapsed),
+            "us_per_msg": round(elapsed / n * 1e6, 3),
+        })
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=200000, help="messages per format")
+    args = ap.parse_args()
+
+    print(f"orjson: {'yes' if pp.orjson else 'no'} | cbor2: {'yes' if pp.cbor2 else 'no'} | n={args.n}")
+    print(f"{'format':<24}{'bytes':>7}{'msgs/s':>14}{'µs/msg':>10}")
+    for r in run(args.n):
+        print(f"{r['format']:<24}{r['bytes']:>7}{r['msgs_per_sec']:>14,}{r['us_per_msg']:>10}")
+
+
+if __name__ == "__main__":
+    main()
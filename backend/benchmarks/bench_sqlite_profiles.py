@@ -0,0 +1,175 @@
+"""
+SQLite pragma profile benchmark — ingest and query throughput under load.
+
+    python -m backend.benchmarks.bench_sqlite_profiles [--seconds 5] [--readers 4] [--batch 50]
+
+For each profile in backend/utils/sqlite_tuning.PROFILES a fresh database is
+seeded with a day of history, then ONE writer thread commits ingest batches
+through write_readings() (like the ingest writer) while N reader threads
+run the /api/history/series style range query and the dashboard "latest 50"
+query. Reports readings/s written, queries/s, p95 latencies and lock errors.
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+from eventlet import patcher
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from backend.config import Config
+from backend.extensions import db
+from backend.ingest_service import Reading, write_readings
+from backend.models import Device, History
+from backend.utils import sqlite_tuning
+
+# backend.app monkey-patches for eventlet; the load runs on real OS threads
+# so SQLite locking between connections is what gets measured.
+threading = patcher.original("threading")
+time = patcher.original("time")
+
+DEVICES = 20
+SEED_ROWS = 100000
+START = datetime(2025, 1, 1)
+
+
+def _p95(samples):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return round(samples[int(len(samples) * 0.95) - 1 if len(samples) > 1 else 0] * 1000, 2)
+
+
+def _seed():
+    db.session.add_all([Device(name=f"bench-{i}") for i in range(DEVICES)])
+    db.session.commit()
+    batch = []
+    for i in range(SEED_ROWS):
+        batch.append(Reading(i % DEVICES + 1, "t", None, 20.0 + i % 13, 50.0, 1000.0,
+                             START + timedelta(seconds=i // DEVICES * 17)))
+        if len(batch) == 5000:
+            write_readings(batch)
+            db.session.commit()
+            batch = []
+
+
+def run_profile(profile, seconds, readers, batch_size):
+    from backend.app import create_app
+
+    Config.SQLITE_PROFILE = profile
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        try:
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+                _seed()
+                db.session.remove()
+
+            stop = threading.Event()
+            lock = threading.Lock()
+            stats = {"written": 0, "commits": [], "queries": 0, "reads": [], "errors": 0}
+            span = SEED_ROWS // DEVICES * 17
+
+            def writer():
+                n = 0
+                with app.app_context():
+                    while not stop.is_set():
+                        ts = START + timedelta(seconds=span + n)
+                        batch = [Reading(i % DEVICES + 1, "t", None, 21.0, 50.0, 1000.0, ts)
+                                 for i in range(batch_size)]
+                        started = time.perf_counter()
+                        try:
+                            write_readings(batch)
+                            db.session.commit()
+                        except OperationalError:
+                            db.session.rollback()
+                            with lock:
+                                stats["errors"] += 1
+                            continue
+                        elapsed = time.perf_counter() - started
+                        n += 1
+                        with lock:
+                            stats["written"] += batch_size
+                            stats["commits"].append(elapsed)
+                    db.session.remove()
+
+            def reader(seed):
+                rnd = random.Random(seed)
+                c = History.__table__.c
+                with app.app_context():
+                    while not stop.is_set():
+                        device = rnd.randint(1, DEVICES)
+                        lo = START + timedelta(seconds=rnd.randint(0, span - 3600))
+                        if rnd.random() < 0.5:
+                            stmt = select(c.timestamp, c.temperature).where(
+                                c.device_id == device, c.timestamp >= lo, c.timestamp < lo + timedelta(hours=6))
+                        else:
+                            stmt = select(History).order_by(History.timestamp.desc()).limit(50)
+                        started = time.perf_counter()
+                        try:
+                            db.session.execute(stmt).fetchall()
+                            db.session.rollback()
+                        except OperationalError:
+                            db.session.rollback()
+                            with lock:
+                                stats["errors"] += 1
+                            continue
+                        elapsed = time.perf_counter() - started
+                        with lock:
+                            stats["queries"] += 1
+                            stats["reads"].append(elapsed)
+                    db.session.remove()
+
+            threads = [threading.Thread(target=writer)] + [
+                threading.Thread(target=reader, args=(i,)) for i in range(readers)
+            ]
+            for t in threads:
+                t.start()
+            time.sleep(seconds)
+            stop.set()
+            for t in threads:
+                t.join()
+
+            with app.app_context():
+                db.engine.dispose()
+        finally:
+            os.environ.pop("DATABASE_URL", None)
+
+    return {
+        "writes_per_s": round(stats["written"] / seconds),
+        "commit_p95_ms": _p95(stats["commits"]),
+        "queries_per_s": round(stats["queries"] / seconds),
+        "query_p95_ms": _p95(stats["reads"]),
+        "lock_errors": stats["errors"],
+    }
+
+
+def run(seconds=5, readers=4, batch_size=50, profiles=None):
+    original = Config.SQLITE_PROFILE
+    try:
+        return {name: run_profile(name, seconds, readers, batch_size)
+                for name in (profiles or sqlite_tuning.PROFILES)}
+    finally:
+        Config.SQLITE_PROFILE = original
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--seconds", type=float, default=5, help="load duration per profile")
+    ap.add_argument("--readers", type=int, default=4, help="concurrent reader threads")
+    ap.add_argument("--batch", type=int, default=50, help="readings per writer commit")
+    ap.add_argument("--profile", action="append", help="profile(s) to run (default: all)")
+    args = ap.parse_args()
+
+    print(f"seed={SEED_ROWS} readers={args.readers} batch={args.batch} seconds={args.seconds}")
+    print(f"{'profile':<10}{'writes/s':>10}{'commit p95':>12}{'queries/s':>11}{'query p95':>11}{'locked':>8}")
+    for name, r in run(args.seconds, args.readers, args.batch, args.profile).items():
+        print(f"{name:<10}{r['writes_per_s']:>10}{r['commit_p95_ms']:>12}{r['queries_per_s']:>11}"
+              f"{r['query_p95_ms']:>11}{r['lock_errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
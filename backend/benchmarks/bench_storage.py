@@ -0,0 +1,120 @@
+"""
+Storage footprint benchmark — on-disk bytes per stored reading.
+
+    python -m backend.benchmarks.bench_storage [--n 50000] [--devices 20]
+
+Compares the old dual write (sensors row with topic + JSON payload AND a
+history row) with the current history-only path, both with the reading
+indexes in place. Sizes are taken after VACUUM so free pages don't count.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from backend.extensions import db
+from backend.ingest_service import Reading, write_readings
+from backend.models import Sensor
+
+BATCH = 500
+
+
+def _readings(n, devices):
+    start = datetime(2025, 1, 1)
+    for i in range(n):
+        device_id = i % devices + 1
+        yield Reading(
+            device_id=device_id,
+            topic=f"francauto/devices/device-{device_id}",
+            payload=None,
+            temperature=round(20 + (i % 150) / 10, 2),
+            humidity=round(40 + (i % 300) / 10, 2),
+            pressure=round(990 + (i % 450) / 10, 2),
+            timestamp=start + timedelta(seconds=i // devices),
+        )
+
+
+def _legacy_sensor_rows(batch):
+    """What ingest used to write to sensors alongside every history row."""
+    rows = []
+    for r in batch:
+        data = {"temperature": r.temperature, "humidity": r.humidity, "pressure": r.pressure}
+        rows.append({"device_id": r.device_id, "topic": r.topic, "payload": json.dumps(data),
+                     "timestamp": r.timestamp, **data})
+    return rows
+
+
+def _file_bytes(path):
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    conn.close()
+    return page_size * pages
+
+
+def measure(n, devices, dual_write):
+    """Bytes per reading for one storage layout."""
+    from backend.app import create_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+        try:
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+                empty = _file_bytes(path)
+
+                batch = []
+                for reading in _readings(n, devices):
+                    batch.append(reading)
+                    if len(batch) >= BATCH:
+                        write_readings(batch)
+                        if dual_write:
+                            db.session.execute(insert(Sensor), _legacy_sensor_rows(batch))
+                        db.session.commit()
+                        batch = []
+                if batch:
+                    write_readings(batch)
+                    if dual_write:
+                        db.session.execute(insert(Sensor), _legacy_sensor_rows(batch))
+                    db.session.commit()
+                db.session.remove()
+                db.engine.dispose()
+            return (_file_bytes(path) - empty) / n
+        finally:
+            os.environ.pop("DATABASE_URL", None)
+
+
+def run(n=50000, devices=20):
+    before = measure(n, devices, dual_write=True)
+    after = measure(n, devices, dual_write=False)
+    return {
+        "readings": n,
+        "devices": devices,
+        "bytes_per_reading_before": round(before, 1),
+        "bytes_per_reading_after": round(after, 1),
+        "reduction_pct": round((1 - after / before) * 100, 1) if before else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--n", type=int, default=50000, help="readings to store")
+    ap.add_argument("--devices", type=int, default=20, help="distinct device ids")
+    args = ap.parse_args()
+
+    r = run(args.n, args.devices)
+    print(f"readings={r['readings']} devices={r['devices']}")
+    print(f"{'sensors + history (before)':<30}{r['bytes_per_reading_before']:>10} B/reading")
+    print(f"{'history only (after)':<30}{r['bytes_per_reading_after']:>10} B/reading")
+    print(f"{'reduction':<30}{r['reduction_pct']:>10} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+End-to-end benchmark suite with a stored baseline.
+
+    python -m backend.benchmarks.bench_suite [--scales 10k,1m] [--clients 100]
+                                             [--out bench_results.json]
+                                             [--baseline backend/benchmarks/baseline.json]
+                                             [--repeat 1] [--tolerance 0.5] [--update-baseline]
+
+One run covers the hot paths and writes a flat {metric: number} JSON:
+
+  ingest.*      MQTT ingest through the in-process broker (loadgen --target
+                memory, unthrottled): messages/s published and written
+  <scale>.*     History seeded with <scale> rows (20 devices over the last
+                7 days, rollups rebuilt, latest cache warmed), then best-of-N
+                latency of /api/data/latest, /api/dashboard/chart,
+                /api/data/recent, /api/history/ (7 daily rollups) and
+                /api/history/series (one device, last day, 1000 points —
+                raw rows up to 1m, rollups at 10m), and CSV / JSON export
+                of one full day in rows/s
+  fanout.*      BroadcastScheduler ticks of 100 device readings to N
+                Socket.IO clients: ms per tick and readings delivered/s
+
+Metrics ending in _ms are lower-is-better, _per_s higher-is-better. The
+run is compared with the baseline: anything worse by more than
+--tolerance (and by more than NOISE_MS for latencies) is a regression
+and the exit status is 1. The committed baseline is the median of
+--repeat 3; refresh it with --update-baseline after an intended change.
+10m is supported but opt-in (~9 minutes of seeding and rollup rebuild,
+~1 GB of scratch disk).
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from pytz import timezone
+
+from backend.app import create_app  # first: monkey-patches for eventlet before Flask is imported
+from backend.broadcast_service import BroadcastScheduler
+from backend.extensions import db, socketio
+from backend.ingest_service import Reading, write_readings
+from backend.models import Device
+from backend.rollup_service import rebuild_rollups
+from backend.timeseries import create_store, set_store
+from backend.utils import latest_cache
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SCALES = ("10k", "1m")
+DEVICES = 20
+SPAN = timedelta(days=7)
+SEED_CHUNK = 50000
+INDIA_TZ = timezone("Asia/Kolkata")
+NOISE_MS = 3.0            # latency changes smaller than this never count as regressions
+
+
+def parse_scale(value):
+    """"10k" → 10000, "1m" → 1000000, "2500" → 2500."""
+    value = value.strip().lower()
+    factor = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * factor)
+
+
+def _best_ms(fn, repeat):
+    """Best of `repeat` runs after one warm-up — the least noisy number to compare."""
+    fn()
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 2)
+
+
+# ==========================================================
+# Ingest
+# ==========================================================
+def bench_ingest(devices=200, seconds=3.0):
+    from backend import loadgen
+
+    report = loadgen.run(devices=devices, rate=0, seconds=seconds, shape="json", target="memory")
+    return {
+        "ingest.msgs_per_s": report["achieved_msgs_per_s"],
+        "ingest.write_per_s": report["write_per_s"],
+    }
+
+
+# ==========================================================
+# Endpoints + export at a given history size
+# ==========================================================
+def _seed(db_path, rows, end):
+    """Bulk-load History straight through sqlite3 (ORM seeding would dominate the run)."""
+    rnd = random.Random(rows)
+    per_device = -(-rows // DEVICES)
+    step = SPAN.total_seconds() / per_device
+    start = end - timedelta(seconds=(per_device - 1) * step)      # newest reading lands on `end`
+    conn = sqlite3.connect(db_path)
+    try:
+        for lo in range(0, rows, SEED_CHUNK):
+            conn.executemany(
+                "INSERT INTO history (device_id, temperature, humidity, pressure, timestamp) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (i % DEVICES + 1, round(20 + rnd.random() * 15, 2), round(40 + rnd.random() * 30, 2),
+                     round(990 + rnd.random() * 40, 2),
+                     (start + timedelta(seconds=(i // DEVICES) * step)).strftime("%Y-%m-%d %H:%M:%S.%f"))
+                    for i in range(lo, min(rows, lo + SEED_CHUNK))
+                ],
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def bench_scale(rows, label):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        previous_store = set_store(create_store(root=os.path.join(tmp, "timeseries")))
+        try:
+            app = create_app()
+            client = app.test_client()
+            end = datetime.now(INDIA_TZ).replace(microsecond=0, tzinfo=None)   # History is India wall time
+            with app.app_context():
+                db.create_all()
+                db.session.add_all([Device(name=f"bench-{i}", is_connected=True) for i in range(DEVICES)])
+                db.session.commit()
+                _seed(db_path, rows, end)
+                rebuild_rollups()
+                # seeding 10m takes minutes: one live reading per device through the
+                # ingest path keeps "now" inside the latest / recent windows
+                now = datetime.now(INDIA_TZ).replace(tzinfo=None)
+                write_readings([Reading(d, "bench", None, 25.0, 50.0, 1000.0, now) for d in range(1, DEVICES + 1)])
+                db.session.commit()
+                latest_cache.rebuild()
+                db.session.remove()
+
+            def get(url):
+                resp = client.get(url)
+                assert resp.status_code == 200, f"{url} → {resp.status_code}"
+                return resp
+
+            # every endpoint must be answering from real data, not its empty fast path
+            assert get("/api/data/latest").get_json()["device_name"] != "No Device"
+            assert get("/api/data/recent").get_json()
+
+            since = (end - timedelta(days=1)).isoformat()
+            repeat = 20 if rows <= 1000000 else 5
+            results = {
+                f"{label}.latest_ms": _best_ms(lambda: get("/api/data/latest"), repeat),
+                f"{label}.chart_ms": _best_ms(lambda: get("/api/dashboard/chart"), repeat),
+                f"{label}.recent_ms": _best_ms(lambda: get("/api/data/recent"), repeat),
+                f"{label}.history_ms": _best_ms(lambda: get("/api/history/"), repeat),
+                f"{label}.series_ms": _best_ms(
+                    lambda: get(f"/api/history/series?device_id=1&from={since}&to={end.isoformat()}&points=1000"),
+                    repeat),
+            }
+
+            day = (end - timedelta(days=3)).strftime("%Y-%m-%d")
+            day_rows = get(f"/api/history/export/csv?date={day}").get_data().count(b"\n") - 1
+            for fmt in ("csv", "json"):
+                def export():
+                    return len(get(f"/api/history/export/{fmt}?date={day}").get_data())
+                ms = _best_ms(export, 3)
+                results[f"{label}.export_{fmt}_rows_per_s"] = round(day_rows / (ms / 1000)) if ms else 0
+
+            with app.app_context():
+                db.session.remove()
+                db.engine.dispose()
+            latest_cache.clear()
+            return results
+        finally:
+            set_store(previous_store)
+            os.environ.pop("DATABASE_URL", None)
+
+
+# ==========================================================
+# Socket.IO fan-out
+# ==========================================================
+def _reading(device_id, i):
+    return {
+        "device_id": device_id,
+        "device_name": f"bench-{device_id}",
+        "temperature": 20.0 + i % 10,
+        "humidity": 50.0,
+        "pressure": 1000.0,
+        "status": "online",
+        "timestamp": "2025-01-01T00:00:00+05:30",
+        "devices_online": DEVICES,
+    }
+
+
+def bench_fanout(clients=100, devices=100, ticks=20):
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        try:
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+            conns = [socketio.test_client(app) for _ in range(clients)]
+            for c in conns:
+                c.get_received()
+            sched = BroadcastScheduler(hz=10, legacy_events=[])
+            samples, delivered = [], 0
+            for t in range(ticks):
+                for device_id in range(1, devices + 1):
+                    sched.publish(_reading(device_id, t))
+                started = time.perf_counter()
+                sched.flush()
+                samples.append(time.perf_counter() - started)
+                for c in conns:
+                    delivered += sum(len(m["args"][0]["readings"]) for m in c.get_received()
+                                     if m["name"] == "sensor_batch")
+            for c in conns:
+                c.disconnect()
+            with app.app_context():
+                db.engine.dispose()
+            if delivered != clients * devices * ticks:
+                raise RuntimeError(f"fan-out delivered {delivered} of {clients * devices * ticks} readings")
+            return {
+                f"fanout.{clients}_clients.tick_ms": round(statistics.median(samples) * 1000, 2),
+                f"fanout.{clients}_clients.readings_per_s": round(delivered / sum(samples)),
+            }
+        finally:
+            os.environ.pop("DATABASE_URL", None)
+
+
+# ==========================================================
+# Run + compare
+# ==========================================================
+def run(scales=DEFAULT_SCALES, clients=100, ingest_seconds=3.0, repeat=1):
+    """Per-metric median over `repeat` full runs (run-to-run noise is ±20% on a shared VM)."""
+    samples = {}
+    for _ in range(repeat):
+        metrics = {}
+        metrics.update(bench_ingest(seconds=ingest_seconds))
+        for label in scales:
+            metrics.update(bench_scale(parse_scale(label), label))
+        metrics.update(bench_fanout(clients))
+        for name, value in metrics.items():
+            samples.setdefault(name, []).append(value)
+    metrics = {name: statistics.median(values) for name, values in samples.items()}
+    return {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "scales": list(scales),
+            "clients": clients,
+            "repeat": repeat,
+        },
+        "metrics": metrics,
+    }
+
+
+def compare(current, baseline, tolerance=0.5):
+    """[(metric, baseline, current, change, status)]; status is ok / regressed / improved / new / missing."""
+    rows = []
+    for name in sorted(set(current) | set(baseline)):
+        cur, base = current.get(name), baseline.get(name)
+        if base is None or cur is None:
+            rows.append((name, base, cur, None, "new" if base is None else "missing"))
+            continue
+        change = (cur - base) / base if base else 0.0
+        worse = -change if name.endswith("_per_s") else change
+        status = "ok"
+        if abs(worse) > tolerance and not (name.endswith("_ms") and abs(cur - base) < NOISE_MS):
+            status = "regressed" if worse > 0 else "improved"
+        rows.append((name, base, cur, change, status))
+    return rows
+
+
+def _print_report(rows):
+    print(f"{'metric':<40}{'baseline':>14}{'current':>14}{'change':>10}  status")
+    for name, base, cur, change, status in rows:
+        pct = f"{change:+.0%}" if change is not None else "-"
+        print(f"{name:<40}{base if base is not None else '-':>14}{cur if cur is not None else '-':>14}{pct:>10}  {status}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scales", default=",".join(DEFAULT_SCALES), help="history sizes, e.g. 10k,1m,10m")
+    ap.add_argument("--clients", type=int, default=100, help="Socket.IO clients for the fan-out run")
+    ap.add_argument("--ingest-seconds", type=float, default=3.0, help="duration of the ingest run")
+    ap.add_argument("--out", default="bench_results.json", help="where to write this run's results")
+    ap.add_argument("--baseline", default=BASELINE, help="baseline JSON to compare against")
+    ap.add_argument("--repeat", type=int, default=1, help="full runs per metric median (use 3 for a baseline)")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="allowed relative slowdown (0.5 = 50%%)")
+    ap.add_argument("--update-baseline", action="store_true", help="write this run as the new baseline")
+    args = ap.parse_args()
+
+    scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    results = run(scales, args.clients, args.ingest_seconds, max(1, args.repeat))
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.out}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline} (run with --update-baseline)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results["metrics"], baseline["metrics"], args.tolerance)
+    _print_report(rows)
+    regressed = [r[0] for r in rows if r[4] == "regressed"]
+    if regressed:
+        print(f"❌ {len(regressed)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressed)}")
+        return 1
+    print("✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+TimeSeriesStore benchmark — the same workload against every backend.
+
+    python -m backend.benchmarks.bench_timeseries [--rows 200000] [--devices 20] [--backend sql]
+
+Per backend: append in ingest-sized batches (committed like the ingest
+writer), then time latest(), a one-device one-day range(), the newest 50
+across devices, a 7-day hourly aggregate() and a one-device columns()
+load, plus a one-day all-device scan() (the export path). Bytes on disk are the SQLite file (after VACUUM) or the segment files.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from backend.extensions import db
+from backend.ingest_service import Reading
+from backend.models import Device
+from backend.timeseries import BACKENDS, create_store, set_store
+
+BATCH = 500
+START = datetime(2025, 1, 1)
+
+
+def _readings(rows, devices, span_days):
+    step = span_days * 86400 / (rows / devices)
+    for i in range(rows):
+        yield Reading(i % devices + 1, "t", None, 20 + (i % 150) / 10, 40 + (i % 300) / 10,
+                      990 + (i % 450) / 10, START + timedelta(seconds=(i // devices) * step))
+
+
+def _timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 2), result
+
+
+def _disk_bytes(name, tmp, db_path):
+    if name == "segment":
+        root = os.path.join(tmp, "segments")
+        return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+    conn = sqlite3.connect(db_path)
+    conn.execute("VACUUM")
+    size = conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+    conn.close()
+    return size
+
+
+def run_backend(name, rows, devices, span_days=7):
+    from backend.app import create_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+        try:
+            app = create_app()
+            with app.app_context():
+                db.create_all()
+                db.session.add_all([Device(name=f"bench-{i}") for i in range(devices)])
+                db.session.commit()
+                empty = _disk_bytes("sql", tmp, db_path) if name == "sql" else 0
+
+                store = create_store(name, root=os.path.join(tmp, "segments"))
+                previous = set_store(store)
+                try:
+                    started = time.perf_counter()
+                    batch = []
+                    for r in _readings(rows, devices, span_days):
+                        batch.append(r)
+                        if len(batch) == BATCH:
+                            store.append_batch(batch)
+                            db.session.commit()
+                            batch = []
+                    if batch:
+                        store.append_batch(batch)
+                        db.session.commit()
+                    append_s = time.perf_counter() - started
+
+                    day = START + timedelta(days=span_days // 2)
+                    end = START + timedelta(days=span_days)
+                    results = {
+                        "append_per_s": round(rows / append_s),
+                        "latest_ms": _timed(lambda: store.latest())[0],
+                        "range_day_ms": _timed(lambda: store.range(day, day + timedelta(days=1), [1]))[0],
+                        "newest50_ms": _timed(lambda: store.range(limit=50, newest_first=True))[0],
+                        "agg_1h_ms": _timed(lambda: store.aggregate(START, end, "1h"))[0],
+                        "columns_ms": _timed(lambda: store.columns(1, START, end, ["temperature"]))[0],
+                        "scan_day_ms": _timed(lambda: sum(map(len, store.scan(day, day + timedelta(days=1)))), 3)[0],
+                    }
+                    db.session.remove()
+                    db.engine.dispose()
+                finally:
+                    set_store(previous)
+            results["bytes_per_reading"] = round((_disk_bytes(name, tmp, db_path) - empty) / rows, 1)
+            return results
+        finally:
+            os.environ.pop("DATABASE_URL", None)
+
+
+def run(rows=200000, devices=20, backends=None):
+    return {name: run_backend(name, rows, devices) for name in (backends or BACKENDS)}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200000, help="readings appended (over 7 days)")
+    ap.add_argument("--devices", type=int, default=20, help="distinct device ids")
+    ap.add_argument("--backend", action="append", choices=sorted(BACKENDS), help="backend(s) to run (default: all)")
+    args = ap.parse_args()
+
+    results = run(args.rows, args.devices, args.backend)
+    cols = ["append_per_s", "latest_ms", "range_day_ms", "newest50_ms", "agg_1h_ms", "columns_ms", "scan_day_ms",
+            "bytes_per_reading"]
+    print(f"rows={args.rows} devices={args.devices}")
+    print(f"{'backend':<10}" + "".join(f"{c:>18}" for c in cols))
+    for name, r in results.items():
+        print(f"{name:<10}" + "".join(f"{r[c]:>18}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
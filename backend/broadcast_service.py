@@ -0,0 +1,187 @@
+# =================================================================================================
+# Franc Automation - Broadcast Service (coalesced Socket.IO frames)
+# Handles:
+#   • Latest-value-wins buffering of readings per device
+#   • ONE "sensor_batch" frame per tick instead of 4-5 events per reading
+#   • "device_status" only when a device's status actually changes
+#   • Optional legacy per-device events (sensor_data, ...) for older clients
+#   • Room-scoped delivery: "devices:all" gets the full batch, "device:<id>"
+#     only its own reading; rooms nobody is in are never encoded
+# =================================================================================================
+import threading
+import time
+
+import eventlet
+
+from backend.config import Config
+from backend.extensions import socketio
+from backend.utils.audit import log_info
+from backend.utils.socket_rooms import NAMESPACE, ROOM_ALL, device_room, device_rooms, room_occupied
+
+LEGACY_EVENTS = ("sensor_data", "device_data_update", "dashboard_update")
+
+
+class BroadcastScheduler:
+    """Coalesces readings per device and flushes them on a fixed tick."""
+
+    def __init__(self, hz=None, legacy_events=None):
+        self.hz = hz or Config.SOCKET_BROADCAST_HZ
+        self.legacy_events = [
+            e for e in (Config.SOCKET_LEGACY_EVENTS if legacy_events is None else legacy_events)
+            if e in LEGACY_EVENTS
+        ]
+        self._pending = {}          # device_id -> latest payload
+        self._last_status = {}      # device_id -> "online" / "offline"
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+        self.readings_in = 0
+        self.readings_coalesced = 0
+        self.frames_out = 0
+        self.ticks = 0
+
+    # ------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Spawn the tick loop (idempotent)."""
+        if self._running:
+            return
+        self._running = True
+        self._thread = eventlet.spawn(self._run)
+        log_info(f"[BROADCAST] 📡 Scheduler started ({self.hz} Hz, legacy={self.legacy_events or 'off'})")
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            try:
+                self._thread.kill()
+            except Exception:
+                pass
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        interval = 1.0 / self.hz
+        while self._running:
+            started = time.monotonic()
+            try:
+                self.flush()
+            except Exception as e:
+                log_info(f"[BROADCAST] ❌ Tick failed: {e}")
+            eventlet.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    # ------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------
+    def publish(self, payload):
+        """Buffer a device payload; a newer one for the same device replaces it."""
+        with self._lock:
+            self.readings_in += 1
+            if payload["device_id"] in self._pending:
+                self.readings_coalesced += 1
+            self._pending[payload["device_id"]] = payload
+
+    # ------------------------------------------------------
+    # Tick
+    # ------------------------------------------------------
+    def flush(self):
+        """Emit everything buffered since the last tick. Returns frames sent."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        self.ticks += 1
+        if not pending:
+            return 0
+
+        readings = list(pending.values())
+        frames = 0
+
+        if room_occupied(ROOM_ALL):
+            socketio.emit("sensor_batch", {"readings": readings, "count": len(readings)},
+                          to=ROOM_ALL, namespace=NAMESPACE)
+            frames += 1
+
+        for payload in readings:
+            device_id = payload["device_id"]
+            status = payload["status"]
+            room = device_room(device_id)
+            if room_occupied(room):
+                socketio.emit("sensor_batch", {"readings": [payload], "count": 1},
+                              to=room, namespace=NAMESPACE)
+                frames += 1
+
+            targets = device_rooms(device_id)
+            if self._last_status.get(device_id) != status:
+                self._last_status[device_id] = status
+                if room_occupied(targets):
+                    socketio.emit(
+                        "device_status",
+                        {"device_id": device_id, "status": status, "last_seen": payload["timestamp"]},
+                        to=targets,
+                        namespace=NAMESPACE,
+                    )
+                    frames += 1
+            if self.legacy_events and room_occupied(targets):
+                for event in self.legacy_events:
+                    socketio.emit(event, payload, to=targets, namespace=NAMESPACE)
+                    frames += 1
+
+        self.frames_out += frames
+        return frames
+
+    def stats(self):
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "running": self._running,
+            "tick_hz": self.hz,
+            "legacy_events": self.legacy_events,
+            "pending_devices": pending,
+            "ticks": self.ticks,
+            "readings_in": self.readings_in,
+            "readings_coalesced": self.readings_coalesced,
+            "frames_out": self.frames_out,
+        }
+
+
+# ==========================================================
+# Module-level singleton + public helpers
+# ==========================================================
+_scheduler = BroadcastScheduler()
+
+
+def start_broadcaster():
+    _scheduler.start()
+
+
+def stop_broadcaster():
+    _scheduler.stop()
+
+
+def publish_reading(payload):
+    if not _scheduler.running:
+        _scheduler.start()
+    _scheduler.publish(payload)
+
+
+def flush_broadcasts():
+    return _scheduler.flush()
+
+
+def get_broadcast_stats():
+    return _scheduler.stats()
+
+
+__all__ = [
+    "BroadcastScheduler",
+    "start_broadcaster",
+    "stop_broadcaster",
+    "publish_reading",
+    "flush_broadcasts",
+    "get_broadcast_stats",
+]
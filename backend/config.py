@@ -18,6 +18,16 @@ class Config:
         f"sqlite:///{INSTANCE_DIR / 'app.db'}"
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Pragma profile applied to every SQLite connection (backend/utils/sqlite_tuning.py)
+    SQLITE_PROFILE = os.environ.get("SQLITE_PROFILE", "balanced")
+    SQLITE_PRAGMAS = os.environ.get("SQLITE_PRAGMAS", "")  # e.g. "mmap_size=0,cache_size=-20000"
+    # Per-route statement counts / DB time + slow-query log (backend/utils/sql_metrics.py)
+    SQL_METRICS_ENABLED = os.environ.get("SQL_METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    SQL_SLOW_QUERY_MS = float(os.environ.get("SQL_SLOW_QUERY_MS", 100))
+    SQL_SLOW_LOG_SIZE = int(os.environ.get("SQL_SLOW_LOG_SIZE", 200))
+
+    # --- Metrics (/metrics, Prometheus text; backend/utils/metrics.py) ---
+    METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
 
     # --- JWT Authentication ---
     JWT_SECRET = os.environ.get("JWT_SECRET", "jwt-secret-change-me")
@@ -25,6 +35,9 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(
         hours=int(os.environ.get("JWT_EXP_HOURS", "12"))
     )
+    # Decoded-token identity cache (backend/utils/identity_cache.py)
+    AUTH_CACHE_TTL = int(os.environ.get("AUTH_CACHE_TTL", 60))          # seconds
+    AUTH_CACHE_SIZE = int(os.environ.get("AUTH_CACHE_SIZE", 10000))     # tokens; 0 disables
 
     # --- MQTT Defaults ---
     MQTT_BROKER_URL = os.environ.get("MQTT_BROKER_URL", "test.mosquitto.org")
@@ -33,6 +46,44 @@ class Config:
     MQTT_USERNAME = os.environ.get("MQTT_USERNAME", None)
     MQTT_PASSWORD = os.environ.get("MQTT_PASSWORD", None)
     MQTT_TLS = os.environ.get("MQTT_TLS", "false").lower() in ("1", "true", "yes")
+    MQTT_TRANSPORT = os.environ.get("MQTT_TRANSPORT", "paho")     # paho | memory (in-process broker)
+
+    # --- Ingest (write-behind queue) ---
+    INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", 10000))
+    INGEST_BATCH_SIZE = int(os.environ.get("INGEST_BATCH_SIZE", 500))
+    INGEST_FLUSH_INTERVAL = float(os.environ.get("INGEST_FLUSH_INTERVAL", 1.0))
+
+    # --- Reading storage (backend/timeseries) ---
+    # "sql" = history + history_rollups tables, "segment" = append-only files
+    # for raw readings + history_rollups
+    TIMESERIES_BACKEND = os.environ.get("TIMESERIES_BACKEND", "sql")
+    TIMESERIES_DIR = os.environ.get("TIMESERIES_DIR", str(INSTANCE_DIR / "timeseries"))
+
+    # --- History series (/api/history/series) ---
+    # Raw rows read before switching to a rollup source; bounds query time.
+    SERIES_MAX_SOURCE_ROWS = int(os.environ.get("SERIES_MAX_SOURCE_ROWS", 50000))
+
+    # --- Retention (backend/retention_service.py); days <= 0 keeps forever ---
+    # Opt-in: the daily job only starts (from the server entrypoint) when enabled,
+    # and raw history is kept forever unless RETENTION_HISTORY_DAYS is set.
+    RETENTION_ENABLED = os.environ.get("RETENTION_ENABLED", "false").lower() in ("1", "true", "yes")
+    RETENTION_HISTORY_DAYS = int(os.environ.get("RETENTION_HISTORY_DAYS", 0))
+    RETENTION_ROLLUP_1M_DAYS = int(os.environ.get("RETENTION_ROLLUP_1M_DAYS", 90))
+    RETENTION_ROLLUP_DAYS = int(os.environ.get("RETENTION_ROLLUP_DAYS", 730))  # 1h + 1d buckets
+    # Rows per DELETE and the pause between batches (lets ingest take the write lock)
+    RETENTION_BATCH_SIZE = int(os.environ.get("RETENTION_BATCH_SIZE", 5000))
+    RETENTION_BATCH_PAUSE = float(os.environ.get("RETENTION_BATCH_PAUSE", 0.05))
+    RETENTION_INTERVAL_HOURS = float(os.environ.get("RETENTION_INTERVAL_HOURS", 24))
 
     # --- SocketIO / CORS ---
     SOCKETIO_CORS_ALLOWED_ORIGINS = os.environ.get("SOCKETIO_CORS", "*")
+
+    # --- Socket.IO broadcast scheduler ---
+    SOCKET_BROADCAST_HZ = float(os.environ.get("SOCKET_BROADCAST_HZ", 2.0))
+    # Per-reading events (coalesced) for older clients that don't read
+    # "sensor_batch" yet, e.g. SOCKET_LEGACY_EVENTS=sensor_data. Off by default.
+    SOCKET_LEGACY_EVENTS = [
+        e.strip()
+        for e in os.environ.get("SOCKET_LEGACY_EVENTS", "").split(",")
+        if e.strip()
+    ]
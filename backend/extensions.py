@@ -2,7 +2,17 @@
 # backend/extensions.py
 # ==========================================================
 from flask_sqlalchemy import SQLAlchemy
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO as _SocketIO
+
+from backend.utils.metrics import SOCKETIO_EMITS
+
+
+class SocketIO(_SocketIO):
+    """SocketIO that counts emits per event (every server emit goes through here)."""
+
+    def emit(self, event, *args, **kwargs):
+        SOCKETIO_EMITS.labels(event).inc()
+        return super().emit(event, *args, **kwargs)
 
 # ==========================================================
 # Database and SocketIO Initialization
@@ -0,0 +1,283 @@
+# =================================================================================================
+# Franc Automation - Ingest Service (write-behind queue)
+# Handles:
+#   • Bounded in-memory queue between the MQTT callbacks and the database
+#   • Background writer that flushes readings in ONE transaction per batch
+#   • Counters for queue depth, flush latency and dropped readings
+# =================================================================================================
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import bindparam
+
+from backend.config import Config
+from backend.extensions import db
+from backend.models import Device
+from backend.timeseries import get_store
+from backend.utils import latest_cache
+from backend.utils.audit import log_info
+from backend.utils.metrics import INGEST_COMMIT_SECONDS, INGEST_DROPPED, INGEST_QUEUE_DEPTH, INGEST_WRITTEN
+
+# One reading as produced by the MQTT handler / simulator.
+# topic/payload travel with it for debugging only — just the numbers are stored.
+Reading = namedtuple(
+    "Reading",
+    ["device_id", "topic", "payload", "temperature", "humidity", "pressure", "timestamp"],
+)
+
+
+# ==========================================================
+# Ingest Queue
+# ==========================================================
+class IngestQueue:
+    """Bounded queue + writer thread; the producer side never touches the DB."""
+
+    def __init__(self, maxsize=None, batch_size=None, flush_interval=None):
+        self.maxsize = maxsize or Config.INGEST_QUEUE_SIZE
+        self.batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        self.flush_interval = flush_interval or Config.INGEST_FLUSH_INTERVAL
+
+        self._queue = queue.Queue(maxsize=self.maxsize)
+        self._app = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._enqueued = 0
+        self._written = 0
+        self._dropped = 0
+        self._failed_batches = 0
+        self._flushes = 0
+        self._high_water = 0
+        self._last_batch = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    # ------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app):
+        """Start the background writer (idempotent)."""
+        self._app = app
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+        self._thread.start()
+        log_info(
+            f"[INGEST] ✍️ Writer started (queue={self.maxsize}, batch={self.batch_size}, "
+            f"interval={self.flush_interval}s)"
+        )
+
+    def stop(self, timeout=5.0):
+        """Stop the writer and flush whatever is still queued."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        log_info("[INGEST] 🛑 Writer stopped")
+
+    # ------------------------------------------------------
+    # Producer side (MQTT callback thread)
+    # ------------------------------------------------------
+    def put(self, reading):
+        """Queue a reading without blocking. Returns False if it was dropped."""
+        try:
+            self._queue.put_nowait(reading)
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped += 1
+            INGEST_DROPPED.inc()
+            return False
+
+        latest_cache.update(
+            reading.device_id, reading.temperature, reading.humidity,
+            reading.pressure, reading.timestamp,
+        )
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._enqueued += 1
+            if depth > self._high_water:
+                self._high_water = depth
+        return True
+
+    # ------------------------------------------------------
+    # Consumer side (writer thread)
+    # ------------------------------------------------------
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+
+    def _collect(self):
+        """Block for the first reading, then gather until size or time threshold."""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self):
+        """Synchronously write everything currently queued. Returns rows written."""
+        written = 0
+        while True:
+            batch = self._drain()
+            if not batch:
+                return written
+            written += self._write(batch)
+
+    def _write(self, batch):
+        app = self._app
+        if app is None:
+            with self._stats_lock:
+                self._dropped += len(batch)
+                self._failed_batches += 1
+            INGEST_DROPPED.inc(len(batch))
+            return 0
+
+        started = time.perf_counter()
+        with self._write_lock, app.app_context():
+            try:
+                write_readings(batch)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                with self._stats_lock:
+                    self._dropped += len(batch)
+                    self._failed_batches += 1
+                INGEST_DROPPED.inc(len(batch))
+                log_info(f"[INGEST] ❌ Batch of {len(batch)} failed: {e}")
+                return 0
+            finally:
+                db.session.remove()
+
+        elapsed = time.perf_counter() - started
+        INGEST_COMMIT_SECONDS.observe(elapsed)
+        INGEST_WRITTEN.inc(len(batch))
+        elapsed_ms = elapsed * 1000.0
+        with self._stats_lock:
+            self._written += len(batch)
+            self._flushes += 1
+            self._last_batch = len(batch)
+            self._last_flush_ms = elapsed_ms
+            self._total_flush_ms += elapsed_ms
+            if elapsed_ms > self._max_flush_ms:
+                self._max_flush_ms = elapsed_ms
+        return len(batch)
+
+    # ------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------
+    def stats(self):
+        with self._stats_lock:
+            avg = self._total_flush_ms / self._flushes if self._flushes else 0.0
+            return {
+                "running": self.running,
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self.maxsize,
+                "queue_high_water": self._high_water,
+                "batch_size": self.batch_size,
+                "flush_interval_s": self.flush_interval,
+                "enqueued": self._enqueued,
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed_batches": self._failed_batches,
+                "flushes": self._flushes,
+                "last_batch_size": self._last_batch,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+                "avg_flush_ms": round(avg, 3),
+                "max_flush_ms": round(self._max_flush_ms, 3),
+            }
+
+
+# ==========================================================
+# Batch writer (single transaction, caller commits)
+# ==========================================================
+def write_readings(batch):
+    """Append a batch to the time-series store, refresh device status (caller commits)."""
+    last_seen = {}
+    for r in batch:
+        prev = last_seen.get(r.device_id)
+        if prev is None or r.timestamp > prev:
+            last_seen[r.device_id] = r.timestamp
+
+    # the store is the single durable copy; the "live" view is latest_cache
+    get_store().append_batch(batch)
+    devices = Device.__table__
+    db.session.execute(
+        devices.update()
+        .where(devices.c.id == bindparam("b_id"))
+        .values(status="online", is_connected=True, last_seen=bindparam("b_last_seen")),
+        [{"b_id": k, "b_last_seen": v} for k, v in last_seen.items()],
+    )
+
+
+# ==========================================================
+# Module-level singleton + public helpers
+# ==========================================================
+_ingest_queue = IngestQueue()
+INGEST_QUEUE_DEPTH.set_function(lambda: _ingest_queue._queue.qsize())
+
+
+def start_ingest_writer(app):
+    _ingest_queue.start(app)
+
+
+def stop_ingest_writer():
+    _ingest_queue.stop()
+
+
+def enqueue_reading(reading):
+    return _ingest_queue.put(reading)
+
+
+def flush_ingest_queue():
+    return _ingest_queue.flush()
+
+
+def get_ingest_stats():
+    return _ingest_queue.stats()
+
+
+__all__ = [
+    "Reading",
+    "IngestQueue",
+    "write_readings",
+    "start_ingest_writer",
+    "stop_ingest_writer",
+    "enqueue_reading",
+    "flush_ingest_queue",
+    "get_ingest_stats",
+]
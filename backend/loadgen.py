@@ -0,0 +1,403 @@
+"""
+Ingest load generator — thousands of virtual devices against the real pipeline.
+
+    python -m backend.loadgen [--devices 1000] [--rate 1.0] [--seconds 10]
+                              [--shape json] [--target inproc] [--host localhost]
+
+Creates N devices (francauto/devices/lg-00000 ...) in a scratch database
+(or DATABASE_URL with --keep-db), starts the ingest writer and the
+broadcast scheduler, attaches an in-process Socket.IO client to
+"devices:all" and publishes at rate messages/s per device (0 = as fast as
+the publisher can go). Targets:
+
+  inproc  messages go straight into the MQTT message handler (topic
+          router → parser → ingest queue → broadcaster), no broker
+  mqtt    devices connect to a local broker on host:1883 through the normal
+          connection manager; a separate paho client publishes to it
+  memory  same as mqtt, but on the in-process broker (MQTT_TRANSPORT=memory):
+          the full client path — wildcard subscription, topic routing —
+          with no sockets, so it runs anywhere
+
+Report: achieved messages/s vs target, readings written / dropped / lost,
+and ingest-to-socket latency percentiles (publish → sensor_batch frame
+seen by the client). Readings carry a per-device sequence number in the
+pressure field so frames can be matched to their send time; with the
+broadcaster's latest-value-wins coalescing only the newest reading per
+device per tick reaches the client, the others count as coalesced.
+Queue and tick sizes come from INGEST_* / SOCKET_BROADCAST_HZ.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import eventlet
+
+from backend.app import create_app  # first: monkey-patches for eventlet before Flask is imported
+from backend.config import Config
+from backend.extensions import db, socketio
+from backend.models import Device
+from backend.timeseries import create_store, set_store
+from backend.utils.payload_parsers import encode_struct
+
+try:
+    import cbor2
+except ImportError:  # optional binary format
+    cbor2 = None
+
+TOPIC_PREFIX = "francauto/devices/"
+POLL_INTERVAL = 0.002     # Socket.IO client poll (latency resolution)
+MAX_BURST = 2000          # messages published between yields
+
+
+# ==========================================================
+# Payload shapes — (Device.payload_format, encoder(seq, rnd) → bytes)
+# ==========================================================
+def _values(seq, rnd):
+    return round(rnd.uniform(20.0, 35.0), 2), round(rnd.uniform(35.0, 75.0), 2), float(seq)
+
+
+def _json(seq, rnd):
+    t, h, p = _values(seq, rnd)
+    return json.dumps({"temperature": t, "humidity": h, "pressure": p}).encode()
+
+
+def _json_alias(seq, rnd):
+    t, h, p = _values(seq, rnd)
+    return json.dumps({"t": t, "hum": h, "press": p}).encode()
+
+
+def _json_wide(seq, rnd):
+    t, h, p = _values(seq, rnd)
+    return json.dumps({
+        "device": "lg", "fw": "2.4.1", "rssi": -rnd.randint(40, 90), "battery": rnd.randint(10, 100),
+        "temp": t, "humidity": h, "pressure": p,
+        "status": "online", "location": {"lat": 12.97, "lon": 77.59}, "tags": ["load", "test"],
+    }).encode()
+
+
+def _struct(seq, rnd):
+    return encode_struct(*_values(seq, rnd))
+
+
+def _cbor(seq, rnd):
+    t, h, p = _values(seq, rnd)
+    return cbor2.dumps({"temperature": t, "humidity": h, "pressure": p})
+
+
+SHAPES = {
+    "json": ("json", _json),
+    "json-alias": ("json", _json_alias),
+    "json-wide": ("json", _json_wide),
+    "struct": ("struct", _struct),
+}
+if cbor2 is not None:
+    SHAPES["cbor"] = ("cbor", _cbor)
+
+
+# ==========================================================
+# Targets
+# ==========================================================
+class InProcTarget:
+    """Hands messages to the MQTT message handler directly (no broker)."""
+
+    name = "inproc"
+
+    def connect(self, devices):
+        pass
+
+    def publish(self, topic, payload):
+        from backend import mqtt_service
+
+        ref = mqtt_service.route_topic(topic)
+        if ref is None:
+            return False
+        mqtt_service.handle_message(ref, SimpleNamespace(topic=topic, payload=payload))
+        return True
+
+    def close(self):
+        pass
+
+
+class MqttTarget:
+    """Devices subscribe through the connection manager; paho publishes to the broker."""
+
+    name = "mqtt"
+
+    def __init__(self, host, port=1883):
+        import paho.mqtt.client as mqtt
+
+        self.host, self.port = host, port
+        self.client = mqtt.Client()
+
+    def connect(self, devices):
+        from backend import mqtt_service
+
+        for d in devices:
+            mqtt_service.start_mqtt_client(d)
+        self.client.connect(self.host, self.port, 60)
+        self.client.loop_start()
+        eventlet.sleep(1.0)   # let the app's SUBSCRIBE land before publishing
+
+    def publish(self, topic, payload):
+        return self.client.publish(topic, payload, qos=0).rc == 0
+
+    def close(self):
+        from backend import mqtt_service
+
+        eventlet.sleep(0.5)   # drain in-flight messages
+        self.client.loop_stop()
+        self.client.disconnect()
+        mqtt_service.reset_all_mqtt_state()
+
+
+class MemoryTarget(MqttTarget):
+    """MqttTarget on the in-process broker; switches MQTT_TRANSPORT for the run."""
+
+    name = "memory"
+
+    def __init__(self, host, port=1883):
+        from backend.mqtt_transport import MemoryClient
+
+        self.host, self.port = host, port
+        self.client = MemoryClient("loadgen-publisher")
+        self._previous = Config.MQTT_TRANSPORT
+
+    def connect(self, devices):
+        from backend import mqtt_service
+
+        Config.MQTT_TRANSPORT = "memory"
+        for d in devices:
+            mqtt_service.start_mqtt_client(d)
+        self.client.connect(self.host, self.port, 60)
+
+    def close(self):
+        from backend import mqtt_service
+
+        self.client.disconnect()
+        mqtt_service.reset_all_mqtt_state()
+        Config.MQTT_TRANSPORT = self._previous
+
+
+# ==========================================================
+# Socket.IO probe — matches sensor_batch readings to send times
+# ==========================================================
+class LatencyProbe:
+    def __init__(self, app):
+        self.client = socketio.test_client(app)
+        self.sent = {}          # device_id -> deque[(seq, t_sent)]
+        self.latencies = []
+        self.readings_seen = 0
+        self.frames = 0
+        self._running = False
+        self._thread = None
+
+    def mark(self, device_id, seq, t):
+        q = self.sent.get(device_id)
+        if q is None:
+            q = self.sent[device_id] = deque()
+        q.append((seq, t))
+
+    def _match(self, device_id, seq, now):
+        q = self.sent.get(device_id)
+        while q:
+            s, t = q.popleft()
+            if s == seq:
+                self.latencies.append(now - t)
+                return
+            if s > seq:          # already matched / never sent
+                q.appendleft((s, t))
+                return
+
+    def poll(self):
+        packets = self.client.get_received()
+        now = time.perf_counter()
+        for pkt in packets:
+            if pkt.get("name") != "sensor_batch":
+                continue
+            self.frames += 1
+            for r in (pkt["args"][0] or {}).get("readings", []):
+                self.readings_seen += 1
+                self._match(r.get("device_id"), int(r.get("pressure") or 0), now)
+
+    def _run(self):
+        while self._running:
+            self.poll()
+            eventlet.sleep(POLL_INTERVAL)
+
+    def start(self):
+        self._running = True
+        self._thread = eventlet.spawn(self._run)
+
+    def stop(self):
+        self._running = False
+        if self._thread:
+            self._thread.wait()
+        self.poll()
+        self.client.disconnect()
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    s = sorted(samples)
+
+    def pick(q):
+        return round(s[min(len(s) - 1, int(len(s) * q))] * 1000, 2)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": round(s[-1] * 1000, 2)}
+
+
+# ==========================================================
+# Run
+# ==========================================================
+def _seed_devices(n, fmt, host):
+    rows = [{"name": f"lg-{i:05d}", "host": host, "payload_format": fmt, "status": "offline"} for i in range(n)]
+    db.session.execute(Device.__table__.insert(), rows)
+    db.session.commit()
+    return Device.query.filter(Device.name.like("lg-%")).order_by(Device.name).all()
+
+
+def publish_load(target, fleet, rate, seconds, probe, shape, seed=1):
+    """Paced round-robin publisher. Returns (messages sent, elapsed seconds, publish errors)."""
+    encode = SHAPES[shape][1]
+    rnd = random.Random(seed)
+    total_rate = rate * len(fleet)
+    seqs = [0] * len(fleet)
+    sent = errors = i = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+
+    while True:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        due = MAX_BURST if not total_rate else min(MAX_BURST, int((now - started) * total_rate) - sent)
+        if due <= 0:
+            eventlet.sleep(min(0.001, 1.0 / total_rate))
+            continue
+        for _ in range(due):
+            k = i % len(fleet)
+            device_id, topic = fleet[k]
+            seqs[k] += 1
+            probe.mark(device_id, seqs[k], time.perf_counter())
+            if not target.publish(topic, encode(seqs[k], rnd)):
+                errors += 1
+            sent += 1
+            i += 1
+        eventlet.sleep(0)   # let the ingest writer / broadcaster / probe run
+    return sent, time.perf_counter() - started, errors
+
+
+def run(devices=1000, rate=1.0, seconds=10.0, shape="json", target="inproc", host="localhost",
+        port=1883, keep_db=False, seed=1):
+    from backend import mqtt_service
+    from backend.broadcast_service import get_broadcast_stats, start_broadcaster, stop_broadcaster
+    from backend.ingest_service import get_ingest_stats, start_ingest_writer, stop_ingest_writer
+
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape '{shape}' (choose from {', '.join(SHAPES)})")
+    tmp = previous_store = None
+    if not keep_db:
+        tmp = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp.name, 'loadgen.db')}"
+        # scratch readings too: the segment backend must not append to the real TIMESERIES_DIR
+        previous_store = set_store(create_store(root=os.path.join(tmp.name, "timeseries")))
+    try:
+        app = create_app()
+        mqtt_service._flask_app = app
+        with app.app_context():
+            db.create_all()
+            rows = _seed_devices(devices, SHAPES[shape][0], host)
+            fleet = [(d.id, f"{TOPIC_PREFIX}{d.name}") for d in rows]
+            mqtt_service.invalidate_device_cache()
+
+            tgt = TARGETS[target](host, port) if target in TARGETS else InProcTarget()
+            start_ingest_writer(app)
+            start_broadcaster()
+            tgt.connect(rows)
+            db.session.remove()
+
+        ingest_before, broadcast_before = get_ingest_stats(), get_broadcast_stats()
+        probe = LatencyProbe(app)
+        probe.start()
+        try:
+            sent, elapsed, errors = publish_load(tgt, fleet, rate, seconds, probe, shape, seed)
+        finally:
+            tgt.close()
+            stop_ingest_writer()      # joins the writer and flushes its last batch
+            stop_broadcaster()        # final tick
+            probe.stop()
+        ingest, broadcast = get_ingest_stats(), get_broadcast_stats()
+
+        enqueued = ingest["enqueued"] - ingest_before["enqueued"]
+        written = ingest["written"] - ingest_before["written"]
+        dropped = ingest["dropped"] - ingest_before["dropped"]
+        report = {
+            "target": tgt.name,
+            "shape": shape,
+            "devices": devices,
+            "seconds": round(elapsed, 2),
+            "target_msgs_per_s": round(rate * devices) if rate else None,
+            "achieved_msgs_per_s": round(sent / elapsed) if elapsed else 0,
+            "sent": sent,
+            "publish_errors": errors,
+            "ingested": enqueued,
+            "written": written,
+            "dropped": dropped,                      # ingest queue full / failed batches
+            "lost": max(0, sent - enqueued - dropped - errors),   # never reached the handler
+            "write_per_s": round(written / elapsed) if elapsed else 0,
+            "socket_frames": probe.frames,
+            "socket_readings": probe.readings_seen,
+            "coalesced": broadcast["readings_coalesced"] - broadcast_before["readings_coalesced"],
+            "latency": _percentiles(probe.latencies),
+        }
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        mqtt_service._flask_app = None
+        return report
+    finally:
+        if tmp is not None:
+            set_store(previous_store)
+            os.environ.pop("DATABASE_URL", None)
+            tmp.cleanup()
+
+
+TARGETS = {"mqtt": MqttTarget, "memory": MemoryTarget}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--devices", type=int, default=1000, help="virtual devices")
+    ap.add_argument("--rate", type=float, default=1.0, help="messages/s per device (0 = unthrottled)")
+    ap.add_argument("--seconds", type=float, default=10.0, help="load duration")
+    ap.add_argument("--shape", default="json", choices=sorted(SHAPES), help="payload shape")
+    ap.add_argument("--target", default="inproc", choices=("inproc", "mqtt", "memory"))
+    ap.add_argument("--host", default="localhost", help="broker host for --target mqtt|memory")
+    ap.add_argument("--port", type=int, default=1883, help="broker port the publisher uses")
+    ap.add_argument("--keep-db", action="store_true", help="use DATABASE_URL instead of a scratch DB")
+    ap.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = ap.parse_args()
+
+    report = run(args.devices, args.rate, args.seconds, args.shape, args.target,
+                 args.host, args.port, args.keep_db)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    lat = report["latency"]
+    print(f"{report['target']}/{report['shape']}: {report['devices']} devices for {report['seconds']}s")
+    print(f"  msgs/s      target {report['target_msgs_per_s'] or 'max'}  achieved {report['achieved_msgs_per_s']}")
+    print(f"  readings    sent {report['sent']}  written {report['written']}  dropped {report['dropped']}"
+          f"  lost {report['lost']}  publish errors {report['publish_errors']}")
+    print(f"  socket      frames {report['socket_frames']}  readings {report['socket_readings']}"
+          f"  coalesced {report['coalesced']}")
+    print(f"  latency ms  p50 {lat['p50_ms']}  p95 {lat['p95_ms']}  p99 {lat['p99_ms']}  max {lat['max_ms']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+-- =========================================================
+-- 009_add_device_payload_format.sql — Per-device MQTT payload encoding
+-- json (default) | struct (3 x little-endian float32) | cbor
+-- =========================================================
+ALTER TABLE devices ADD COLUMN payload_format TEXT DEFAULT 'json';
@@ -0,0 +1,10 @@
+-- ============================
+-- READING INDEXES
+-- Every history / chart / latest / export query filters or orders by
+-- timestamp, optionally narrowed to one device.
+-- ============================
+CREATE INDEX IF NOT EXISTS ix_sensors_device_ts ON sensors (device_id, timestamp);
+CREATE INDEX IF NOT EXISTS ix_sensors_timestamp ON sensors (timestamp);
+
+CREATE INDEX IF NOT EXISTS ix_history_device_ts ON history (device_id, timestamp);
+CREATE INDEX IF NOT EXISTS ix_history_timestamp ON history (timestamp);
@@ -0,0 +1,16 @@
+-- ============================
+-- SINGLE READING STORE
+-- Ingest used to write every reading to BOTH sensors and history.
+-- history is now the only durable store, so drop the sensors copies that
+-- have an identical history row. Manually created sensors (no twin) stay.
+-- Run VACUUM afterwards to hand the freed pages back to the filesystem.
+-- ============================
+DELETE FROM sensors
+WHERE EXISTS (
+    SELECT 1 FROM history h
+    WHERE h.device_id = sensors.device_id
+      AND h.timestamp = sensors.timestamp
+      AND h.temperature IS sensors.temperature
+      AND h.humidity IS sensors.humidity
+      AND h.pressure IS sensors.pressure
+);
@@ -0,0 +1,26 @@
+-- ============================
+-- HISTORY ROLLUPS
+-- min / max / sum / count per device per 1m, 1h and 1d bucket,
+-- maintained incrementally by the ingest writer.
+-- ============================
+CREATE TABLE IF NOT EXISTS history_rollups (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    device_id INTEGER NOT NULL,
+    resolution TEXT NOT NULL,
+    bucket DATETIME NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    temp_min REAL,
+    temp_max REAL,
+    temp_sum REAL,
+    hum_min REAL,
+    hum_max REAL,
+    hum_sum REAL,
+    press_min REAL,
+    press_max REAL,
+    press_sum REAL,
+    FOREIGN KEY (device_id) REFERENCES devices(id),
+    CONSTRAINT uq_rollup_bucket UNIQUE (device_id, resolution, bucket)
+);
+
+-- all-device listings (e.g. the 7-day history page) filter on resolution + bucket
+CREATE INDEX IF NOT EXISTS ix_rollups_resolution_bucket ON history_rollups (resolution, bucket);
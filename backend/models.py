@@ -120,6 +120,7 @@ class Device(db.Model):
     status = db.Column(db.String(20), default="offline")
     enable_tls = db.Column(db.Boolean, default=False)
     is_connected = db.Column(db.Boolean, default=False)
+    payload_format = db.Column(db.String(20), default="json")   # json | struct | cbor
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     last_seen = db.Column(db.DateTime, nullable=True)
@@ -143,6 +144,7 @@ class Device(db.Model):
             "auto_reconnect": self.auto_reconnect,
             "reconnect_period": self.reconnect_period,
             "enable_tls": self.enable_tls,
+            "payload_format": self.payload_format,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
             "last_seen": self.last_seen.isoformat() if self.last_seen else None,
@@ -155,6 +157,10 @@ INDIA_TZ = timezone("Asia/Kolkata")
 
 class Sensor(db.Model):
     __tablename__ = "sensors"
+    __table_args__ = (
+        db.Index("ix_sensors_device_ts", "device_id", "timestamp"),
+        db.Index("ix_sensors_timestamp", "timestamp"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     device_id = db.Column(db.Integer, db.ForeignKey("devices.id"), nullable=False)
@@ -210,6 +216,10 @@ class Setting(db.Model):
 # ==========================================================
 class History(db.Model):
     __tablename__ = "history"
+    __table_args__ = (
+        db.Index("ix_history_device_ts", "device_id", "timestamp"),
+        db.Index("ix_history_timestamp", "timestamp"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     device_id = db.Column(db.Integer, db.ForeignKey("devices.id"))
@@ -230,6 +240,49 @@ class History(db.Model):
             "timestamp": self.timestamp.isoformat() if self.timestamp else None,
         }
 
+# ==========================================================
+# History Rollups (per device, per minute / hour / day)
+# ==========================================================
+class HistoryRollup(db.Model):
+    __tablename__ = "history_rollups"
+    __table_args__ = (
+        db.UniqueConstraint("device_id", "resolution", "bucket", name="uq_rollup_bucket"),
+        db.Index("ix_rollups_resolution_bucket", "resolution", "bucket"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    device_id = db.Column(db.Integer, db.ForeignKey("devices.id"), nullable=False)
+    resolution = db.Column(db.String(4), nullable=False)     # "1m", "1h", "1d"
+    bucket = db.Column(db.DateTime, nullable=False)          # bucket start (India wall time)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    temp_min = db.Column(db.Float)
+    temp_max = db.Column(db.Float)
+    temp_sum = db.Column(db.Float)
+    hum_min = db.Column(db.Float)
+    hum_max = db.Column(db.Float)
+    hum_sum = db.Column(db.Float)
+    press_min = db.Column(db.Float)
+    press_max = db.Column(db.Float)
+    press_sum = db.Column(db.Float)
+
+    def to_dict(self):
+        n = self.count or 1
+        return {
+            "device_id": self.device_id,
+            "resolution": self.resolution,
+            "timestamp": self.bucket.isoformat() if self.bucket else None,
+            "count": self.count,
+            "temperature": self.temp_sum / n if self.temp_sum is not None else None,
+            "temperature_min": self.temp_min,
+            "temperature_max": self.temp_max,
+            "humidity": self.hum_sum / n if self.hum_sum is not None else None,
+            "humidity_min": self.hum_min,
+            "humidity_max": self.hum_max,
+            "pressure": self.press_sum / n if self.press_sum is not None else None,
+            "pressure_min": self.press_min,
+            "pressure_max": self.press_max,
+        }
+
 # ---------- Dashboard & Widget Models ----------
 class Dashboard(db.Model):
     __tablename__ = "dashboards"
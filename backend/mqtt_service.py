@@ -2,26 +2,28 @@
 # Franc Automation - MQTT Service (Final Stable Anti-Flicker Build v3 with History Logging)
 # Handles:
 #   • Real & simulated MQTT data ingestion
-#   • Stores in BOTH Sensor (live) + History (archive)
-#   • Socket.IO updates to Dashboard / Live / Devices
+#   • Stores readings in History via the batched ingest queue (live view = latest_cache)
+#   • Socket.IO updates to Dashboard / Live / Devices (coalesced per tick)
 #   • Stable connection state, no flicker
 # =================================================================================================
 import eventlet
 eventlet.monkey_patch(all=True)
 
-import json
-import re
 import threading
 import os
 import random
-import socket
+from collections import namedtuple
 from datetime import datetime
 from pytz import timezone
-import paho.mqtt.client as mqtt
 from flask import current_app
+from backend import mqtt_transport
 from backend.extensions import db, socketio
-from backend.models import Device, Sensor, History     # <-- ✔ Added History Model
+from backend.models import Device
+from backend.ingest_service import Reading, enqueue_reading, start_ingest_writer
+from backend.broadcast_service import publish_reading, start_broadcaster
 from backend.utils.audit import log_info
+from backend.utils.metrics import MQTT_FAILED, MQTT_PARSED, MQTT_RECEIVED, MQTT_UNROUTED
+from backend.utils.payload_parsers import DEFAULT_FORMAT, Unparsed, get_parser, parse_json
 
 # ==========================================================
 # Globals / Config
@@ -29,13 +31,20 @@ from backend.utils.audit import log_info
 KEEPALIVE = int(os.environ.get("MQTT_KEEPALIVE", 60))
 INDIA_TZ = timezone("Asia/Kolkata")
 
-_active_device_id = None
-_mqtt_clients = {}
+TOPIC_PREFIX = "francauto/devices/"
+TOPIC_WILDCARD = TOPIC_PREFIX + "+"
+SIMULATED_HOSTS = ("broker.hivemq.com", "broker.emqx.io", "test.mosquitto.org")
+
+# Lightweight device handle — never keep ORM instances alive across threads
+DeviceRef = namedtuple("DeviceRef", ["id", "name", "payload_format"], defaults=(DEFAULT_FORMAT,))
+
+_connections = {}          # (host, port) -> _BrokerConnection
+_active_devices = {}       # device_id -> (host, port)
+_device_refs = None        # device name -> DeviceRef (topic router cache, None = not loaded)
 _flask_app = None
 _state_lock = threading.RLock()
 
-_simulator_thread = None
-_simulator_stop = threading.Event()
+_simulators = {}           # device_id -> (greenthread, stop Event)
 
 
 # ==========================================================
@@ -70,37 +79,12 @@ def _num(value):
 
 
 def reachable_broker(host, port=1883, timeout=3):
-    try:
-        socket.create_connection((host, port), timeout=timeout)
-        return True
-    except Exception:
-        return False
+    return mqtt_transport.reachable(host, port, timeout)
 
 
 def _parse_payload(payload_text: str):
-    try:
-        data = json.loads(payload_text)
-    except Exception:
-        try:
-            fixed = re.sub(r'(\w+)\s*:', r'"\1":', payload_text)
-            data = json.loads(fixed)
-        except Exception:
-            data = {"raw": payload_text}
-
-    norm = {}
-    for k, v in data.items():
-        k = str(k).lower()
-        if k in ("temperature", "temp", "t"):
-            norm["temperature"] = _num(v)
-        elif k in ("humidity", "hum", "h"):
-            norm["humidity"] = _num(v)
-        elif k in ("pressure", "press", "p"):
-            norm["pressure"] = _num(v)
-
-    norm.setdefault("temperature", 0.0)
-    norm.setdefault("humidity", 0.0)
-    norm.setdefault("pressure", 0.0)
-    return norm
+    """Backward-compatible JSON parse; see backend.utils.payload_parsers."""
+    return parse_json(payload_text)
 
 
 # ==========================================================
@@ -113,8 +97,8 @@ def emit_global_mqtt_status(force_offline=False):
         return
     
     with app.app_context():
-        online = 1 if (_active_device_id and not force_offline) else 0
-        total = Device.query.count()
+        online = 0 if force_offline else len(_active_devices)
+        total = _device_count()
         iso, ms = _format_time(_safe_now())
 
         payload = {
@@ -130,20 +114,16 @@ def emit_global_mqtt_status(force_offline=False):
 
 
 # ==========================================================
-# Unified emitters
+# Unified emitters (coalesced by the broadcast scheduler)
 # ==========================================================
 def _emit_all(device, temperature, humidity, pressure, status):
-    app = _get_flask_app()
-    if not app:
-        return
-
     now = _safe_now()
     iso, _ = _format_time(now)
 
     device_id = getattr(device, "id", None) if device else None
     name = getattr(device, "name", "Unknown") if device else "Unknown"
 
-    payload = {
+    publish_reading({
         "device_id": device_id,
         "device_name": name,
         "temperature": _num(temperature),
@@ -152,42 +132,27 @@ def _emit_all(device, temperature, humidity, pressure, status):
         "status": status,
         "timestamp": iso,
         "devices_online": 1 if status == "online" else 0,
-    }
-
-    with app.app_context():
-        socketio.emit("sensor_data", payload, namespace="/")
-        socketio.emit("device_data_update", payload, namespace="/")
-        socketio.emit("dashboard_update", payload, namespace="/")
-        socketio.emit(
-            "device_status",
-            {"device_id": device_id, "status": status, "last_seen": iso},
-            namespace="/",
-        )
-
-    print(
-        f"[EMIT] → {name} {status.upper()} | "
-        f"T={payload['temperature']}°C H={payload['humidity']}% P={payload['pressure']} | {iso}"
-    )
+    })
 
 
 # ==========================================================
 # SIMULATOR + HISTORY STORAGE
 # ==========================================================
 def _start_simulator(device, host, interval=2.0):
-    global _simulator_thread
-    _stop_simulator()
+    ref = DeviceRef(device.id, device.name, getattr(device, "payload_format", None) or DEFAULT_FORMAT)
+    _stop_simulator(ref.id)
 
-    if host not in ("broker.hivemq.com", "broker.emqx.io", "test.mosquitto.org"):
+    if host not in SIMULATED_HOSTS:
         return
 
-    _simulator_stop.clear()
+    stop = threading.Event()
 
     def sim_loop():
-        log_info(f"[SIMULATOR] 🎮 Started for {device.name} ({host})")
+        log_info(f"[SIMULATOR] 🎮 Started for {ref.name} ({host})")
         app = _get_flask_app()
 
-        while not _simulator_stop.is_set():
-            if _active_device_id != device.id or not device.is_connected:
+        while not stop.is_set():
+            if ref.id not in _active_devices:
                 break
 
             now = _safe_now()
@@ -198,52 +163,37 @@ def _start_simulator(device, host, interval=2.0):
             }
 
             if app:
-                with app.app_context():
-                    # Live storage
-                    s = Sensor(
-                        device_id=device.id,
-                        topic=f"francauto/devices/{device.name}",
-                        payload=json.dumps(data),
-                        temperature=data["temperature"],
-                        humidity=data["humidity"],
-                        pressure=data["pressure"],
-                        timestamp=now,
-                    )
-                    db.session.add(s)
-
-                    # Archive storage (NEW)
-                    h = History(
-                        device_id=device.id,
-                        temperature=data["temperature"],
-                        humidity=data["humidity"],
-                        pressure=data["pressure"],
-                        timestamp=now,
-                    )
-                    db.session.add(h)
-
-                    device.last_seen = now
-                    device.status = "online"
-                    device.is_connected = True
-                    db.session.commit()
-
-            _emit_all(device, **data, status="online")
-            emit_global_mqtt_status(force_offline=False)
+                # Archive storage via the write-behind queue
+                start_ingest_writer(app)
+                enqueue_reading(Reading(
+                    device_id=ref.id,
+                    topic=f"{TOPIC_PREFIX}{ref.name}",
+                    payload=None,
+                    timestamp=now,
+                    **data,
+                ))
+
+            _emit_all(ref, **data, status="online")
             eventlet.sleep(interval)
 
-        log_info(f"[SIMULATOR] 🛑 Stopped for {device.name}")
+        log_info(f"[SIMULATOR] 🛑 Stopped for {ref.name}")
 
-    _simulator_thread = eventlet.spawn(sim_loop)
+    _simulators[ref.id] = (eventlet.spawn(sim_loop), stop)
 
 
-def _stop_simulator():
-    _simulator_stop.set()
-    global _simulator_thread
-    if _simulator_thread:
+def _stop_simulator(device_id=None):
+    """Stop one device's simulator, or all of them when device_id is None."""
+    ids = list(_simulators) if device_id is None else [device_id]
+    for did in ids:
+        entry = _simulators.pop(did, None)
+        if not entry:
+            continue
+        thread, stop = entry
+        stop.set()
         try:
-            _simulator_thread.kill()
+            thread.kill()
         except Exception:
             pass
-        _simulator_thread = None
 
 
 # ==========================================================
@@ -254,143 +204,266 @@ def handle_message(device, msg):
     if not app:
         return
 
-    try:
-        payload_text = msg.payload.decode(errors="ignore")
-    except Exception:
-        payload_text = str(msg.payload)
-
-    data = _parse_payload(payload_text)
+    MQTT_RECEIVED.labels(device.name).inc()
+    parse = get_parser(getattr(device, "payload_format", DEFAULT_FORMAT))
+    data = parse(msg.payload)
+    (MQTT_FAILED if isinstance(data, Unparsed) else MQTT_PARSED).labels(device.name).inc()
     now = _safe_now()
 
-    with app.app_context():
-        s = Sensor(
-            device_id=device.id,
-            topic=getattr(msg, "topic", f"francauto/devices/{device.name}"),
-            payload=json.dumps(data),
-            temperature=data["temperature"],
-            humidity=data["humidity"],
-            pressure=data["pressure"],
-            timestamp=now,
-        )
-        db.session.add(s)
-
-        h = History(
-            device_id=device.id,
-            temperature=data["temperature"],
-            humidity=data["humidity"],
-            pressure=data["pressure"],
-            timestamp=now,
-        )
-        db.session.add(h)
-
-        device.status = "online"
-        device.is_connected = True
-        device.last_seen = now
-        db.session.commit()
+    # Never touch the DB on the paho network thread — the ingest writer
+    # persists History + Device status in batched transactions.
+    start_ingest_writer(app)
+    enqueue_reading(Reading(
+        device_id=device.id,
+        topic=getattr(msg, "topic", f"{TOPIC_PREFIX}{device.name}"),
+        payload=msg.payload,
+        timestamp=now,
+        **data,
+    ))
 
     _emit_all(device, **data, status="online")
-    emit_global_mqtt_status(force_offline=False)
 
 
 # ==========================================================
-# CONNECT / DISCONNECT
+# TOPIC ROUTER — francauto/devices/<name> → cached device id
 # ==========================================================
-def start_mqtt_client(device):
-    global _active_device_id, _mqtt_clients
+def invalidate_device_cache():
+    """Drop the name → device map; call whenever devices are added, changed or deleted."""
+    global _device_refs
+    _device_refs = None
 
-    with _state_lock:
-        if _active_device_id:
-            log_info(f"[MQTT] ❌ Another device already active.")
-            return False
 
-        host = (device.host or "broker.hivemq.com").strip().lower()
-        topic = f"francauto/devices/{device.name}"
+def _load_device_cache():
+    global _device_refs
+    app = _get_flask_app()
+    if not app:
+        return {}
+    with app.app_context():
+        rows = db.session.query(Device.id, Device.name, Device.payload_format).all()
+    refs = {name: DeviceRef(did, name, fmt or DEFAULT_FORMAT) for did, name, fmt in rows}
+    _device_refs = refs
+    return refs
+
+
+def resolve_device(name):
+    """O(1) device lookup by name; the DB is only read after an invalidation."""
+    refs = _device_refs
+    if refs is None:
+        refs = _load_device_cache()
+    return refs.get(name)
+
+
+def _device_count():
+    refs = _device_refs
+    if refs is None:
+        refs = _load_device_cache()
+    return len(refs)
+
+
+def resolve_device_id(name):
+    ref = resolve_device(name)
+    return ref.id if ref else None
+
+
+def route_topic(topic):
+    """Map an incoming topic to a DeviceRef, or None when it is not one of ours."""
+    if not topic.startswith(TOPIC_PREFIX):
+        return None
+    name = topic[len(TOPIC_PREFIX):]
+    if not name or "/" in name:
+        return None
+    return resolve_device(name)
 
-        if not reachable_broker(host, 1883, 3):
-            log_info(f"[MQTT] ⚠️ Broker {host} unreachable → staying offline.")
-            app = _get_flask_app()
-            if app:
-                with app.app_context():
-                    device.status = "offline"
-                    device.is_connected = False
-                    db.session.commit()
-            _emit_all(device, 0, 0, 0, "offline")
-            emit_global_mqtt_status(force_offline=True)
-            return False
 
+# ==========================================================
+# CONNECTION MANAGER — one shared paho client per broker
+# ==========================================================
+class _BrokerConnection:
+    """
+    A single paho client shared by every device on the same broker.
+    It holds ONE wildcard subscription and routes each message to its device
+    through the in-memory topic router, so N devices on one broker cost one
+    socket, one network loop and one SUBSCRIBE instead of N.
+    """
+
+    def __init__(self, host, port=1883):
+        self.host = host
+        self.port = port
+        self.devices = {}       # device_id -> name (devices connected via this broker)
+        self.connected = False
+        self.messages = 0
+        self.unrouted = 0
+        self.client = mqtt_transport.create_client()
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_message = self._on_message
+
+    @property
+    def key(self):
+        return (self.host, self.port)
+
+    def open(self):
+        self.client.connect(self.host, self.port, KEEPALIVE)
+        self.client.loop_start()
+
+    def close(self):
         try:
-            client = mqtt.Client()
-            client.on_connect = lambda c, u, f, rc: c.subscribe(topic)
-            client.on_message = lambda c, u, m: handle_message(device, m)
-            client.connect(host, 1883, KEEPALIVE)
-            client.loop_start()
+            self.client.loop_stop()
+            self.client.disconnect()
+        except Exception:
+            pass
+        self.connected = False
 
-            _mqtt_clients[device.id] = client
-            _active_device_id = device.id
+    def add_device(self, ref):
+        first = not self.devices
+        self.devices[ref.id] = ref.name
+        if first and self.connected:
+            self.client.subscribe(TOPIC_WILDCARD)
+
+    def remove_device(self, device_id):
+        self.devices.pop(device_id, None)
+        if not self.devices:
+            try:
+                self.client.unsubscribe(TOPIC_WILDCARD)
+            except Exception:
+                pass
+
+    # paho callbacks (network loop thread)
+    def _on_connect(self, client, userdata, flags, rc):
+        self.connected = rc == 0
+        if self.connected and self.devices:
+            client.subscribe(TOPIC_WILDCARD)
+
+    def _on_disconnect(self, client, userdata, rc):
+        self.connected = False
+
+    def _on_message(self, client, userdata, msg):
+        self.messages += 1
+        ref = route_topic(msg.topic)
+        if ref is None or ref.id not in self.devices:
+            self.unrouted += 1
+            MQTT_UNROUTED.inc()
+            return
+        handle_message(ref, msg)
+
+    def stats(self):
+        return {
+            "host": self.host,
+            "port": self.port,
+            "connected": self.connected,
+            "fan_in": len(self.devices),
+            "devices": sorted(self.devices.values()),
+            "messages": self.messages,
+            "unrouted": self.unrouted,
+        }
 
-            app = _get_flask_app()
-            if app:
-                with app.app_context():
-                    device.status = "online"
-                    device.is_connected = True
-                    device.last_seen = _safe_now()
-                    db.session.commit()
 
+def _set_device_state(device_id, status):
+    """Persist online/offline by id (the caller's ORM instance may live in another session)."""
+    app = _get_flask_app()
+    if app:
+        with app.app_context():
+            devices = Device.__table__
+            db.session.execute(
+                devices.update()
+                .where(devices.c.id == device_id)
+                .values(status=status, is_connected=status == "online", last_seen=_safe_now())
+            )
+            db.session.commit()
+
+
+# ==========================================================
+# CONNECT / DISCONNECT
+# ==========================================================
+def start_mqtt_client(device):
+    with _state_lock:
+        if device.id in _active_devices:
+            log_info(f"[MQTT] ℹ️ Device {device.name} already connected.")
+            return True
+
+        host = (device.host or "broker.hivemq.com").strip().lower()
+        key = (host, 1883)
+        ref = resolve_device(device.name) or DeviceRef(device.id, device.name)
+
+        try:
+            conn = _connections.get(key)
+            if conn is None:
+                if not reachable_broker(host, 1883, 3):
+                    log_info(f"[MQTT] ⚠️ Broker {host} unreachable → staying offline.")
+                    _set_device_state(device.id, "offline")
+                    _emit_all(ref, 0, 0, 0, "offline")
+                    emit_global_mqtt_status()
+                    return False
+
+                conn = _BrokerConnection(host, 1883)
+                conn.open()
+                _connections[key] = conn
+                log_info(f"[MQTT] 🔗 Opened shared connection to {host}")
+
+            conn.add_device(ref)
+            _active_devices[device.id] = key
+
+            _set_device_state(device.id, "online")
             _start_simulator(device, host)
             emit_global_mqtt_status(force_offline=False)
-            log_info(f"[MQTT] ✔ Device {device.name} started successfully")
+            log_info(
+                f"[MQTT] ✔ Device {device.name} started successfully "
+                f"({len(conn.devices)} device(s) on {host})"
+            )
             return True
 
         except Exception as e:
             log_info(f"[MQTT] ❌ Connection failed for {device.name}: {e}")
-            app = _get_flask_app()
-            if app:
-                with app.app_context():
-                    device.status = "offline"
-                    device.is_connected = False
-                    db.session.commit()
-            _emit_all(device, 0, 0, 0, "offline")
-            emit_global_mqtt_status(force_offline=True)
+            _set_device_state(device.id, "offline")
+            _emit_all(ref, 0, 0, 0, "offline")
+            emit_global_mqtt_status()
             return False
 
 
 def stop_mqtt_client(device):
-    global _active_device_id, _mqtt_clients
     with _state_lock:
-        client = _mqtt_clients.pop(device.id, None)
-        _stop_simulator()
+        key = _active_devices.pop(device.id, None)
+        _stop_simulator(device.id)
 
-        if client:
-            try:
-                client.loop_stop()
-                client.disconnect()
-            except Exception:
-                pass
+        conn = _connections.get(key) if key else None
+        if conn:
+            conn.remove_device(device.id)
+            if not conn.devices:
+                conn.close()
+                _connections.pop(key, None)
+                log_info(f"[MQTT] 🔗 Closed shared connection to {conn.host}")
 
-        _active_device_id = None
+        _set_device_state(device.id, "offline")
 
-        app = _get_flask_app()
-        if app:
-            with app.app_context():
-                device.status = "offline"
-                device.is_connected = False
-                device.last_seen = _safe_now()
-                db.session.commit()
-
-        _emit_all(device, 0, 0, 0, "offline")
-        emit_global_mqtt_status(force_offline=True)
+        _emit_all(DeviceRef(device.id, device.name), 0, 0, 0, "offline")
+        emit_global_mqtt_status()
         log_info(f"[MQTT] 🔌 Device {device.name} disconnected cleanly")
         return True
 
 
+def get_connection_stats():
+    """Connection count and per-broker fan-in for the diagnostics endpoint."""
+    with _state_lock:
+        brokers = [conn.stats() for conn in _connections.values()]
+        return {
+            "connections": len(brokers),
+            "devices_active": len(_active_devices),
+            "simulators": len(_simulators),
+            "brokers": brokers,
+        }
+
+
 # ==========================================================
 # RESET & INIT
 # ==========================================================
 def reset_all_mqtt_state():
-    global _active_device_id, _mqtt_clients
-    _active_device_id = None
-    _mqtt_clients.clear()
-    _stop_simulator()
+    with _state_lock:
+        for conn in list(_connections.values()):
+            conn.close()
+        _connections.clear()
+        _active_devices.clear()
+        _stop_simulator()
+        invalidate_device_cache()
 
     app = _get_flask_app()
     if app:
@@ -407,6 +480,10 @@ def reset_all_mqtt_state():
 
 def init_mqtt_system():
     reset_all_mqtt_state()
+    app = _get_flask_app()
+    if app:
+        start_ingest_writer(app)
+    start_broadcaster()
     log_info("[MQTT] 🧩 MQTT system initialized")
 
 
@@ -420,7 +497,7 @@ def start_simulator(device):
 
 
 def stop_simulator(device):
-    _stop_simulator()
+    _stop_simulator(device.id)
     return True
 
 
@@ -431,6 +508,11 @@ __all__ = [
     "emit_global_mqtt_status",
     "start_mqtt_client",
     "stop_mqtt_client",
+    "get_connection_stats",
+    "invalidate_device_cache",
+    "resolve_device",
+    "resolve_device_id",
+    "route_topic",
     "reset_all_mqtt_state",
     "init_mqtt_system",
     "start_simulator",
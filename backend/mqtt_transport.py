@@ -0,0 +1,320 @@
+# =================================================================================================
+# Franc Automation - MQTT Transport (paho or in-process broker)
+# Handles:
+#   • create_client() / reachable() — the only places mqtt_service touches the network
+#   • MQTT_TRANSPORT=paho   → real paho client + TCP reachability check (default)
+#   • MQTT_TRANSPORT=memory → MemoryBroker per (host, port), no sockets at all:
+#       - publish / subscribe / unsubscribe, "+" and "#" wildcards
+#       - QoS 0 and 1 (effective QoS = min(publish, subscription)); QoS 1 is
+#         queued for a disconnected persistent session and delivered on reconnect
+#       - retained messages
+#   • MemoryClient speaks the subset of the paho (callback API v1) client the app uses
+# Delivery is synchronous: publish() runs the subscribers' on_message before
+# returning, so tests and benchmarks drive the whole pipeline at full speed.
+# =================================================================================================
+import itertools
+import socket
+import threading
+from collections import deque
+
+import paho.mqtt.client as mqtt
+
+from backend.config import Config
+from backend.utils.audit import log_info
+
+MAX_QUEUED = 10000        # QoS 1 messages kept per offline persistent session
+
+
+# ==========================================================
+# Topic matching
+# ==========================================================
+def topic_matches(topic_filter, topic):
+    """MQTT 3.1.1 filter match: "+" one level, trailing "#" any levels, "$" topics not by wildcards."""
+    if topic.startswith("$") and topic_filter[:1] in ("+", "#"):
+        return False
+    f_parts = topic_filter.split("/")
+    t_parts = topic.split("/")
+    for i, f in enumerate(f_parts):
+        if f == "#":
+            return True
+        if i >= len(t_parts):
+            return False
+        if f != "+" and f != t_parts[i]:
+            return False
+    return len(f_parts) == len(t_parts)
+
+
+def _valid_filter(topic_filter):
+    parts = topic_filter.split("/")
+    for i, p in enumerate(parts):
+        if ("#" in p and (p != "#" or i != len(parts) - 1)) or ("+" in p and p != "+"):
+            return False
+    return bool(topic_filter)
+
+
+# ==========================================================
+# In-process broker
+# ==========================================================
+class MemoryMessage:
+    """Same attributes as paho's MQTTMessage that handlers read."""
+
+    __slots__ = ("topic", "payload", "qos", "retain", "mid")
+
+    def __init__(self, topic, payload, qos=0, retain=False, mid=0):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+        self.mid = mid
+
+
+class MemoryBroker:
+    def __init__(self, host="memory", port=1883):
+        self.host, self.port = host, port
+        self._lock = threading.RLock()
+        self._sessions = {}       # client_id -> {"client", "subs": {filter: qos}, "queue": deque}
+        self._retained = {}       # topic -> MemoryMessage
+        self._mids = itertools.count(1)
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0          # QoS 0 to offline sessions / QoS 1 queue overflow
+
+    # ---- sessions ----
+    def connect(self, client):
+        with self._lock:
+            session = self._sessions.get(client.client_id)
+            resumed = session is not None and not client.clean_session
+            if not resumed:
+                session = {"subs": {}, "queue": deque()}
+                self._sessions[client.client_id] = session
+            session["client"] = client
+            pending = list(session["queue"])
+            session["queue"].clear()
+        for msg in pending:
+            client._deliver(msg)
+        return resumed
+
+    def disconnect(self, client):
+        with self._lock:
+            session = self._sessions.get(client.client_id)
+            if session is None or session.get("client") is not client:
+                return
+            if client.clean_session:
+                del self._sessions[client.client_id]
+            else:
+                session["client"] = None
+
+    def subscribe(self, client, topic_filter, qos=0):
+        if not _valid_filter(topic_filter):
+            raise ValueError(f"Invalid topic filter: {topic_filter!r}")
+        with self._lock:
+            self._sessions[client.client_id]["subs"][topic_filter] = min(int(qos), 1)
+            retained = [m for t, m in self._retained.items() if topic_matches(topic_filter, t)]
+        for msg in retained:
+            client._deliver(MemoryMessage(msg.topic, msg.payload, min(msg.qos, qos), True, msg.mid))
+
+    def unsubscribe(self, client, topic_filter):
+        with self._lock:
+            session = self._sessions.get(client.client_id)
+            if session:
+                session["subs"].pop(topic_filter, None)
+
+    # ---- routing ----
+    def publish(self, topic, payload=b"", qos=0, retain=False):
+        """Deliver to every matching session. Returns the message id."""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        elif payload is None:
+            payload = b""
+        qos = min(int(qos), 1)
+        mid = next(self._mids)
+        targets = []
+        with self._lock:
+            self.published += 1
+            if retain:
+                if payload:
+                    self._retained[topic] = MemoryMessage(topic, payload, qos, True, mid)
+                else:
+                    self._retained.pop(topic, None)
+            for session in self._sessions.values():
+                granted = max((q for f, q in session["subs"].items() if topic_matches(f, topic)), default=None)
+                if granted is None:
+                    continue
+                msg = MemoryMessage(topic, payload, min(qos, granted), False, mid)
+                client = session.get("client")
+                if client is not None:
+                    targets.append((client, msg))
+                elif msg.qos >= 1 and len(session["queue"]) < MAX_QUEUED:
+                    session["queue"].append(msg)
+                else:
+                    self.dropped += 1
+        for client, msg in targets:
+            client._deliver(msg)
+        self.delivered += len(targets)
+        return mid
+
+    def stats(self):
+        with self._lock:
+            return {
+                "host": self.host,
+                "port": self.port,
+                "sessions": len(self._sessions),
+                "connected": sum(1 for s in self._sessions.values() if s.get("client") is not None),
+                "subscriptions": sum(len(s["subs"]) for s in self._sessions.values()),
+                "queued": sum(len(s["queue"]) for s in self._sessions.values()),
+                "retained": len(self._retained),
+                "published": self.published,
+                "delivered": self.delivered,
+                "dropped": self.dropped,
+            }
+
+
+_brokers = {}
+_brokers_lock = threading.Lock()
+
+
+def get_broker(host="memory", port=1883):
+    """The in-process broker for (host, port), created on first use."""
+    key = (str(host).strip().lower(), int(port))
+    with _brokers_lock:
+        broker = _brokers.get(key)
+        if broker is None:
+            broker = _brokers[key] = MemoryBroker(*key)
+        return broker
+
+
+def reset_brokers():
+    with _brokers_lock:
+        _brokers.clear()
+
+
+# ==========================================================
+# paho-compatible client for the memory broker
+# ==========================================================
+class _PublishInfo:
+    def __init__(self, mid):
+        self.mid = mid
+        self.rc = mqtt.MQTT_ERR_SUCCESS
+
+    def is_published(self):
+        return True
+
+    def wait_for_publish(self, timeout=None):
+        return None
+
+
+class MemoryClient:
+    """Drop-in for paho.mqtt.client.Client (callback API v1) on a MemoryBroker."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, client_id="", clean_session=True, userdata=None):
+        self.client_id = client_id or f"memory-{next(self._ids)}"
+        self.clean_session = clean_session
+        self._userdata = userdata
+        self._broker = None
+        self.on_connect = None
+        self.on_disconnect = None
+        self.on_message = None
+        self.on_publish = None
+        self.on_subscribe = None
+        self.messages_in = 0
+        self.callback_errors = 0
+
+    def is_connected(self):
+        return self._broker is not None
+
+    def connect(self, host, port=1883, keepalive=60):
+        self._broker = get_broker(host, port)
+        self._broker.connect(self)
+        if self.on_connect:
+            self.on_connect(self, self._userdata, {"session present": 0}, 0)
+        return mqtt.MQTT_ERR_SUCCESS
+
+    def disconnect(self):
+        if self._broker is None:
+            return mqtt.MQTT_ERR_NO_CONN
+        self._broker.disconnect(self)
+        self._broker = None
+        if self.on_disconnect:
+            self.on_disconnect(self, self._userdata, 0)
+        return mqtt.MQTT_ERR_SUCCESS
+
+    # delivery is synchronous — there is no network loop to run
+    def loop_start(self):
+        return mqtt.MQTT_ERR_SUCCESS
+
+    def loop_stop(self):
+        return mqtt.MQTT_ERR_SUCCESS
+
+    def subscribe(self, topic, qos=0):
+        if self._broker is None:
+            return mqtt.MQTT_ERR_NO_CONN, None
+        self._broker.subscribe(self, topic, qos)
+        return mqtt.MQTT_ERR_SUCCESS, 0
+
+    def unsubscribe(self, topic):
+        if self._broker is None:
+            return mqtt.MQTT_ERR_NO_CONN, None
+        self._broker.unsubscribe(self, topic)
+        return mqtt.MQTT_ERR_SUCCESS, 0
+
+    def publish(self, topic, payload=None, qos=0, retain=False):
+        if self._broker is None:
+            info = _PublishInfo(0)
+            info.rc = mqtt.MQTT_ERR_NO_CONN
+            return info
+        mid = self._broker.publish(topic, payload, qos, retain)
+        if self.on_publish:
+            self.on_publish(self, self._userdata, mid)
+        return _PublishInfo(mid)
+
+    def _deliver(self, msg):
+        self.messages_in += 1
+        if self.on_message is None:
+            return
+        try:
+            self.on_message(self, self._userdata, msg)
+        except Exception as e:   # like paho: a handler error never breaks the connection
+            self.callback_errors += 1
+            log_info(f"[MQTT] ❌ on_message failed for {msg.topic}: {e}")
+
+
+# ==========================================================
+# Factory used by mqtt_service
+# ==========================================================
+TRANSPORTS = ("paho", "memory")
+
+
+def transport():
+    name = (Config.MQTT_TRANSPORT or "paho").lower()
+    if name not in TRANSPORTS:
+        raise ValueError(f"Unknown MQTT transport '{name}' (choose from {', '.join(TRANSPORTS)})")
+    return name
+
+
+def create_client(client_id=""):
+    if transport() == "memory":
+        return MemoryClient(client_id)
+    return mqtt.Client(client_id=client_id)
+
+
+def reachable(host, port=1883, timeout=3):
+    if transport() == "memory":
+        return True
+    try:
+        socket.create_connection((host, port), timeout=timeout).close()
+        return True
+    except Exception:
+        return False
+
+
+__all__ = [
+    "MemoryBroker",
+    "MemoryClient",
+    "create_client",
+    "get_broker",
+    "reachable",
+    "reset_brokers",
+    "topic_matches",
+]
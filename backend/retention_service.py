@@ -0,0 +1,274 @@
+# =================================================================================================
+# Franc Automation - Retention Service (purge + compaction)
+# Handles:
+#   • Per-table retention policies (raw history vs long-lived rollups)
+#   • Deleting expired rows in bounded batches, one short transaction each,
+#     so the ingest writer is never locked out for long
+#   • PRAGMA incremental_vacuum afterwards to hand free pages back to the OS
+#   • A report per run: rows purged, time taken, database size before/after
+#   • Daily background job (opt-in: RETENTION_ENABLED) + manual runs:
+#       python -m backend.retention_service run [--dry-run]
+#       python -m backend.retention_service enable-incremental-vacuum
+# =================================================================================================
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select, true
+
+from backend.config import Config
+from backend.extensions import db
+from backend.models import History, HistoryRollup
+from backend.rollup_service import INDIA_TZ, wall_time
+from backend.timeseries import get_store
+from backend.utils.audit import log_info
+
+# column: the timestamp the age is measured on; where: extra filter (rollup resolution)
+Policy = namedtuple("Policy", ["name", "table", "column", "days", "where"])
+
+
+def default_policies():
+    """Policies from Config; days <= 0 keeps a table forever."""
+    # sensors is not aged out: since ingest stopped writing there it only holds
+    # sensors configured through POST /api/sensors
+    h, r = History.__table__, HistoryRollup.__table__
+    return [
+        Policy("history", h, h.c.timestamp, Config.RETENTION_HISTORY_DAYS, None),
+        Policy("rollups_1m", r, r.c.bucket, Config.RETENTION_ROLLUP_1M_DAYS, r.c.resolution == "1m"),
+        Policy("rollups_1h", r, r.c.bucket, Config.RETENTION_ROLLUP_DAYS, r.c.resolution == "1h"),
+        Policy("rollups_1d", r, r.c.bucket, Config.RETENTION_ROLLUP_DAYS, r.c.resolution == "1d"),
+    ]
+
+
+# ==========================================================
+# Purge
+# ==========================================================
+def _expired(policy, cutoff):
+    cond = policy.column < cutoff if cutoff is not None else true()
+    return cond if policy.where is None else (policy.where & cond)
+
+
+def purge(policy, cutoff, batch_size=None, pause=None, dry_run=False):
+    """
+    Delete rows of `policy` older than `cutoff` (None = every row), batch by
+    batch: DELETE ... WHERE id IN (SELECT id ... LIMIT n), commit, pause.
+    Returns (rows purged, batches).
+    """
+    batch_size = batch_size or Config.RETENTION_BATCH_SIZE
+    pause = Config.RETENTION_BATCH_PAUSE if pause is None else pause
+    t = policy.table
+    cond = _expired(policy, cutoff)
+
+    if dry_run:
+        count = db.session.execute(select(func.count()).select_from(t).where(cond)).scalar()
+        return int(count or 0), 0
+
+    purged = batches = 0
+    while True:
+        ids = select(t.c.id).where(cond).limit(batch_size).scalar_subquery()
+        deleted = db.session.execute(delete(t).where(t.c.id.in_(ids))).rowcount
+        db.session.commit()
+        if not deleted:
+            break
+        purged += deleted
+        batches += 1
+        if deleted < batch_size:
+            break
+        # let the ingest writer take the write lock between batches
+        time.sleep(pause)
+    return purged, batches
+
+
+# ==========================================================
+# SQLite compaction / sizing
+# ==========================================================
+def _is_sqlite():
+    return db.engine.dialect.name == "sqlite"
+
+
+def _pragma(name):
+    return db.session.execute(db.text(f"PRAGMA {name}")).scalar()
+
+
+def database_bytes():
+    """page_count * page_size for SQLite (includes free pages), None elsewhere."""
+    if not _is_sqlite():
+        return None
+    return int(_pragma("page_count")) * int(_pragma("page_size"))
+
+
+def incremental_vacuum():
+    """
+    Release free pages when auto_vacuum=INCREMENTAL. Other modes are left
+    alone (a full VACUUM would block ingest) — see enable-incremental-vacuum.
+    """
+    if not _is_sqlite():
+        return {"mode": None, "pages_freed": 0, "free_pages": 0}
+    mode = {0: "none", 1: "full", 2: "incremental"}.get(int(_pragma("auto_vacuum")), "unknown")
+    free_before = int(_pragma("freelist_count"))
+    if mode == "incremental" and free_before:
+        # The pragma frees one page per sqlite3_step and sqlite3's execute()
+        # steps only once; executescript() runs it to completion.
+        db.session.commit()
+        db.session.connection().connection.executescript("PRAGMA incremental_vacuum")
+        db.session.commit()
+    return {"mode": mode, "pages_freed": free_before - int(_pragma("freelist_count")),
+            "free_pages": int(_pragma("freelist_count"))}
+
+
+def enable_incremental_vacuum():
+    """One-off: switch auto_vacuum to INCREMENTAL (needs a full VACUUM to take effect)."""
+    db.session.commit()
+    with db.engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+    log_info("[RETENTION] 🧱 auto_vacuum set to INCREMENTAL (database rebuilt)")
+
+
+# ==========================================================
+# One run
+# ==========================================================
+_last_report = None
+_report_lock = threading.Lock()
+_run_lock = threading.Lock()
+
+
+def run_retention(policies=None, now=None, dry_run=False, batch_size=None, pause=None):
+    """Apply every policy, then compact. Needs an app context. Returns the report."""
+    policies = default_policies() if policies is None else policies
+    # cutoffs on History's clock (naive India wall time), whatever the host's zone
+    now = wall_time(now or datetime.now(INDIA_TZ))
+    started = time.perf_counter()
+
+    with _run_lock:
+        size_before = database_bytes()
+        tables = {}
+        for policy in policies:
+            if policy.days is None or policy.days <= 0:
+                tables[policy.name] = {"days": policy.days, "cutoff": None, "purged": 0, "batches": 0}
+                continue
+            cutoff = now - timedelta(days=policy.days)
+            t0 = time.perf_counter()
+            purged, batches = purge(policy, cutoff, batch_size, pause, dry_run)
+            tables[policy.name] = {
+                "days": policy.days,
+                "cutoff": cutoff.isoformat(),
+                "purged": purged,
+                "batches": batches,
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+            }
+
+        # A file-backed reading store ages out whole day segments on the history policy
+        store = get_store()
+        if hasattr(store, "purge_before") and Config.RETENTION_HISTORY_DAYS > 0:
+            cutoff = now - timedelta(days=Config.RETENTION_HISTORY_DAYS)
+            t0 = time.perf_counter()
+            tables["segments"] = {
+                "days": Config.RETENTION_HISTORY_DAYS,
+                "cutoff": cutoff.isoformat(),
+                "purged": store.purge_before(cutoff, dry_run=dry_run),
+                "batches": 0,
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 1),
+            }
+
+        vacuum = None if dry_run else incremental_vacuum()
+        report = {
+            "started_at": now.isoformat(),
+            "dry_run": dry_run,
+            "tables": tables,
+            "purged_total": sum(t["purged"] for t in tables.values()),
+            "vacuum": vacuum,
+            "db_bytes_before": size_before,
+            "db_bytes_after": database_bytes(),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    global _last_report
+    with _report_lock:
+        _last_report = report
+    log_info(
+        f"[RETENTION] 🧹 {'Would purge' if dry_run else 'Purged'} {report['purged_total']} rows "
+        f"in {report['duration_ms']} ms (db {size_before} → {report['db_bytes_after']} bytes)"
+    )
+    return report
+
+
+def get_last_report():
+    with _report_lock:
+        return _last_report
+
+
+def describe_policies():
+    return [{"name": p.name, "table": p.table.name, "days": p.days} for p in default_policies()]
+
+
+# ==========================================================
+# Background job
+# ==========================================================
+_stop = threading.Event()
+_thread = None
+
+
+def _loop(app, interval):
+    # first run shortly after start-up, then every interval
+    if _stop.wait(60):
+        return
+    while True:
+        try:
+            with app.app_context():
+                run_retention()
+                db.session.remove()
+        except Exception as e:
+            log_info(f"[RETENTION] ❌ Run failed: {e}")
+        if _stop.wait(interval):
+            return
+
+
+def start_retention(app):
+    """Start the periodic job (idempotent; off unless RETENTION_ENABLED and RETENTION_INTERVAL_HOURS > 0)."""
+    global _thread
+    interval = Config.RETENTION_INTERVAL_HOURS * 3600
+    if not Config.RETENTION_ENABLED or interval <= 0 or (_thread is not None and _thread.is_alive()):
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_loop, args=(app, interval), name="retention", daemon=True)
+    _thread.start()
+    log_info(f"[RETENTION] ⏰ Job scheduled every {Config.RETENTION_INTERVAL_HOURS}h")
+
+
+def stop_retention():
+    global _thread
+    _stop.set()
+    _thread = None
+
+
+__all__ = [
+    "Policy",
+    "default_policies",
+    "purge",
+    "incremental_vacuum",
+    "enable_incremental_vacuum",
+    "run_retention",
+    "get_last_report",
+    "start_retention",
+    "stop_retention",
+]
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    args = sys.argv[1:]
+    if not args or args[0] not in ("run", "enable-incremental-vacuum"):
+        sys.exit("usage: python -m backend.retention_service run [--dry-run] | enable-incremental-vacuum")
+
+    from backend.app import create_app
+
+    with create_app().app_context():
+        if args[0] == "run":
+            print(json.dumps(run_retention(dry_run="--dry-run" in args), indent=2))
+        else:
+            enable_incremental_vacuum()
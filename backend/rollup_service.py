@@ -0,0 +1,336 @@
+# =================================================================================================
+# Franc Automation - Rollup Service (1-minute / 1-hour / 1-day aggregates)
+# Handles:
+#   • Folding each ingest batch into min/max/sum/count buckets per device
+#   • Upserting those buckets in the same transaction as the History rows
+#   • Picking the coarsest resolution that still yields the requested points
+#   • Columnar (NumPy) range loading for chart series, raw or rolled up
+#   • Rebuilding all rollups from History (existing databases / repairs):
+#       python -m backend.rollup_service rebuild
+# =================================================================================================
+from datetime import datetime, timedelta
+
+import numpy as np
+from pytz import timezone
+from sqlalchemy import String, case, func, select, tuple_, type_coerce
+from sqlalchemy.dialects import postgresql, sqlite
+
+from backend.extensions import db
+from backend.models import History, HistoryRollup
+from backend.utils.audit import log_info
+
+INDIA_TZ = timezone("Asia/Kolkata")
+
+# Finest → coarsest
+RESOLUTIONS = (("1m", 60), ("1h", 3600), ("1d", 86400))
+RESOLUTION_SECONDS = dict(RESOLUTIONS)
+
+_EPOCH = datetime(1970, 1, 1)
+_FIELDS = ("temp", "hum", "press")
+SERIES_FIELDS = {"temperature": "temp", "humidity": "hum", "pressure": "press"}
+IST_OFFSET_MS = 19800000  # +05:30, no DST
+
+
+def wall_time(ts):
+    """History stores naive India wall time; bucket on the same clock."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(INDIA_TZ).replace(tzinfo=None)
+    return ts
+
+
+def bucket_start(ts, seconds):
+    offset = int((wall_time(ts) - _EPOCH).total_seconds()) // seconds * seconds
+    return _EPOCH + timedelta(seconds=offset)
+
+
+# ==========================================================
+# Aggregation (pure Python, one pass over the batch)
+# ==========================================================
+def aggregate(readings, resolutions=RESOLUTIONS):
+    """
+    readings: iterable of objects with device_id/temperature/humidity/pressure/timestamp.
+    Returns {(device_id, resolution, bucket epoch seconds): row dict} ready for upsert.
+    """
+    acc = {}
+    _fold(acc, readings, resolutions)
+    return {key: _as_row(key, a) for key, a in acc.items()}
+
+
+def _fold(acc, readings, resolutions=RESOLUTIONS):
+    """
+    Add readings to acc {(device_id, resolution, bucket epoch seconds): accumulator}.
+    Returns the epoch seconds of the last reading (None if there were none).
+    """
+    # acc value: [count, temp_min, temp_max, temp_sum, hum_min, ..., press_sum]
+    offset = None
+    for r in readings:
+        values = (r.temperature, r.humidity, r.pressure)
+        offset = int((wall_time(r.timestamp) - _EPOCH).total_seconds())
+        for res, seconds in resolutions:
+            key = (r.device_id, res, offset // seconds * seconds)
+            a = acc.get(key)
+            if a is None:
+                a = acc[key] = [0, None, None, None, None, None, None, None, None, None]
+            a[0] += 1
+            i = 1
+            for v in values:
+                if v is not None:
+                    if a[i] is None:
+                        a[i] = a[i + 1] = v
+                        a[i + 2] = v
+                    else:
+                        if v < a[i]:
+                            a[i] = v
+                        elif v > a[i + 1]:
+                            a[i + 1] = v
+                        a[i + 2] += v
+                i += 3
+    return offset
+
+
+def _as_row(key, a):
+    device_id, res, offset = key
+    row = {"device_id": device_id, "resolution": res,
+           "bucket": _EPOCH + timedelta(seconds=offset), "count": a[0]}
+    for n, f in enumerate(_FIELDS):
+        row[f"{f}_min"], row[f"{f}_max"], row[f"{f}_sum"] = a[1 + 3 * n: 4 + 3 * n]
+    return row
+
+
+def _upsert_stmt():
+    dialect = db.session.get_bind().dialect.name
+    upsert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = upsert(HistoryRollup)
+    ex = stmt.excluded
+    t = HistoryRollup.__table__.c
+    updates = {"count": t.count + ex.count}
+    for f in _FIELDS:
+        lo, hi, total = f"{f}_min", f"{f}_max", f"{f}_sum"
+        # NULL-safe: keep whichever side has a value
+        updates[lo] = case((t[lo].is_(None), ex[lo]), (ex[lo].is_(None), t[lo]),
+                              (ex[lo] < t[lo], ex[lo]), else_=t[lo])
+        updates[hi] = case((t[hi].is_(None), ex[hi]), (ex[hi].is_(None), t[hi]),
+                              (ex[hi] > t[hi], ex[hi]), else_=t[hi])
+        updates[total] = func.coalesce(t[total], 0.0) + func.coalesce(ex[total], 0.0)
+    return stmt.on_conflict_do_update(
+        index_elements=["device_id", "resolution", "bucket"], set_=updates
+    )
+
+
+def _write_buckets(rows):
+    if rows:
+        db.session.execute(_upsert_stmt(), rows)
+    return len(rows)
+
+
+def upsert_rollups(readings):
+    """Fold readings into history_rollups (caller commits). Returns buckets touched."""
+    return _write_buckets(list(aggregate(readings).values()))
+
+
+# ==========================================================
+# Range queries
+# ==========================================================
+def choose_resolution(start, end, points):
+    """
+    Coarsest rollup that still gives at least `points` buckets over [start, end).
+    None means the range is too short for any rollup — read raw History.
+    """
+    span = (end - start).total_seconds()
+    for res, seconds in reversed(RESOLUTIONS):
+        if span / seconds >= points:
+            return res
+    return None
+
+
+def read_rollups(start, end, resolution, device_ids=None):
+    """Rollup dicts for [start, end), ordered by bucket then device."""
+    q = HistoryRollup.query.filter(
+        HistoryRollup.resolution == resolution,
+        HistoryRollup.bucket >= bucket_start(start, RESOLUTION_SECONDS[resolution]),
+        HistoryRollup.bucket < wall_time(end),
+    )
+    if device_ids:
+        q = q.filter(HistoryRollup.device_id.in_(device_ids))
+    return [r.to_dict() for r in q.order_by(HistoryRollup.bucket, HistoryRollup.device_id)]
+
+
+def query_rollups(device_id, start, end, resolution):
+    q = HistoryRollup.query.filter(
+        HistoryRollup.resolution == resolution,
+        HistoryRollup.bucket >= bucket_start(start, RESOLUTION_SECONDS[resolution]),
+        HistoryRollup.bucket < wall_time(end),
+    )
+    if device_id is not None:
+        q = q.filter(HistoryRollup.device_id == device_id)
+    return q.order_by(HistoryRollup.bucket, HistoryRollup.device_id).all()
+
+
+# ==========================================================
+# Series — columnar loading with a bounded source size
+# ==========================================================
+def estimate_rows(device_id, start, end):
+    """Raw rows in range (device_id None = all devices), read from the hourly rollup."""
+    q = db.session.query(func.coalesce(func.sum(HistoryRollup.count), 0)).filter(
+        HistoryRollup.resolution == "1h",
+        HistoryRollup.bucket >= bucket_start(start, 3600),
+        HistoryRollup.bucket < wall_time(end),
+    )
+    if device_id is not None:
+        q = q.filter(HistoryRollup.device_id == device_id)
+    return int(q.scalar() or 0)
+
+
+def series_source(device_id, start, end, budget, rows=None):
+    """"raw" if the range fits the row budget, else the finest rollup that does."""
+    if rows is None:
+        rows = estimate_rows(device_id, start, end)
+    if rows <= budget:
+        return "raw"
+    span = (end - start).total_seconds()
+    for res, seconds in RESOLUTIONS:
+        if span / seconds <= budget:
+            return res
+    return RESOLUTIONS[-1][0]
+
+
+def _floats(values, n):
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except TypeError:  # NULLs present
+        return np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=n)
+
+
+def load_series(device_id, start, end, source, fields):
+    """
+    Columnar arrays for one device: {"t": int64 epoch ms, field: float64, ...}.
+    Rollup sources also carry "<field>_min" / "<field>_max".
+    Timestamps are selected as plain text/values and parsed by NumPy in one go.
+    """
+    if source == "raw":
+        c = History.__table__.c
+        cols = [type_coerce(c.timestamp, String)] + [c[f] for f in fields]
+        stmt = (
+            select(*cols)
+            .where(c.device_id == device_id, c.timestamp >= wall_time(start), c.timestamp < wall_time(end))
+            .order_by(c.timestamp)
+        )
+    else:
+        c = HistoryRollup.__table__.c
+        cols = [type_coerce(c.bucket, String), c["count"]]
+        for f in fields:
+            p = SERIES_FIELDS[f]
+            cols += [c[f"{p}_sum"], c[f"{p}_min"], c[f"{p}_max"]]
+        stmt = (
+            select(*cols)
+            .where(
+                c.device_id == device_id,
+                c.resolution == source,
+                c.bucket >= bucket_start(start, RESOLUTION_SECONDS[source]),
+                c.bucket < wall_time(end),
+            )
+            .order_by(c.bucket)
+        )
+
+    rows = db.session.execute(stmt).fetchall()
+    n = len(rows)
+    columns = list(zip(*rows)) if n else [()] * len(cols)
+
+    wall = np.array(columns[0], dtype="datetime64[ms]")
+    out = {"t": wall.astype(np.int64) - IST_OFFSET_MS}
+    if source == "raw":
+        for f, values in zip(fields, columns[1:]):
+            out[f] = _floats(values, n)
+    else:
+        count = np.asarray(columns[1], dtype=np.float64)
+        for i, f in enumerate(fields):
+            total, lo, hi = columns[2 + 3 * i: 5 + 3 * i]
+            out[f] = _floats(total, n) / np.where(count > 0, count, np.nan)
+            out[f"{f}_min"] = _floats(lo, n)
+            out[f"{f}_max"] = _floats(hi, n)
+    return out
+
+
+# ==========================================================
+# Maintenance
+# ==========================================================
+def _history_chunks(chunk):
+    """History in (timestamp, id) order, `chunk` rows per query, capped at the rows there now."""
+    c = History.__table__.c
+    last_id = db.session.execute(select(func.max(c.id))).scalar() or 0
+    page = (
+        select(c.device_id, c.temperature, c.humidity, c.pressure, c.timestamp, c.id)
+        .where(c.device_id.isnot(None), c.timestamp.isnot(None), c.id <= last_id)
+        .order_by(c.timestamp, c.id)
+        .limit(chunk)
+    )
+
+    def pages():
+        after = None
+        while True:
+            stmt = page if after is None else page.where(tuple_(c.timestamp, c.id) > after)
+            rows = db.session.execute(stmt).all()
+            if not rows:
+                return
+            after = (rows[-1].timestamp, rows[-1].id)
+            yield rows
+
+    return pages()
+
+
+def rebuild_rollups(chunk=5000):
+    """
+    Recompute every rollup from the configured reading store (needs an app context).
+
+    Readings are read in time order, `chunk` at a time. After each chunk
+    the buckets no later row can reach are upserted and committed, so only
+    the open minute/hour/day of each device stays in memory. On the SQL
+    store rows written while it runs are left to the ingest path (which
+    upserts them itself); segment files have no row ids to cap at, so stop
+    ingest before rebuilding those.
+    """
+    from backend.timeseries import get_store   # the stores import this module
+
+    store = get_store()
+    HistoryRollup.query.delete()
+    chunks = _history_chunks(chunk) if store.name == "sql" else store.scan(None, None, chunk=chunk)
+    db.session.commit()
+
+    acc, scanned, buckets = {}, 0, 0
+    for rows in chunks:
+        scanned += len(rows)
+        now = _fold(acc, rows)
+        done = [key for key in acc if key[2] + RESOLUTION_SECONDS[key[1]] <= now]
+        buckets += _write_buckets([_as_row(key, acc.pop(key)) for key in done])
+        db.session.commit()
+
+    buckets += _write_buckets([_as_row(key, a) for key, a in acc.items()])
+    db.session.commit()
+    log_info(f"[ROLLUP] 🔁 Rebuilt {buckets} buckets from {scanned} {store.name} readings")
+    return buckets
+
+
+__all__ = [
+    "RESOLUTIONS",
+    "aggregate",
+    "bucket_start",
+    "upsert_rollups",
+    "choose_resolution",
+    "query_rollups",
+    "read_rollups",
+    "series_source",
+    "load_series",
+    "rebuild_rollups",
+]
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m backend.rollup_service rebuild")
+
+    from backend.app import create_app
+
+    with create_app().app_context():
+        rebuild_rollups()
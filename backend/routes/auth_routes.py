@@ -3,6 +3,7 @@ from flask import Blueprint, request, jsonify, current_app
 import jwt, datetime, os
 from backend.models import db, User, Role, user_roles
 from backend.config import Config
+from backend.utils import authz, identity_cache
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
 
@@ -75,7 +76,7 @@ def login():
     if user.password != password:
         return jsonify({"status": "error", "message": "Invalid credentials"}), 401
 
-    role = user.roles[0].name if user.roles else "user"
+    role = authz.primary_role(user.id)
 
     secret = getattr(Config, "SECRET_KEY", None) or os.environ.get("SECRET_KEY", "franc-secret")
     token = jwt.encode(
@@ -149,15 +150,14 @@ def whoami():
     if not token:
         return jsonify({"status": "error", "message": "Missing token"}), 401
 
-    secret = getattr(Config, "SECRET_KEY", None) or os.environ.get("SECRET_KEY", "franc-secret")
     try:
-        data = jwt.decode(token, secret, algorithms=["HS256"])
-        uid = data.get("user_id")
-        user = User.query.get(uid)
-        if not user:
+        # decoded + resolved once per token, then served from the identity cache
+        identity = identity_cache.resolve(token)
+        if not identity:
             return jsonify({"status": "error", "message": "User not found"}), 404
-        role = user.roles[0].name if user.roles else "user"
-        return jsonify({"status": "success", "username": user.username, "role": role})
+        if not identity.is_active:
+            return jsonify({"status": "error", "message": "User account is inactive"}), 403
+        return jsonify({"status": "success", "username": identity.username, "role": identity.role})
     except jwt.ExpiredSignatureError:
         return jsonify({"status": "error", "message": "Token expired"}), 401
     except Exception as e:
@@ -3,11 +3,19 @@
 # ==========================================================
 from flask import Blueprint, jsonify
 from backend.extensions import db, socketio
-from backend.models import Sensor, Device
-from sqlalchemy import desc
+from backend.models import Device
 from datetime import datetime
 from pytz import timezone
+from backend.timeseries import get_store
+from backend.utils import latest_cache
 from backend.utils.dashboard import emit_dashboard_update
+from backend.utils.socket_rooms import (
+    NAMESPACE,
+    ROOM_ALL,
+    dashboard_room,
+    device_dashboard_ids,
+    device_room,
+)
 from backend.mqtt_service import emit_global_mqtt_status
 from backend.utils.audit import log_info
 
@@ -35,7 +43,7 @@ def get_current_data():
     Always returns numeric values for temperature/humidity/pressure
     so frontend code that calls toFixed() won't crash.
     """
-    latest = Sensor.query.order_by(desc(Sensor.timestamp)).first()
+    latest = latest_cache.newest()
     devices_online = Device.query.filter_by(status="online").count()
     total_devices = Device.query.count()
 
@@ -74,7 +82,7 @@ def get_chart_data():
     Returns the 50 most recent sensor readings for dashboard charts.
     Ensures numeric types for charting.
     """
-    records = Sensor.query.order_by(desc(Sensor.timestamp)).limit(50).all()
+    records = get_store().range(limit=50, newest_first=True)
     chart_data = [
         {
             "timestamp": s.timestamp.astimezone(INDIA_TZ).strftime("%H:%M:%S"),
@@ -130,4 +138,9 @@ def handle_new_sensor_data(data):
     """
     # do not mutate client payload; ensure callers send numeric fields
     log_info(f"[SOCKET] 🔄 Broadcasting dashboard update: {data}")
-    socketio.emit("dashboard_update", data)
+    rooms = [ROOM_ALL]
+    device_id = (data or {}).get("device_id") if isinstance(data, dict) else None
+    if device_id is not None:
+        rooms.append(device_room(device_id))
+        rooms += [dashboard_room(d) for d in device_dashboard_ids(device_id)]
+    socketio.emit("dashboard_update", data, to=rooms, namespace=NAMESPACE)
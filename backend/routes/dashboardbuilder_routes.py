@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from backend.models import db, Dashboard, DashboardWidget, User, Device
 from functools import wraps
+from sqlalchemy.orm import selectinload
+from backend.utils import authz
 
 dashboardbuilder_bp = Blueprint("dashboardbuilder", __name__, url_prefix="/api")
 
@@ -27,30 +29,6 @@ def require_user(f):
     return wrapper
 
 
-# --------------------------------------------------------
-# ROLE → ALLOWED WIDGET TYPES (same as frontend)
-# --------------------------------------------------------
-def allowed_widgets_for_role(role_name: str):
-    if role_name in ("superadmin", "admin"):
-        return [
-            "line",
-            "gauge",
-            "pressure_chart",
-            "temperature_chart",
-            "humidity_chart",
-            "table",
-            "onoff",
-        ]
-    if role_name == "user1":
-        return ["temperature_chart"]
-    if role_name == "user2":
-        return ["humidity_chart"]
-    if role_name == "user3":
-        return ["pressure_chart"]
-    if role_name == "user4":
-        return ["temperature_chart", "pressure_chart"]
-    return []  # user5 → user10
-
 # ================================================================
 # USERS DROPDOWN → /api/users   (Assign To User Dropdown)
 # ================================================================
@@ -60,11 +38,10 @@ def list_users(current_user):
     users = User.query.order_by(User.username).all()
     out = []
     for u in users:
-        role = u.roles[0].name if u.roles else "user"
         out.append({
             "id": u.id,
             "username": u.username,
-            "role": role
+            "role": authz.primary_role(u.id)
         })
     return jsonify(out)
 
@@ -117,15 +94,12 @@ def create_dashboard(current_user):
     if not owner:
         return jsonify({"status": "error", "message": "Owner user not found"}), 400
 
-    # Role permission check for widget types
-    owner_role = owner.roles[0].name if owner.roles else "user"
-    allowed_types = allowed_widgets_for_role(owner_role)
-
+    # Role permission check for widget types (compiled matrix, no role loading)
     for w in widgets:
-        if w.get("type") not in allowed_types:
+        if not authz.can_use_widget(owner.id, w.get("type")):
             return jsonify({
                 "status": "error",
-                "message": f"Widget '{w.get('type')}' not allowed for role '{owner_role}'"
+                "message": f"Widget '{w.get('type')}' not allowed for role '{authz.primary_role(owner.id)}'"
             }), 403
 
     # Create dashboard
@@ -163,12 +137,12 @@ def create_dashboard(current_user):
 @dashboardbuilder_bp.route("/dashboards", methods=["GET"])
 @require_user
 def list_dashboards(current_user):
-    role = current_user.roles[0].name if current_user.roles else "user"
-
-    if role in ("superadmin", "admin"):
-        dashboards = Dashboard.query.all()
+    # ✅ Widgets for all dashboards in one IN query (to_dict() lists them)
+    query = Dashboard.query.options(selectinload(Dashboard.widgets))
+    if authz.can(current_user.id, authz.MANAGE_DASHBOARDS):
+        dashboards = query.all()
     else:
-        dashboards = Dashboard.query.filter_by(owner_id=current_user.id).all()
+        dashboards = query.filter_by(owner_id=current_user.id).all()
 
     return jsonify([d.to_dict() for d in dashboards])
 
@@ -180,9 +154,7 @@ def list_dashboards(current_user):
 def get_dashboard(current_user, dash_id):
     dash = Dashboard.query.get_or_404(dash_id)
 
-    role = current_user.roles[0].name if current_user.roles else "user"
-
-    if role not in ("superadmin", "admin") and dash.owner_id != current_user.id:
+    if not authz.can(current_user.id, authz.MANAGE_DASHBOARDS) and dash.owner_id != current_user.id:
         return jsonify({"status": "error", "message": "Forbidden"}), 403
 
     return jsonify(dash.to_dict())
\ No newline at end of file
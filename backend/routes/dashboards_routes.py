@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
 from backend.models import db, Dashboard, DashboardWidget, User
 from functools import wraps
+from sqlalchemy.orm import selectinload
+from backend.utils import authz
 
 dashboards_bp = Blueprint("dashboards", __name__, url_prefix="/api")
 
@@ -38,19 +40,16 @@ def require_user(f):
 @require_user
 def list_dashboards(current_user):
 
-    role = current_user.roles[0].name if current_user.roles else "user"
+    # ✅ Widgets for all dashboards in one IN query (to_dict() lists them)
+    query = Dashboard.query.options(selectinload(Dashboard.widgets))
 
-    # Superadmin sees ALL
-    if role == "superadmin":
-        dashboards = Dashboard.query.order_by(Dashboard.created_at.desc()).all()
-
-    # Admin sees ALL dashboards (your requirement)
-    elif role == "admin":
-        dashboards = Dashboard.query.order_by(Dashboard.created_at.desc()).all()
+    # Superadmin / admin (manage_dashboards) see ALL
+    if authz.can(current_user.id, authz.MANAGE_DASHBOARDS):
+        dashboards = query.order_by(Dashboard.created_at.desc()).all()
 
     # Normal user sees ONLY their own
     else:
-        dashboards = Dashboard.query.filter_by(owner_id=current_user.id).order_by(Dashboard.created_at.desc()).all()
+        dashboards = query.filter_by(owner_id=current_user.id).order_by(Dashboard.created_at.desc()).all()
 
     return jsonify({
         "status": "success",
@@ -68,10 +67,8 @@ def get_dashboard(current_user, dash_id):
 
     dash = Dashboard.query.get_or_404(dash_id)
 
-    role = current_user.roles[0].name if current_user.roles else "user"
-
     # Restrict access
-    if role not in ("superadmin", "admin") and dash.owner_id != current_user.id:
+    if not authz.can(current_user.id, authz.MANAGE_DASHBOARDS) and dash.owner_id != current_user.id:
         return jsonify({
             "status": "error",
             "message": "Forbidden"
@@ -93,10 +90,8 @@ def delete_dashboard(current_user, dash_id):
 
     dash = Dashboard.query.get_or_404(dash_id)
 
-    role = current_user.roles[0].name if current_user.roles else "user"
-
     # DELETE rules
-    if role not in ("superadmin", "admin") and dash.owner_id != current_user.id:
+    if not authz.can(current_user.id, authz.MANAGE_DASHBOARDS) and dash.owner_id != current_user.id:
         return jsonify({
             "status": "error",
             "message": "Not allowed to delete this dashboard"
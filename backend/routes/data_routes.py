@@ -3,7 +3,9 @@
 # ==========================================================
 from flask import Blueprint, jsonify, request
 from backend.extensions import db
-from backend.models import Sensor, Device
+from backend.models import Device
+from backend.timeseries import get_store
+from backend.utils import latest_cache
 from backend.utils.dashboard import emit_dashboard_update
 from backend.mqtt_service import emit_global_mqtt_status
 from datetime import datetime, timedelta
@@ -30,15 +32,13 @@ def _aware(dt):
 # ----------------------------------------------------------
 @data_bp.route("/data/latest", methods=["GET"])
 def get_latest():
-    now = _aware(datetime.now())
+    now = datetime.now(INDIA_TZ)
     cutoff = now - timedelta(minutes=5)
 
-    # ✅ Fetch latest record safely (no tzinfo checks on column)
-    latest = (
-        Sensor.query.order_by(Sensor.timestamp.desc())
-        .filter(Sensor.timestamp >= cutoff)
-        .first()
-    )
+    # ✅ Newest reading from the in-memory cache (no table scan)
+    latest = latest_cache.newest()
+    if latest and latest.timestamp < cutoff:
+        latest = None
 
     if not latest:
         return jsonify({
@@ -51,7 +51,7 @@ def get_latest():
             "devices_online": 0,
         }), 200
 
-    device = Device.query.get(latest.device_id)
+    device = db.session.get(Device, latest.device_id)
     online_devices = Device.query.filter_by(is_connected=True).count()
 
     data = {
@@ -74,16 +74,17 @@ def get_latest():
 def get_recent():
     now = _aware(datetime.now())
     cutoff = now - timedelta(minutes=10)
-    sensors = (
-        Sensor.query.filter(Sensor.timestamp >= cutoff)
-        .order_by(Sensor.timestamp.desc())
-        .limit(50)
-        .all()
-    )
+    sensors = get_store().range(cutoff, None, limit=50, newest_first=True)
+
+    # ✅ Resolve all device names in one query instead of one per reading
+    ids = {s.device_id for s in sensors if s.device_id}
+    names = dict(
+        db.session.query(Device.id, Device.name).filter(Device.id.in_(ids)).all()
+    ) if ids else {}
 
     return jsonify([
         {
-            "device_name": Device.query.get(s.device_id).name if s.device_id else "Unknown",
+            "device_name": names.get(s.device_id, "Unknown"),
             "temperature": s.temperature,
             "humidity": s.humidity,
             "pressure": s.pressure,
@@ -105,31 +106,21 @@ def emit_data_update():
 # ==========================================================
 # New Route: Get all sensor data in JSON format
 # ==========================================================
-from flask import Blueprint, jsonify
-from backend.models import Sensor
-from backend.extensions import db
-
-data_bp = Blueprint("data_bp", __name__)
-
-@data_bp.route("/api/data/all", methods=["GET"])
+@data_bp.route("/data/all", methods=["GET"])
 def get_all_sensor_data():
-    sensors = Sensor.query.order_by(Sensor.id.desc()).limit(100).all()  # limit to 100 for performance
+    sensors = get_store().range(limit=100, newest_first=True)  # limit to 100 for performance
     return jsonify([s.to_dict() for s in sensors])
 
 # ==========================================================
 # New Route: Get all sensor data in JSON format
 # ==========================================================
-@data_bp.route("/api/data/history", methods=["GET"])
+@data_bp.route("/data/history", methods=["GET"])
 def get_history():
     """Return last 7 days of sensor data grouped by date"""
     now = datetime.utcnow()
     start = now - timedelta(days=7)
 
-    sensors = (
-        Sensor.query.filter(Sensor.timestamp >= start)
-        .order_by(Sensor.timestamp.desc())
-        .all()
-    )
+    sensors = get_store().range(start, None, newest_first=True)
 
     grouped = {}
     for s in sensors:
@@ -8,10 +8,13 @@ from backend.mqtt_service import (
     start_mqtt_client,
     stop_mqtt_client,
     emit_global_mqtt_status,
+    invalidate_device_cache,
     start_simulator,
     stop_simulator,
 )
 from backend.utils.audit import log_info
+from backend.utils import latest_cache
+from backend.utils.payload_parsers import available_formats
 from datetime import datetime
 from pytz import timezone
 
@@ -31,6 +34,7 @@ def get_all_devices():
             "host": d.host,
             "status": d.status,
             "is_connected": d.is_connected,
+            "payload_format": d.payload_format or "json",
             "last_seen": d.last_seen.isoformat(timespec="seconds") if d.last_seen else None,
         }
         for d in devices
@@ -46,22 +50,50 @@ def add_device():
     data = request.json
     name = data.get("name")
     host = data.get("host", "broker.hivemq.com")
+    payload_format = data.get("payload_format", "json")
 
     if not name:
         return jsonify({"error": "Device name is required"}), 400
 
+    if payload_format not in available_formats():
+        return jsonify({"error": f"Unsupported payload_format (use one of {available_formats()})"}), 400
+
     if Device.query.filter_by(name=name).first():
         return jsonify({"error": "Device already exists"}), 400
 
-    device = Device(name=name, host=host, status="offline", is_connected=False)
+    device = Device(
+        name=name, host=host, status="offline", is_connected=False, payload_format=payload_format
+    )
     db.session.add(device)
     db.session.commit()
+    invalidate_device_cache()
 
     log_info(f"[DEVICE] ➕ Added new device: {name} ({host})")
     emit_global_mqtt_status()
     return jsonify({"message": "Device added successfully"}), 201
 
 
+# ==========================================================
+# 🧬 Change a device's payload encoding
+# ==========================================================
+@device_bp.route("/devices/<int:device_id>/payload-format", methods=["PUT"])
+def set_payload_format(device_id):
+    device = Device.query.get(device_id)
+    if not device:
+        return jsonify({"error": "Device not found"}), 404
+
+    payload_format = (request.get_json() or {}).get("payload_format")
+    if payload_format not in available_formats():
+        return jsonify({"error": f"Unsupported payload_format (use one of {available_formats()})"}), 400
+
+    device.payload_format = payload_format
+    db.session.commit()
+    invalidate_device_cache()
+
+    log_info(f"[DEVICE] 🧬 {device.name} payload format → {payload_format}")
+    return jsonify({"message": "Payload format updated", "payload_format": payload_format}), 200
+
+
 # ==========================================================
 # 🔌 Connect a device
 # ==========================================================
@@ -110,6 +142,8 @@ def delete_device(device_id):
 
     db.session.delete(device)
     db.session.commit()
+    invalidate_device_cache()
+    latest_cache.discard(device_id)
 
     log_info(f"[DEVICE] ❌ Deleted device: {device.name}")
     emit_global_mqtt_status()
@@ -2,113 +2,358 @@
 # history_routes.py — Export Per Day | FIXED
 # ======================================
 
-from flask import Blueprint, jsonify, request, make_response
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context
 from datetime import datetime, timedelta
-from io import BytesIO
+from io import StringIO
 import csv
 import json
+import os
+import shutil
+import tempfile
+import zipfile
 
-from backend.models import db, History
+import numpy as np
+from pytz import timezone
+
+from backend.config import Config
+from backend.rollup_service import (
+    RESOLUTION_SECONDS,
+    SERIES_FIELDS,
+    choose_resolution,
+    series_source,
+    wall_time,
+)
+from backend.timeseries import get_store
+from backend.utils import parquet_export
+from backend.utils.downsample import METHODS, downsample
 
 # Correct Blueprint URL prefix matching frontend calls
 history_bp = Blueprint("history", __name__, url_prefix="/api/history")
 
 # Default days range
 DAYS = 7
+# Upper bound for ?points= on range queries
+MAX_POINTS = 5000
+# Rows fetched per cursor round-trip / written per streamed chunk
+EXPORT_CHUNK = 2000
+INDIA_TZ = timezone("Asia/Kolkata")
+
+# ======================================
+# Query-string helpers
+# ======================================
+def _parse_time(value, default):
+    if not value:
+        return default
+    try:
+        return wall_time(datetime.fromisoformat(value.replace("Z", "+00:00")))
+    except ValueError:
+        return None
+
+
+def _parse_range(default_span=timedelta(days=1)):
+    """?from=&to= (ISO 8601) → (start, end) or an error response."""
+    now = datetime.now(INDIA_TZ).replace(tzinfo=None)
+    end = _parse_time(request.args.get("to"), now)
+    start = _parse_time(request.args.get("from"), (end or now) - default_span)
+    if start is None or end is None:
+        return None, (jsonify({"status": "error", "message": "from/to must be ISO 8601"}), 400)
+    if start >= end:
+        return None, (jsonify({"status": "error", "message": "from must be before to"}), 400)
+    return (start, end), None
+
 
 # ======================================
 # GET: Grouped History JSON (Last 7 Days)
+# One daily rollup per device instead of every raw reading.
 # ======================================
 @history_bp.route("/", methods=["GET"])
 def get_history():
-    since = datetime.utcnow() - timedelta(days=DAYS)
-
-    records = (
-        History.query.filter(History.timestamp >= since)
-        .order_by(History.timestamp.desc())
-        .all()
-    )
+    today = datetime.now(INDIA_TZ).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    since = today - timedelta(days=DAYS - 1)
 
     grouped = {}
-    for rec in records:
-        date_key = rec.timestamp.strftime("%Y-%m-%d")
-        if date_key not in grouped:
-            grouped[date_key] = []
-        grouped[date_key].append(rec.to_dict())
+    for rollup in get_store().aggregate(since, today + timedelta(days=1), "1d"):
+        grouped.setdefault(rollup["timestamp"][:10], []).append(rollup)
 
+    # newest day first, like the raw listing used to be
+    grouped = dict(sorted(grouped.items(), reverse=True))
     return jsonify({"status": "success", "data": grouped})
 
 
 # ======================================
-# EXPORT JSON (per-day)
-# Example: /api/history/export/json?date=2025-11-21
+# GET: Rollup range query
+# Example: /api/history/rollups?device_id=1&from=2025-11-01T00:00&to=2025-11-08T00:00&points=500
+# Picks the coarsest of 1m / 1h / 1d that still returns >= points buckets
+# (or raw History when the range is too short). ?resolution= forces one.
+# Raw reads share /series' SERIES_MAX_SOURCE_ROWS budget: an over-budget
+# range moves to the finest rollup that fits, or is refused when raw was forced.
 # ======================================
-@history_bp.route("/export/json", methods=["GET"])
-def export_json():
-    date = request.args.get("date")
-    if not date:
-        return jsonify({"status": "error", "message": "Missing ?date=YYYY-MM-DD"}), 400
+@history_bp.route("/rollups", methods=["GET"])
+def get_rollups():
+    window, error = _parse_range()
+    if error:
+        return error
+    start, end = window
+
+    device_id = request.args.get("device_id", type=int)
+    points = max(1, min(request.args.get("points", default=500, type=int), MAX_POINTS))
+    resolution = request.args.get("resolution") or choose_resolution(start, end, points)
+    if resolution not in (None, "raw", *RESOLUTION_SECONDS):
+        return jsonify({"status": "error", "message": f"Unknown resolution {resolution}"}), 400
+
+    store = get_store()
+    device_ids = [device_id] if device_id is not None else None
+    if resolution in (None, "raw"):
+        budget = Config.SERIES_MAX_SOURCE_ROWS
+        rows = store.count(device_id, start, end)
+        if rows > budget:
+            if request.args.get("resolution") == "raw":
+                return jsonify({
+                    "status": "error",
+                    "message": f"~{rows} raw rows in range (limit {budget}); narrow it or pick a rollup resolution",
+                }), 400
+            resolution = series_source(device_id, start, end, budget, rows=rows)
+
+    if resolution in (None, "raw"):
+        data = [s.to_dict() for s in store.range(start, end, device_ids)]
+        resolution = "raw"
+    else:
+        data = store.aggregate(start, end, resolution, device_ids)
+
+    return jsonify({
+        "status": "success",
+        "resolution": resolution,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "count": len(data),
+        "data": data,
+    })
+
+
+# ======================================
+# GET: Downsampled chart series
+# Example: /api/history/series?device_id=1&from=2025-11-01&to=2025-11-08&points=1000&method=lttb
+# Reads raw History when the range fits SERIES_MAX_SOURCE_ROWS, otherwise
+# the finest rollup that does, so the cost is bounded by the budget and
+# not by how many readings the range holds. Downsampling runs in NumPy.
+# ======================================
+@history_bp.route("/series", methods=["GET"])
+def get_series():
+    device_id = request.args.get("device_id", type=int)
+    if device_id is None:
+        return jsonify({"status": "error", "message": "Missing ?device_id="}), 400
+
+    window, error = _parse_range()
+    if error:
+        return error
+    start, end = window
+
+    points = max(3, min(request.args.get("points", default=1000, type=int), MAX_POINTS))
+    method = request.args.get("method", "lttb")
+    if method not in METHODS:
+        return jsonify({"status": "error", "message": f"method must be one of {', '.join(METHODS)}"}), 400
+
+    fields = [f.strip() for f in request.args.get("fields", ",".join(SERIES_FIELDS)).split(",") if f.strip()]
+    unknown = [f for f in fields if f not in SERIES_FIELDS]
+    if unknown or not fields:
+        return jsonify({"status": "error", "message": f"Unknown field(s): {', '.join(unknown) or '-'}"}), 400
+
+    store = get_store()
+    source = series_source(device_id, start, end, Config.SERIES_MAX_SOURCE_ROWS,
+                           rows=store.count(device_id, start, end))
+    cols = store.columns(device_id, start, end, fields, source)
+    t = cols["t"]
+
+    series = {}
+    for f in fields:
+        x, y = t, cols[f]
+        if source != "raw" and method == "minmax":
+            # Rollups already hold each bucket's extremes — downsample the envelope
+            x = np.repeat(t, 2)
+            y = np.column_stack((cols[f"{f}_min"], cols[f"{f}_max"])).ravel()
+        keep = ~np.isnan(y)
+        x, y = x[keep], y[keep]
+        idx = downsample(x, y, points, method)
+        series[f] = list(zip(x[idx].tolist(), np.round(y[idx], 3).tolist()))
+
+    return jsonify({
+        "status": "success",
+        "device_id": device_id,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "source": source,
+        "source_rows": int(len(t)),
+        "method": method,
+        "points": points,
+        "series": series,
+    })
 
+
+# ======================================
+# Streaming export helpers
+# Rows come from a server-side cursor (yield_per) and are written out one
+# chunk at a time, so memory stays flat however big the range is.
+# ======================================
+def _parse_day(value):
     try:
-        start = datetime.strptime(date, "%Y-%m-%d")
-    except ValueError:
-        return jsonify({"status": "error", "message": "Invalid date format"}), 400
+        return datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def _export_window():
+    """
+    ?date=YYYY-MM-DD                    one day (original behaviour)
+    ?from=YYYY-MM-DD&to=YYYY-MM-DD      inclusive day range (or ISO datetimes)
+    &device_id=1[,2,...]                optional device filter
+    → ((start, end, device_ids, label), None) or (None, error response)
+    """
+    date = request.args.get("date")
+    if date:
+        start = _parse_day(date)
+        if start is None:
+            return None, (jsonify({"status": "error", "message": "Invalid date format"}), 400)
+        end, label = start + timedelta(days=1), date
+    elif request.args.get("from"):
+        raw_from, raw_to = request.args.get("from"), request.args.get("to") or request.args.get("from")
+        start = _parse_day(raw_from) or _parse_time(raw_from, None)
+        end_day = _parse_day(raw_to)
+        end = end_day + timedelta(days=1) if end_day else _parse_time(raw_to, None)
+        if start is None or end is None or start >= end:
+            return None, (jsonify({"status": "error", "message": "Invalid from/to range"}), 400)
+        label = f"{raw_from[:10]}_{raw_to[:10]}"
+    else:
+        return None, (jsonify({"status": "error", "message": "Missing ?date=YYYY-MM-DD or ?from=&to="}), 400)
 
-    end = start + timedelta(days=1)
+    device_ids = []
+    for part in (request.args.get("device_id") or "").split(","):
+        if part.strip():
+            try:
+                device_ids.append(int(part))
+            except ValueError:
+                return None, (jsonify({"status": "error", "message": "device_id must be numeric"}), 400)
+    if device_ids:
+        label += "_device-" + "-".join(map(str, device_ids))
+    return (start, end, device_ids, label), None
 
-    records = History.query.filter(
-        History.timestamp >= start, History.timestamp < end
-    ).all()
 
-    payload = [r.to_dict() for r in records]
+def _export_chunks(start, end, device_ids):
+    """Yield lists of Samples (not ORM objects) EXPORT_CHUNK at a time."""
+    return get_store().scan(start, end, device_ids, EXPORT_CHUNK)
 
-    response = make_response(json.dumps(payload, indent=2))
-    response.headers["Content-Disposition"] = f"attachment; filename=history_{date}.json"
-    response.headers["Content-Type"] = "application/json"
+
+def _stream(body, filename, mimetype):
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
     return response
 
 
 # ======================================
-# EXPORT CSV (per-day)
+# EXPORT JSON
+# Example: /api/history/export/json?date=2025-11-21
+#          /api/history/export/json?from=2025-11-01&to=2025-11-07&device_id=3
+# ======================================
+@history_bp.route("/export/json", methods=["GET"])
+def export_json():
+    window, error = _export_window()
+    if error:
+        return error
+    start, end, device_ids, label = window
+
+    def generate():
+        yield "["
+        first = True
+        for chunk in _export_chunks(start, end, device_ids):
+            body = json.dumps([
+                {
+                    "id": r.id,
+                    "device_id": r.device_id,
+                    "temperature": r.temperature,
+                    "humidity": r.humidity,
+                    "pressure": r.pressure,
+                    "timestamp": r.timestamp.isoformat() if r.timestamp else None,
+                }
+                for r in chunk
+            ], separators=(",", ":"))
+            # one dumps() per chunk; strip its brackets and splice into the stream
+            yield ("" if first else ",") + body[1:-1]
+            first = False
+        yield "]"
+
+    return _stream(generate(), f"history_{label}.json", "application/json")
+
+
+# ======================================
+# EXPORT CSV
 # Example: /api/history/export/csv?date=2025-11-21
+#          /api/history/export/csv?from=2025-11-01&to=2025-11-07&device_id=3
 # ======================================
 @history_bp.route("/export/csv", methods=["GET"])
 def export_csv():
-    date = request.args.get("date")
-    if not date:
-        return jsonify({"status": "error", "message": "Missing ?date=YYYY-MM-DD"}), 400
+    window, error = _export_window()
+    if error:
+        return error
+    start, end, device_ids, label = window
+
+    def generate():
+        buffer = StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["device_id", "temperature", "humidity", "pressure", "timestamp"])
+        for chunk in _export_chunks(start, end, device_ids):
+            writer.writerows(
+                (r.device_id, r.temperature, r.humidity, r.pressure, r.timestamp.isoformat())
+                for r in chunk
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    return _stream(generate(), f"history_{label}.csv", "text/csv")
+
 
+# ======================================
+# EXPORT PARQUET (columnar, float32, zstd)
+# Example: /api/history/export/parquet?date=2025-11-21
+#          /api/history/export/parquet?from=2025-11-01&to=2025-11-07&partition=device,day
+# Parquet's footer is written last, so the file is built in a temp file
+# (chunk by chunk, never held in memory) and sent once complete.
+# With ?partition= the Hive-style tree is returned as a .zip.
+# ======================================
+@history_bp.route("/export/parquet", methods=["GET"])
+def export_parquet():
+    if not parquet_export.available():
+        return jsonify({"status": "error", "message": "Parquet export needs pyarrow installed"}), 501
+    window, error = _export_window()
+    if error:
+        return error
+    start, end, device_ids, label = window
+
+    partition_by = [p.strip() for p in (request.args.get("partition") or "").split(",") if p.strip()]
+    unknown = set(partition_by) - set(parquet_export.PARTITION_KEYS)
+    if unknown:
+        return jsonify({"status": "error", "message": f"partition must be one of {', '.join(parquet_export.PARTITION_KEYS)}"}), 400
+
+    workdir = tempfile.mkdtemp(prefix="history-parquet-")
     try:
-        start = datetime.strptime(date, "%Y-%m-%d")
-    except ValueError:
-        return jsonify({"status": "error", "message": "Invalid date format"}), 400
-
-    end = start + timedelta(days=1)
-
-    records = History.query.filter(
-        History.timestamp >= start, History.timestamp < end
-    ).all()
-
-    output = BytesIO()
-    writer = csv.writer(output)
-    writer.writerow(["device_id", "temperature", "humidity", "pressure", "timestamp"])
-
-    for r in records:
-        writer.writerow(
-            [
-                r.device_id,
-                r.temperature,
-                r.humidity,
-                r.pressure,
-                r.timestamp.isoformat(),
-            ]
-        )
-
-    output.seek(0)
-
-    response = make_response(output.read())
-    response.headers["Content-Disposition"] = (
-        f"attachment; filename=history_{date}.csv"
-    )
-    response.headers["Content-Type"] = "text/csv"
+        if partition_by:
+            tree = os.path.join(workdir, f"history_{label}")
+            written = parquet_export.write_partitioned(tree, start, end, device_ids, partition_by)
+            path = tree + ".zip"
+            # Parquet pages are already compressed — store, don't deflate
+            with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+                for name in sorted(written):
+                    archive.write(os.path.join(tree, name), name.replace(os.sep, "/"))
+            filename, mimetype = f"history_{label}.zip", "application/zip"
+        else:
+            path = os.path.join(workdir, f"history_{label}.parquet")
+            parquet_export.write_parquet(path, start, end, device_ids)
+            filename, mimetype = os.path.basename(path), "application/vnd.apache.parquet"
+    except Exception:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise
+
+    response = send_file(path, mimetype=mimetype, as_attachment=True, download_name=filename)
+    response.call_on_close(lambda: shutil.rmtree(workdir, ignore_errors=True))
     return response
@@ -0,0 +1,19 @@
+# ==========================================================
+# backend/routes/metrics_routes.py — Prometheus scrape endpoint
+# ==========================================================
+from flask import Blueprint, Response
+
+from backend.config import Config
+from backend.utils import metrics
+
+metrics_bp = Blueprint("metrics_bp", __name__)
+
+
+# ==========================================================
+# 📈 GET /metrics — MQTT, ingest, Socket.IO, HTTP and SQL counters
+# ==========================================================
+@metrics_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    if not Config.METRICS_ENABLED:
+        return Response("metrics disabled\n", status=404, mimetype="text/plain")
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import selectinload
 from backend.extensions import db
 from backend.models import Role, Permission
+from backend.utils import identity_cache
 
 role_bp = Blueprint("role_bp", __name__, url_prefix="/api/users")
 
@@ -9,7 +11,7 @@ role_bp = Blueprint("role_bp", __name__, url_prefix="/api/users")
 @role_bp.route("/roles", methods=["GET"])
 def get_roles():
     try:
-        roles = Role.query.all()
+        roles = Role.query.options(selectinload(Role.permissions)).all()
         data = []
         for r in roles:
             data.append({
@@ -98,6 +100,7 @@ def assign_role_permission():
         if perm not in role.permissions:
             role.permissions.append(perm)
             db.session.commit()
+            identity_cache.invalidate_all()
 
         return jsonify({
             "message": f"Permission '{perm.name}' assigned to role '{role.name}'"
@@ -1,4 +1,5 @@
 from flask import Blueprint, request, jsonify
+from sqlalchemy.orm import joinedload
 from backend.extensions import db, socketio
 from backend.models import Sensor, Device
 from backend.utils.audit import log_info
@@ -12,14 +13,16 @@ sensor_bp = Blueprint("sensors", __name__, url_prefix="/api")
 # ==========================================================
 @sensor_bp.route("/sensors", methods=["GET"])
 def get_sensors():
-    sensors = Sensor.query.all()
+    # ✅ One JOIN instead of a Device lookup per sensor
+    sensors = Sensor.query.options(joinedload(Sensor.device)).all()
     result = []
     for s in sensors:
-        device = Device.query.get(s.device_id)
+        device = s.device
         result.append({
             "id": s.id,
-            "name": s.name,
-            "friendly_name": s.friendly_name,
+            # Sensor rows carry a topic, not name/friendly_name columns
+            "name": s.topic,
+            "friendly_name": None,
             "device_id": s.device_id,
             "device_name": device.name if device else None
         })
@@ -0,0 +1,76 @@
+# ==========================================================
+# backend/routes/socket_routes.py — Socket.IO room subscriptions
+# ==========================================================
+# Client → server:
+#   subscribe   {"devices": [1, 2], "dashboards": [5]}
+#   unsubscribe {"devices": [1], "dashboards": [5]}
+# Both return (ack) {"rooms": [...]} — the client's current rooms.
+# ==========================================================
+from flask import request
+from flask_socketio import join_room, leave_room, rooms
+
+from backend.extensions import socketio
+from backend.utils.audit import log_info
+from backend.utils.metrics import SOCKETIO_CLIENTS
+from backend.utils.socket_rooms import (
+    ROOM_ALL,
+    dashboard_device_ids,
+    dashboard_room,
+    device_room,
+)
+
+
+def _ids(data, key):
+    out = []
+    for v in (data or {}).get(key) or []:
+        try:
+            out.append(int(v))
+        except (TypeError, ValueError):
+            continue
+    return out
+
+
+def _targets(data):
+    """Expand a subscription request into concrete room names."""
+    targets = {device_room(d) for d in _ids(data, "devices")}
+    for dash_id in _ids(data, "dashboards"):
+        targets.add(dashboard_room(dash_id))
+        targets.update(device_room(d) for d in dashboard_device_ids(dash_id))
+    return targets
+
+
+def _current_rooms():
+    return sorted(r for r in rooms() if r != request.sid)
+
+
+@socketio.on("connect")
+def handle_connect():
+    # Until a client says what it watches it gets everything (older clients)
+    join_room(ROOM_ALL)
+    SOCKETIO_CLIENTS.inc()
+
+
+@socketio.on("disconnect")
+def handle_disconnect(*_args):
+    SOCKETIO_CLIENTS.dec()
+
+
+@socketio.on("subscribe")
+def handle_subscribe(data):
+    targets = _targets(data)
+    if targets:
+        leave_room(ROOM_ALL)
+        for room in targets:
+            join_room(room)
+    current = _current_rooms()
+    log_info(f"[SOCKET] 🎯 {request.sid} subscribed → {current}")
+    return {"rooms": current}
+
+
+@socketio.on("unsubscribe")
+def handle_unsubscribe(data):
+    for room in _targets(data):
+        leave_room(room)
+    if not _current_rooms():
+        join_room(ROOM_ALL)
+    return {"rooms": _current_rooms()}
@@ -0,0 +1,104 @@
+# ==========================================================
+# backend/routes/system_routes.py — Runtime / sizing diagnostics
+# ==========================================================
+# Admin only: every route needs a superadmin/admin token (stats carry
+# broker hosts, raw SQL text and route names; some routes mutate).
+# ==========================================================
+from flask import Blueprint, Response, jsonify, request
+from backend.extensions import db
+from backend.ingest_service import get_ingest_stats
+from backend.broadcast_service import get_broadcast_stats
+from backend.mqtt_service import get_connection_stats
+from backend.utils import sql_metrics, sqlite_tuning
+from backend.retention_service import describe_policies, get_last_report, run_retention
+from backend.utils.decorators import roles_required, token_required
+
+system_bp = Blueprint("system_bp", __name__, url_prefix="/api/system")
+ADMIN_ROLES = ["superadmin", "admin"]
+
+
+# ==========================================================
+# 📥 Ingest queue counters (depth, flush latency, drops)
+# ==========================================================
+@system_bp.route("/ingest", methods=["GET"])
+@token_required
+@roles_required(ADMIN_ROLES)
+def ingest_stats():
+    return jsonify(get_ingest_stats()), 200
+
+
+# ==========================================================
+# 🔗 MQTT connection manager (connections + per-broker fan-in)
+# ==========================================================
+@system_bp.route("/mqtt", methods=["GET"])
+@token_required
+@roles_required(ADMIN_ROLES)
+def mqtt_stats():
+    return jsonify(get_connection_stats()), 200
+
+
+# ==========================================================
+# 📡 Socket.IO broadcast scheduler (readings in vs frames out)
+# ==========================================================
+@system_bp.route("/broadcast", methods=["GET"])
+@token_required
+@roles_required(ADMIN_ROLES)
+def broadcast_stats():
+    return jsonify(get_broadcast_stats()), 200
+
+
+# ==========================================================
+# ⚙️ SQLite pragmas in effect (profile from SQLITE_PROFILE)
+# ==========================================================
+@system_bp.route("/sqlite", methods=["GET"])
+@token_required
+@roles_required(ADMIN_ROLES)
+def sqlite_settings():
+    if db.engine.dialect.name != "sqlite":
+        return jsonify({"status": "error", "message": "Not a SQLite database"}), 400
+    with db.engine.connect() as conn:
+        return jsonify(sqlite_tuning.current(conn)), 200
+
+
+# ==========================================================
+# 🧹 Retention: policies + last run report; POST runs it now
+# ==========================================================
+@system_bp.route("/retention", methods=["GET"])
+@token_required
+@roles_required(ADMIN_ROLES)
+def retention_report():
+    return jsonify({"policies": describe_policies(), "last_run": get_last_report()}), 200
+
+
+@system_bp.route("/retention/run", methods=["POST"])
+@token_required
+@roles_required(ADMIN_ROLES)
+def retention_run():
+    dry_run = request.args.get("dry_run", "").lower() in ("1", "true", "yes")
+    return jsonify(run_retention(dry_run=dry_run)), 200
+
+
+# ==========================================================
+# 🐢 SQL per route (statements, DB time) + slow-query log
+# ==========================================================
+@system_bp.route("/sql", methods=["GET"])
+@token_required
+@roles_required(ADMIN_ROLES)
+def sql_stats():
+    top = request.args.get("top", type=int)
+    return jsonify(sql_metrics.get_sql_stats(top)), 200
+
+
+@system_bp.route("/sql", methods=["DELETE"])
+@token_required
+@roles_required(ADMIN_ROLES)
+def sql_stats_reset():
+    sql_metrics.reset()
+    return jsonify({"message": "SQL stats reset"}), 200
+
+
+@system_bp.route("/sql/metrics", methods=["GET"])
+@token_required
+@roles_required(ADMIN_ROLES)
+def sql_stats_prometheus():
+    return Response(sql_metrics.prometheus_text(), mimetype="text/plain; version=0.0.4")
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import selectinload
 from backend.extensions import db
 from backend.models import User, Role, Permission
+from backend.utils import identity_cache
 from backend.utils.audit import log_info, emit_event
 
 user_bp = Blueprint("users", __name__)
@@ -12,7 +14,8 @@ user_bp = Blueprint("users", __name__)
 @user_bp.route("/all", methods=["GET"])
 @user_bp.route("/list", methods=["GET"])  # alias for frontend
 def get_all_users():
-    users = User.query.all()
+    # ✅ roles/devices for every user in two IN queries, not two per user
+    users = User.query.options(selectinload(User.roles), selectinload(User.devices)).all()
     result = [u.to_dict() for u in users]
 
     log_info(f"📋 Retrieved {len(result)} users from database.")
@@ -142,6 +145,7 @@ def update_user(user_id):
         user.password = generate_password_hash(data["password"])
 
     db.session.commit()
+    identity_cache.invalidate_user(user.id)
 
     updated_user = user.to_dict()
     log_info(f"📝 User updated → {user.username} | ID={user.id}")
@@ -161,6 +165,7 @@ def delete_user(user_id):
 
     db.session.delete(user)
     db.session.commit()
+    identity_cache.invalidate_user(user_id)
 
     log_info(f"🗑️ User deleted → {user.username} | ID={user.id}")
     emit_event("user_deleted", {"id": user.id, "username": user.username})
@@ -0,0 +1,63 @@
+"""
+Export readings to Parquet from the configured time-series store (requires pyarrow).
+
+    python -m backend.scripts.export_parquet --from 2025-11-01 --to 2025-11-07 \\
+        [--device 3 --device 5] [--partition device,day] [--out exports/] [--chunk 50000]
+
+Without --partition a single <out>/history_<from>_<to>.parquet is written;
+with it, a Hive-style tree (device_id=3/date=2025-11-01/part-0.parquet)
+that pyarrow.dataset / DuckDB / Spark read as one table.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+from backend.utils import parquet_export
+
+
+def _day(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--from", dest="start", type=_day, required=True, help="first day (inclusive)")
+    ap.add_argument("--to", dest="end", type=_day, help="last day (inclusive, default --from)")
+    ap.add_argument("--device", type=int, action="append", default=[], help="device id (repeatable)")
+    ap.add_argument("--partition", default="", help="comma list of: device, day")
+    ap.add_argument("--out", default="exports", help="output directory")
+    ap.add_argument("--chunk", type=int, default=parquet_export.DEFAULT_CHUNK, help="rows per store scan chunk / row batch")
+    args = ap.parse_args(argv)
+
+    if not parquet_export.available():
+        sys.exit("pyarrow is not installed (pip install pyarrow)")
+    partition_by = [p.strip() for p in args.partition.split(",") if p.strip()]
+    if set(partition_by) - set(parquet_export.PARTITION_KEYS):
+        ap.error("--partition accepts: device, day")
+
+    start = args.start
+    end = (args.end or args.start) + timedelta(days=1)
+    label = f"{start:%Y-%m-%d}_{end - timedelta(days=1):%Y-%m-%d}"
+
+    from backend.app import create_app
+
+    with create_app().app_context():
+        if partition_by:
+            root = os.path.join(args.out, f"history_{label}")
+            written = parquet_export.write_partitioned(root, start, end, args.device, partition_by, args.chunk)
+            rows = sum(written.values())
+            print(f"✅ {rows} rows → {len(written)} files under {root}")
+        else:
+            os.makedirs(args.out, exist_ok=True)
+            path = os.path.join(args.out, f"history_{label}.parquet")
+            rows = parquet_export.write_parquet(path, start, end, args.device, args.chunk)
+            print(f"✅ {rows} rows → {path} ({os.path.getsize(path):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
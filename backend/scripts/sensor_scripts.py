@@ -12,9 +12,10 @@ import time
 from datetime import datetime
 from faker import Faker
 
-from app import create_app
+from backend.app import create_app
 from backend.extensions import db
 from backend.models import Device, Sensor  # ✅ unified model name
+from backend.retention_service import Policy, purge
 
 fake = Faker()
 app = create_app()
@@ -88,12 +89,12 @@ def simulate_mqtt(device_name=None, interval=5):
 
 
 # ------------------------------------------------------
-# 🧹 Clear Sensor Data Table
+# 🧹 Clear Sensor Data Table (batched, so ingest isn't blocked)
 # ------------------------------------------------------
 def clear_sensors():
     with app.app_context():
-        num_rows = db.session.query(Sensor).delete()
-        db.session.commit()
+        t = Sensor.__table__
+        num_rows, _ = purge(Policy("sensors", t, t.c.timestamp, None, None), cutoff=None)
         print(f"🧹 Cleared {num_rows} sensor entries.")
 
 
@@ -0,0 +1,11 @@
+from backend.extensions import db
+from backend.models import Role, User
+
+
+def admin_headers(app):
+    """Bearer token of a fresh admin user (the /api/system routes are admin-only)."""
+    with app.app_context():
+        db.session.add(User(username="sysadmin", password="pw", roles=[Role(name="admin")]))
+        db.session.commit()
+    resp = app.test_client().post("/api/auth/login", json={"username": "sysadmin", "password": "pw"})
+    return {"Authorization": f"Bearer {resp.get_json()['token']}"}
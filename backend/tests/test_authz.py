@@ -0,0 +1,127 @@
+import os
+import tempfile
+import unittest
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Device, Permission, Role, User
+from backend.utils import authz, identity_cache
+from backend.utils.query_counter import count_queries
+
+
+class AuthzMatrixTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+        self.client = self.app.test_client()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        admin, user1, viewer = Role(name="admin"), Role(name="user1"), Role(name="viewer")
+        view, gauge = Permission(name="view_dashboard"), Permission(name="widget:gauge")
+        viewer.permissions.append(view)
+        dev_a, dev_b = Device(name="dev-a"), Device(name="dev-b")
+        db.session.add_all([
+            admin, user1, viewer, view, gauge, dev_a, dev_b,
+            User(username="root", password="x", roles=[admin]),
+            User(username="temp-only", password="x", roles=[user1]),
+            User(username="watcher", password="x", roles=[viewer], devices=[dev_a]),
+            User(username="nobody", password="x"),
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.ctx.pop()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    # ✅ Test 1: Built-in role rules + table grants, enforced by the dashboard builder
+    def test_matrix_and_widget_rules(self):
+        self.assertEqual(authz.allowed_widgets(1), list(authz.WIDGET_TYPES))
+        self.assertTrue(authz.can(1, authz.MANAGE_DASHBOARDS))
+        self.assertEqual(authz.allowed_widgets(2), ["temperature_chart"])
+        self.assertEqual(authz.allowed_widgets(4), [])
+        self.assertEqual([authz.primary_role(u) for u in (1, 3, 4, 99)], ["admin", "viewer", "user", "user"])
+        self.assertFalse(authz.can(4, "no_such_permission"))
+
+        def create(user, widget_type):
+            return self.client.post(f"/api/dashboardbuilder/dashboards?user={user}",
+                                    json={"name": "d", "widgets": [{"type": widget_type}]})
+
+        self.assertEqual(create("temp-only", "temperature_chart").status_code, 200)
+        resp = create("temp-only", "gauge")
+        self.assertEqual(resp.status_code, 403)
+        self.assertIn("role 'user1'", resp.get_json()["message"])
+        self.assertEqual(self.client.get("/api/dashboards/dashboards?user=root").get_json()["dashboards"][0]["name"], "d")
+        self.assertEqual(self.client.get("/api/dashboards/dashboards?user=watcher").get_json()["dashboards"], [])
+
+    # ✅ Test 2: Committed changes refresh only the touched role / user; rollbacks change nothing
+    def test_incremental_rebuild(self):
+        self.assertFalse(authz.can_use_widget(3, "gauge"))
+        builds = authz.stats()["builds"]
+
+        resp = self.client.post("/api/users/assign-role-permission", json={"role_id": 3, "permission_id": 2})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(authz.can_use_widget(3, "gauge"))               # viewer role now grants gauge
+
+        user = db.session.get(User, 4)
+        user.roles.append(db.session.get(Role, 3))
+        db.session.commit()
+        self.assertTrue(authz.can(4, "view_dashboard"))
+        self.assertEqual(authz.primary_role(4), "viewer")
+
+        user.roles.append(db.session.get(Role, 1))
+        db.session.flush()
+        db.session.rollback()
+        self.assertFalse(authz.can(4, authz.MANAGE_DASHBOARDS))
+
+        db.session.delete(db.session.get(User, 2))
+        db.session.commit()
+        self.assertEqual(authz.allowed_widgets(2), [])
+        stats = authz.stats()
+        self.assertEqual(stats["builds"], builds)                       # never recompiled from scratch
+        self.assertGreaterEqual(stats["role_refreshes"], 1)
+
+    # ✅ Test 3: Device-scoped checks, answered from memory without SQL
+    def test_device_checks_without_sql(self):
+        authz.stats()   # compile
+        with count_queries(db.engine) as q:
+            self.assertTrue(authz.can_on_device(3, "view_dashboard", 1))    # granted dev-a
+            self.assertFalse(authz.can_on_device(3, "view_dashboard", 2))
+            self.assertFalse(authz.can_on_device(4, "view_dashboard", 1))   # no permission at all
+            self.assertTrue(authz.can_on_device(1, authz.MANAGE_DASHBOARDS, 2))   # all_devices
+            self.assertEqual(authz.device_ids(3), frozenset({1}))
+            for _ in range(1000):
+                authz.can(2, "widget:temperature_chart")
+        self.assertEqual(q.count, 0, q.statements)
+
+    # ✅ Test 4: A committed role change reaches @roles_required on the next request
+    def test_revoked_role_drops_cached_identity(self):
+        identity_cache.invalidate_all()
+        token = self.client.post("/api/auth/login", json={"username": "root", "password": "x"}).get_json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        self.assertEqual(self.client.get("/api/system/broadcast", headers=headers).status_code, 200)
+        self.assertEqual(identity_cache.stats()["entries"], 1)
+
+        root = db.session.get(User, 1)
+        root.roles.remove(db.session.get(Role, 1))
+        db.session.commit()
+        self.assertFalse(authz.can(1, authz.MANAGE_DASHBOARDS))
+        self.assertEqual(self.client.get("/api/system/broadcast", headers=headers).status_code, 403)
+
+        # renaming (or regranting) a role drops every cached identity
+        root.roles.append(db.session.get(Role, 1))
+        db.session.commit()
+        self.assertEqual(self.client.get("/api/system/broadcast", headers=headers).status_code, 200)
+        db.session.get(Role, 1).name = "operator"
+        db.session.commit()
+        self.assertEqual(self.client.get("/api/system/broadcast", headers=headers).status_code, 403)
+        identity_cache.invalidate_all()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import json
+import unittest
+
+from backend.benchmarks import bench_suite
+
+
+class BenchSuiteTestCase(unittest.TestCase):
+    # ✅ Test 1: Direction per metric suffix, tolerance and the latency noise floor
+    def test_compare(self):
+        baseline = {"a_ms": 10.0, "b_ms": 0.5, "c_per_s": 1000, "d_per_s": 1000, "gone_ms": 1.0}
+        current = {"a_ms": 14.0, "b_ms": 1.2, "c_per_s": 700, "d_per_s": 1500, "new_ms": 3.0}
+        status = {name: s for name, _, _, _, s in bench_suite.compare(current, baseline, tolerance=0.25)}
+        self.assertEqual(status, {
+            "a_ms": "regressed",      # +40% and +4 ms
+            "b_ms": "ok",             # +140% but under NOISE_MS
+            "c_per_s": "regressed",   # throughput down 30%
+            "d_per_s": "improved",
+            "gone_ms": "missing",
+            "new_ms": "new",
+        })
+        self.assertEqual([bench_suite.parse_scale(s) for s in ("10k", "1m", "2.5k", "300")],
+                         [10000, 1000000, 2500, 300])
+
+    # ✅ Test 2: A small scale run answers every endpoint from seeded data
+    def test_scale_run(self):
+        results = bench_suite.bench_scale(2000, "2k")
+        self.assertEqual(sorted(results), sorted(
+            f"2k.{m}" for m in ("latest_ms", "chart_ms", "recent_ms", "history_ms", "series_ms",
+                                "export_csv_rows_per_s", "export_json_rows_per_s")
+        ))
+        self.assertTrue(all(v > 0 for v in results.values()))
+
+    # ✅ Test 3: The committed baseline covers the default run
+    def test_baseline_is_committed(self):
+        with open(bench_suite.BASELINE) as f:
+            baseline = json.load(f)
+        self.assertEqual(baseline["meta"]["scales"], list(bench_suite.DEFAULT_SCALES))
+        for prefix in ("ingest.", "10k.", "1m.", "fanout."):
+            self.assertTrue(any(k.startswith(prefix) for k in baseline["metrics"]), prefix)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+
+from backend.app import create_app
+from backend.extensions import socketio
+from backend.broadcast_service import BroadcastScheduler
+
+
+def _payload(device_id, temperature, status="online"):
+    return {
+        "device_id": device_id,
+        "device_name": f"dev-{device_id}",
+        "temperature": temperature,
+        "humidity": 50.0,
+        "pressure": 1000.0,
+        "status": status,
+        "timestamp": "2025-01-01T00:00:00+05:30",
+        "devices_online": 1 if status == "online" else 0,
+    }
+
+
+class BroadcastSchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+        self.client = socketio.test_client(self.app)
+        self.client.get_received()
+
+    def tearDown(self):
+        self.client.disconnect()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _events(self):
+        return [m["name"] for m in self.client.get_received()]
+
+    # ---------------------------------------
+    # ✅ Test 1: Many readings → one batch frame, latest value wins
+    # ---------------------------------------
+    def test_coalesces_per_tick(self):
+        sched = BroadcastScheduler(hz=10, legacy_events=[])
+        for i in range(10):
+            for device_id in (1, 2, 3):
+                sched.publish(_payload(device_id, 20.0 + i))
+
+        sched.flush()
+        received = self.client.get_received()
+        batches = [m for m in received if m["name"] == "sensor_batch"]
+        self.assertEqual(len(batches), 1)
+        readings = batches[0]["args"][0]["readings"]
+        self.assertEqual(sorted(r["device_id"] for r in readings), [1, 2, 3])
+        self.assertTrue(all(r["temperature"] == 29.0 for r in readings))
+
+        # first sighting of each device announces its status once
+        self.assertEqual([m["name"] for m in received].count("device_status"), 3)
+        self.assertEqual(sched.stats()["readings_coalesced"], 27)
+
+        # steady state: one frame per tick, no repeated device_status
+        for device_id in (1, 2, 3):
+            sched.publish(_payload(device_id, 30.0))
+        sched.flush()
+        self.assertEqual(self._events(), ["sensor_batch"])
+
+    # ---------------------------------------
+    # ✅ Test 2: Status transitions and legacy events
+    # ---------------------------------------
+    def test_status_change_and_legacy(self):
+        # per-reading events are opt-in for older clients
+        self.assertEqual(BroadcastScheduler(hz=10).legacy_events, [])
+        sched = BroadcastScheduler(hz=10, legacy_events=["sensor_data", "bogus"])
+        self.assertEqual(sched.legacy_events, ["sensor_data"])
+
+        sched.publish(_payload(7, 21.0))
+        sched.flush()
+        self.assertEqual(sorted(self._events()), ["device_status", "sensor_batch", "sensor_data"])
+
+        sched.publish(_payload(7, 0.0, status="offline"))
+        sched.flush()
+        self.assertEqual(sorted(self._events()), ["device_status", "sensor_batch", "sensor_data"])
+
+        self.assertEqual(sched.flush(), 0)
+        self.assertEqual(self._events(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Device
+from backend.ingest_service import Reading, write_readings
+from backend.routes import history_routes
+
+START = datetime(2025, 3, 1)
+
+
+class HistoryExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+
+        with self.app.app_context():
+            db.create_all()
+            devices = [Device(name="exp-a"), Device(name="exp-b")]
+            db.session.add_all(devices)
+            db.session.commit()
+            self.ids = [d.id for d in devices]
+
+            # 3 days, one reading per device every 10 minutes
+            readings = [
+                Reading(device_id, "t", None, 20.0 + i % 5, 50.0, 1000.0, START + timedelta(minutes=10 * i))
+                for i in range(3 * 144)
+                for device_id in self.ids
+            ]
+            write_readings(readings)
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _get(self, path, **params):
+        return self.client.get(path, query_string=params, buffered=False)
+
+    # ---------------------------------------
+    # ✅ Test 1: Single day CSV is streamed in chunks
+    # ---------------------------------------
+    def test_csv_day_streams(self):
+        old = history_routes.EXPORT_CHUNK
+        history_routes.EXPORT_CHUNK = 50
+        try:
+            res = self._get("/api/history/export/csv", date="2025-03-02")
+            self.assertTrue(res.is_streamed)
+            chunks = list(res.response)
+        finally:
+            history_routes.EXPORT_CHUNK = old
+            res.close()
+
+        self.assertGreater(len(chunks), 5)
+        rows = list(csv.reader(io.StringIO("".join(c.decode() if isinstance(c, bytes) else c for c in chunks))))
+        self.assertEqual(rows[0], ["device_id", "temperature", "humidity", "pressure", "timestamp"])
+        self.assertEqual(len(rows) - 1, 2 * 144)
+        self.assertIn("history_2025-03-02.csv", res.headers["Content-Disposition"])
+
+    # ---------------------------------------
+    # ✅ Test 2: Multi-day, per-device JSON range
+    # ---------------------------------------
+    def test_json_range_per_device(self):
+        res = self._get("/api/history/export/json", **{"from": "2025-03-01", "to": "2025-03-02",
+                                                        "device_id": str(self.ids[1])})
+        data = json.loads(res.get_data(as_text=True))
+        res.close()
+
+        self.assertEqual(len(data), 2 * 144)
+        self.assertEqual({r["device_id"] for r in data}, {self.ids[1]})
+        self.assertEqual(data[0]["timestamp"], START.isoformat())
+        self.assertLess(data[-1]["timestamp"], "2025-03-03")
+
+        empty = self._get("/api/history/export/json", date="2024-01-01")
+        self.assertEqual(json.loads(empty.get_data(as_text=True)), [])
+        empty.close()
+
+    # ---------------------------------------
+    # ✅ Test 3: Bad parameters fail before streaming starts
+    # ---------------------------------------
+    def test_validation(self):
+        self.assertEqual(self._get("/api/history/export/csv").status_code, 400)
+        self.assertEqual(self._get("/api/history/export/csv", date="03/01/2025").status_code, 400)
+        self.assertEqual(self._get("/api/history/export/json", **{"from": "2025-03-02", "to": "2025-03-01"}).status_code, 400)
+        self.assertEqual(self._get("/api/history/export/csv", date="2025-03-01", device_id="x").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import datetime
+import os
+import tempfile
+import time
+import unittest
+
+import jwt
+from flask import jsonify, request
+
+from backend.app import create_app
+from backend.config import Config
+from backend.extensions import db
+from backend.models import Device, Permission, Role, User
+from backend.utils import identity_cache
+from backend.utils.decorators import roles_required, token_required
+from backend.utils.query_counter import count_queries
+
+
+class IdentityCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+
+        @self.app.get("/_test/admin-only")
+        @token_required
+        @roles_required(["admin"])
+        def admin_only():
+            return jsonify({"user_id": request.user.user_id, "devices": sorted(request.user.device_ids)})
+
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            admin, viewer = Role(name="admin"), Role(name="viewer")
+            device = Device(name="dev-a")
+            db.session.add_all([
+                admin, viewer, device, Permission(name="view"),
+                User(username="alice", password="pw-a", roles=[admin], devices=[device]),
+                User(username="bob", password="pw-b", roles=[viewer]),
+            ])
+            db.session.commit()
+            db.session.add(User(username="carol", password="pw-c", roles=[viewer, admin]))
+            db.session.commit()
+        identity_cache.invalidate_all()
+
+    def tearDown(self):
+        identity_cache.invalidate_all()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _token(self, username, password):
+        resp = self.client.post("/api/auth/login", json={"username": username, "password": password})
+        return resp.get_json()["token"]
+
+    def _get(self, url, token):
+        return self.client.get(url, headers={"Authorization": f"Bearer {token}"})
+
+    # ✅ Test 1: Only the first request with a token touches the users table
+    def test_repeat_requests_skip_database(self):
+        token = self._token("alice", "pw-a")
+        hits = identity_cache.stats()["hits"]
+        with self.app.app_context():
+            with count_queries(db.engine) as first:
+                self.assertEqual(self._get("/api/auth/whoami", token).get_json()["role"], "admin")
+            with count_queries(db.engine) as again:
+                for _ in range(5):
+                    self.assertEqual(self._get("/api/auth/whoami", token).get_json()["username"], "alice")
+                resp = self._get("/_test/admin-only", token)
+        self.assertGreater(first.count, 0)
+        self.assertEqual(again.count, 0, again.statements)
+        self.assertEqual(resp.get_json()["devices"], [1])
+        self.assertEqual(identity_cache.stats()["hits"] - hits, 6)
+
+        # @roles_required reads the cached role names
+        self.assertEqual(self._get("/_test/admin-only", self._token("bob", "pw-b")).status_code, 403)
+
+        # several roles: whoami reports the same primary role as login
+        login = self.client.post("/api/auth/login", json={"username": "carol", "password": "pw-c"}).get_json()
+        self.assertEqual(login["role"], "admin")
+        self.assertEqual(self._get("/api/auth/whoami", login["token"]).get_json()["role"], "admin")
+
+    # ✅ Test 2: User and role/permission changes invalidate cached identities
+    def test_invalidation(self):
+        alice, bob = self._token("alice", "pw-a"), self._token("bob", "pw-b")
+        self._get("/api/auth/whoami", alice)
+        self._get("/api/auth/whoami", bob)
+        self.assertEqual(identity_cache.stats()["entries"], 2)
+
+        self.client.put("/api/users/1", json={"username": "alice2"})
+        self.assertEqual(identity_cache.stats()["entries"], 1)          # only alice's token dropped
+        self.assertEqual(self._get("/api/auth/whoami", alice).get_json()["username"], "alice2")
+
+        self.client.post("/api/users/assign-role-permission", json={"role_id": 2, "permission_id": 1})
+        self.assertEqual(identity_cache.stats()["entries"], 0)
+
+        # deactivation takes effect on the next request, through @token_required too
+        self.client.put("/api/users/1", json={"is_active": "false"})
+        self.assertEqual(self._get("/api/auth/whoami", alice).status_code, 403)
+        self.assertEqual(self._get("/_test/admin-only", alice).status_code, 403)
+
+        self.client.delete("/api/users/2")
+        self.assertEqual(self._get("/api/auth/whoami", bob).status_code, 404)
+
+    # ✅ Test 3: Entries never outlive the token's exp, and the LRU stays bounded
+    def test_expiry_and_bound(self):
+        secret = identity_cache._secret()
+
+        def token(uid, seconds):
+            exp = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(seconds=seconds)
+            return jwt.encode({"user_id": uid, "exp": exp}, secret, algorithm="HS256")
+
+        short = token(1, 1)
+        with self.app.app_context():
+            self.assertEqual(identity_cache.resolve(short).username, "alice")
+            time.sleep(1.2)
+            with self.assertRaises(jwt.ExpiredSignatureError):
+                identity_cache.resolve(short)
+
+            size = Config.AUTH_CACHE_SIZE
+            Config.AUTH_CACHE_SIZE = 2
+            try:
+                tokens = [token(1, 60 + i) for i in range(3)]
+                for t in tokens:
+                    identity_cache.resolve(t)
+                self.assertEqual(identity_cache.stats()["entries"], 2)
+                misses = identity_cache.stats()["misses"]
+                identity_cache.resolve(tokens[0])                      # evicted → decoded again
+                self.assertEqual(identity_cache.stats()["misses"], misses + 1)
+            finally:
+                Config.AUTH_CACHE_SIZE = size
+        self.assertEqual(self._get("/api/auth/whoami", "not-a-jwt").status_code, 401)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Device, History, Sensor
+from backend.ingest_service import IngestQueue, Reading
+from backend.timeseries import SegmentStore, set_store
+from backend.tests.helpers import admin_headers
+
+
+class IngestQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        """Create a throwaway SQLite file so the writer uses its own connection."""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+
+        with self.app.app_context():
+            db.create_all()
+            device = Device(name="Ingest Device", host="localhost")
+            db.session.add(device)
+            db.session.commit()
+            self.device_id = device.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _reading(self, i, ts=None):
+        return Reading(
+            device_id=self.device_id,
+            topic="francauto/devices/Ingest Device",
+            payload="{}",
+            temperature=20.0 + i,
+            humidity=50.0,
+            pressure=1000.0,
+            timestamp=ts or datetime(2025, 1, 1) + timedelta(seconds=i),
+        )
+
+    # ---------------------------------------
+    # ✅ Test 1: Batched flush writes History + Device (sensors untouched)
+    # ---------------------------------------
+    def test_flush_writes_batch(self):
+        q = IngestQueue(maxsize=100, batch_size=10, flush_interval=0.05)
+        q._app = self.app
+        for i in range(25):
+            self.assertTrue(q.put(self._reading(i)))
+
+        self.assertEqual(q.stats()["queue_depth"], 25)
+        self.assertEqual(q.flush(), 25)
+
+        stats = q.stats()
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertEqual(stats["written"], 25)
+        self.assertEqual(stats["flushes"], 3)  # 10 + 10 + 5
+
+        with self.app.app_context():
+            self.assertEqual(Sensor.query.count(), 0)
+            self.assertEqual(History.query.count(), 25)
+            device = db.session.get(Device, self.device_id)
+            self.assertEqual(device.status, "online")
+            self.assertTrue(device.is_connected)
+            self.assertEqual(device.last_seen, datetime(2025, 1, 1) + timedelta(seconds=24))
+
+    # ---------------------------------------
+    # ✅ Test 2: Full queue drops instead of blocking
+    # ---------------------------------------
+    def test_full_queue_drops(self):
+        q = IngestQueue(maxsize=5, batch_size=10, flush_interval=0.05)
+        q._app = self.app
+        results = [q.put(self._reading(i)) for i in range(8)]
+
+        self.assertEqual(results.count(False), 3)
+        stats = q.stats()
+        self.assertEqual(stats["dropped"], 3)
+        self.assertEqual(stats["enqueued"], 5)
+        self.assertEqual(stats["queue_high_water"], 5)
+
+    # ---------------------------------------
+    # ✅ Test 3: Stats endpoint is exposed
+    # ---------------------------------------
+    def test_stats_endpoint(self):
+        client = self.app.test_client()
+        self.assertEqual(client.get("/api/system/ingest").status_code, 401)
+        response = client.get("/api/system/ingest", headers=admin_headers(self.app))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("queue_depth", response.json)
+        self.assertIn("dropped", response.json)
+
+    # ---------------------------------------
+    # ✅ Test 4: A batch whose commit fails leaves no segment-file readings
+    # ---------------------------------------
+    def test_failed_commit_segment_backend(self):
+        store = SegmentStore(os.path.join(self.tmpdir.name, "segments"))
+        previous = set_store(store)
+        try:
+            q = IngestQueue(maxsize=100, batch_size=10, flush_interval=0.05)
+            q._app = self.app
+            for i in range(5):
+                q.put(self._reading(i))
+            with mock.patch.object(db.session, "commit", side_effect=RuntimeError("disk I/O error")):
+                self.assertEqual(q.flush(), 0)
+            self.assertEqual(q.stats()["dropped"], 5)
+            self.assertEqual(store.devices(), [])
+
+            for i in range(5, 8):
+                q.put(self._reading(i))
+            self.assertEqual(q.flush(), 3)
+            self.assertEqual([r.temperature for r in store.range()], [25.0, 26.0, 27.0])
+        finally:
+            set_store(previous)
+
+
+if __name__ == "__main__":
+    unittest.main()
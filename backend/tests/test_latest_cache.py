@@ -0,0 +1,114 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from pytz import timezone
+from sqlalchemy import event
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Device
+from backend.ingest_service import IngestQueue, Reading
+from backend.utils import latest_cache
+
+INDIA_TZ = timezone("Asia/Kolkata")
+
+
+class LatestCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+
+        with self.app.app_context():
+            db.create_all()
+            devices = [Device(name=f"dev-{i}", is_connected=True, status="online") for i in (1, 2)]
+            db.session.add_all(devices)
+            db.session.commit()
+            self.ids = [d.id for d in devices]
+        latest_cache.clear()
+
+        self.queue = IngestQueue(maxsize=100, batch_size=50, flush_interval=0.05)
+        self.queue._app = self.app
+        self.now = datetime.now(INDIA_TZ).replace(microsecond=0)
+
+    def tearDown(self):
+        latest_cache.clear()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _put(self, device_id, temperature, seconds_ago):
+        self.queue.put(Reading(
+            device_id=device_id, topic="t", payload="{}",
+            temperature=temperature, humidity=40.0, pressure=1000.0,
+            timestamp=self.now - timedelta(seconds=seconds_ago),
+        ))
+
+    # ---------------------------------------
+    # ✅ Test 1: Ingest path keeps newest value per device
+    # ---------------------------------------
+    def test_ingest_updates_cache(self):
+        self._put(self.ids[0], 20.0, 30)
+        self._put(self.ids[1], 25.0, 10)
+        self._put(self.ids[0], 19.0, 60)  # late, older reading must not win
+
+        self.assertEqual(latest_cache.get(self.ids[0]).temperature, 20.0)
+        self.assertEqual(latest_cache.newest().device_id, self.ids[1])
+
+        latest_cache.discard(self.ids[1])
+        self.assertEqual(latest_cache.newest().device_id, self.ids[0])
+
+    # ---------------------------------------
+    # ✅ Test 2: Endpoints read the cache, not the sensors table
+    # ---------------------------------------
+    def test_endpoints_served_from_cache(self):
+        self._put(self.ids[0], 21.0, 20)
+        self._put(self.ids[1], 26.5, 5)
+        self.queue.flush()
+
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        client = self.app.test_client()
+        with self.app.app_context():
+            engine = db.engine
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            latest = client.get("/api/data/latest").json
+            current = client.get("/api/dashboard/current").json
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        self.assertTrue(statements)  # device counts still hit the DB
+        self.assertFalse([s for s in statements if "FROM sensors" in s or "FROM history" in s])
+
+        self.assertEqual(latest["device_name"], "dev-2")
+        self.assertEqual(latest["temperature"], 26.5)
+        self.assertEqual(current["temperature"], 26.5)
+        self.assertEqual(current["timestamp_ms"], int((self.now - timedelta(seconds=5)).timestamp() * 1000))
+
+    # ---------------------------------------
+    # ✅ Test 3: Rebuilt from the database at startup
+    # ---------------------------------------
+    def test_rebuild_from_db(self):
+        for i in range(5):
+            self._put(self.ids[0], 20.0 + i, 100 - i)
+            self._put(self.ids[1], 30.0 + i, 50 - i)
+        self.queue.flush()
+        latest_cache.clear()
+
+        latest_cache.warm(self.app)
+        self.assertEqual(latest_cache.size(), 2)
+        self.assertEqual(latest_cache.get(self.ids[0]).temperature, 24.0)
+        self.assertEqual(latest_cache.get(self.ids[1]).temperature, 34.0)
+        self.assertEqual(latest_cache.newest().timestamp, self.now - timedelta(seconds=46))
+
+
+if __name__ == "__main__":
+    unittest.main()
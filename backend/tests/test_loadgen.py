@@ -0,0 +1,48 @@
+import os
+import random
+import tempfile
+import unittest
+
+from backend import loadgen
+from backend.config import Config
+from backend.timeseries import set_store
+from backend.utils.payload_parsers import Unparsed, parse_payload
+
+
+class LoadGeneratorTestCase(unittest.TestCase):
+    # ✅ Test 1: Every payload shape decodes with its device format and keeps the sequence number
+    def test_shapes_round_trip(self):
+        rnd = random.Random(3)
+        for name, (fmt, encode) in loadgen.SHAPES.items():
+            data = parse_payload(encode(4242, rnd), fmt)
+            self.assertNotIsInstance(data, Unparsed, name)
+            self.assertEqual(int(data["pressure"]), 4242, name)
+            self.assertTrue(20.0 <= data["temperature"] <= 35.0, name)
+
+    # ✅ Test 2: A short in-process run accounts for every reading and measures latency
+    def test_inproc_run(self):
+        report = loadgen.run(devices=25, rate=20, seconds=1.0, shape="json-alias")
+        self.assertGreater(report["sent"], 300)
+        self.assertEqual(report["written"], report["sent"])
+        self.assertEqual((report["dropped"], report["lost"], report["publish_errors"]), (0, 0, 0))
+        self.assertGreater(report["socket_readings"], 0)
+        self.assertEqual(report["socket_readings"] + report["coalesced"], report["sent"])
+        self.assertIsNotNone(report["latency"]["p95_ms"])
+
+    # ✅ Test 3: Scratch runs keep segment-backend readings out of the real TIMESERIES_DIR
+    def test_scratch_store(self):
+        backend, root = Config.TIMESERIES_BACKEND, Config.TIMESERIES_DIR
+        with tempfile.TemporaryDirectory() as real:
+            Config.TIMESERIES_BACKEND, Config.TIMESERIES_DIR = "segment", real
+            previous = set_store(None)      # resolved from the config above, as in a fresh process
+            try:
+                report = loadgen.run(devices=5, rate=20, seconds=0.5)
+                self.assertIsNone(set_store(None))          # the run put the unresolved store back
+            finally:
+                set_store(previous)
+                Config.TIMESERIES_BACKEND, Config.TIMESERIES_DIR = backend, root
+            self.assertGreater(report["written"], 0)
+            self.assertEqual(os.listdir(real), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from backend import mqtt_service
+from backend.app import create_app
+from backend.extensions import db, socketio
+from backend.ingest_service import flush_ingest_queue
+from backend.models import Device
+from backend.utils import metrics
+from backend.utils.metrics import Counter, Gauge, Histogram, Registry
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+        self.client = self.app.test_client()
+        mqtt_service._flask_app = self.app
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Device(name="dev-a"))
+            db.session.commit()
+        metrics.REGISTRY.reset()
+
+    def tearDown(self):
+        mqtt_service.reset_all_mqtt_state()
+        flush_ingest_queue()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        mqtt_service._flask_app = None
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    # ✅ Test 1: Exposition format for counters, gauges and histograms
+    def test_render_format(self):
+        registry = Registry()
+        c = Counter("t_total", "A counter.", ["device"], registry=registry)
+        g = Gauge("t_depth", "A gauge.", registry=registry)
+        h = Histogram("t_seconds", "A histogram.", buckets=(0.1, 1.0), registry=registry)
+        c.labels('dev "x"').inc()
+        c.labels('dev "x"').inc(2)
+        g.set_function(lambda: 7)
+        for v in (0.05, 0.5, 0.5, 3.0):
+            h.observe(v)
+
+        lines = registry.render().splitlines()
+        self.assertIn("# TYPE t_total counter", lines)
+        self.assertIn('t_total{device="dev \\"x\\""} 3', lines)
+        self.assertIn("t_depth 7", lines)
+        self.assertIn('t_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('t_seconds_bucket{le="1"} 3', lines)
+        self.assertIn('t_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn("t_seconds_sum 4.05", lines)
+        self.assertIn("t_seconds_count 4", lines)
+
+    # ✅ Test 2: HTTP latency per route + SQL counters on /metrics
+    def test_http_and_endpoint(self):
+        self.client.get("/api/sensors")
+        self.client.get("/api/sensors")
+        resp = self.client.get("/metrics")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.content_type.startswith("text/plain"))
+        text = resp.get_data(as_text=True)
+        self.assertIn('franc_http_requests_total{method="GET",route="/api/sensors",status="200"} 2', text)
+        self.assertIn('franc_http_request_duration_seconds_count{method="GET",route="/api/sensors"} 2', text)
+        self.assertIn("franc_sql_statements_total", text)
+        self.assertIn("franc_socketio_connected_clients 0", text)
+
+    # ✅ Test 3: MQTT parse outcomes per device, ingest commit latency, emits per event
+    def test_pipeline_counters(self):
+        device = SimpleNamespace(id=1, name="dev-a", payload_format="json")
+        for payload in (b'{"temperature": 21.5}', b'{"temp": 22}', b"\x00not json{"):
+            mqtt_service.handle_message(device, SimpleNamespace(topic="francauto/devices/dev-a", payload=payload))
+        flush_ingest_queue()
+        socketio.emit("custom_event", {"x": 1})
+
+        self.assertEqual(metrics.MQTT_RECEIVED.labels("dev-a").value, 3)
+        self.assertEqual(metrics.MQTT_PARSED.labels("dev-a").value, 2)
+        self.assertEqual(metrics.MQTT_FAILED.labels("dev-a").value, 1)
+        self.assertEqual(metrics.INGEST_WRITTEN.labels().value, 3)
+        self.assertGreaterEqual(metrics.INGEST_COMMIT_SECONDS.labels().count, 1)
+        self.assertEqual(metrics.SOCKETIO_EMITS.labels("custom_event").value, 1)
+        self.assertIn('franc_mqtt_messages_failed_total{device="dev-a"} 1', metrics.render())
+
+
+if __name__ == "__main__":
+    unittest.main()
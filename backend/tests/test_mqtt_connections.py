@@ -0,0 +1,140 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Device, History
+from backend import mqtt_service
+from backend.ingest_service import flush_ingest_queue
+from backend.tests.helpers import admin_headers
+
+
+class MqttConnectionManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+        mqtt_service._flask_app = self.app
+
+        with self.app.app_context():
+            db.create_all()
+            for name, host in (("dev-a", "localhost"), ("dev-b", "localhost"), ("dev-c", "127.0.0.1")):
+                db.session.add(Device(name=name, host=host))
+            db.session.commit()
+
+        # No network: brokers are always "reachable" and never really dialled
+        self.patches = [
+            mock.patch.object(mqtt_service, "reachable_broker", return_value=True),
+            mock.patch.object(mqtt_service._BrokerConnection, "open", lambda conn: None),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        mqtt_service.reset_all_mqtt_state()
+        flush_ingest_queue()
+        for p in self.patches:
+            p.stop()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        mqtt_service._flask_app = None
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _connect_all(self):
+        with self.app.app_context():
+            for d in Device.query.order_by(Device.id).all():
+                self.assertTrue(mqtt_service.start_mqtt_client(d))
+
+    # ---------------------------------------
+    # ✅ Test 1: Devices share one client per broker
+    # ---------------------------------------
+    def test_shared_connection_per_broker(self):
+        self._connect_all()
+        stats = mqtt_service.get_connection_stats()
+
+        self.assertEqual(stats["devices_active"], 3)
+        self.assertEqual(stats["connections"], 2)
+        fan_in = {b["host"]: b["fan_in"] for b in stats["brokers"]}
+        self.assertEqual(fan_in, {"localhost": 2, "127.0.0.1": 1})
+
+        response = self.app.test_client().get("/api/system/mqtt", headers=admin_headers(self.app))
+        self.assertEqual(response.json["connections"], 2)
+
+    # ---------------------------------------
+    # ✅ Test 2: Messages are routed to the device owning the topic
+    # ---------------------------------------
+    def test_message_routed_by_topic(self):
+        self._connect_all()
+        conn = mqtt_service._connections[("localhost", 1883)]
+        msg = SimpleNamespace(topic="francauto/devices/dev-b", payload=b'{"temp": 21.5}')
+        conn._on_message(conn.client, None, msg)
+        flush_ingest_queue()
+
+        with self.app.app_context():
+            dev_b = Device.query.filter_by(name="dev-b").first()
+            rows = History.query.all()
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0].device_id, dev_b.id)
+            self.assertEqual(rows[0].temperature, 21.5)
+
+    # ---------------------------------------
+    # ✅ Test 3: Wildcard router resolves names from the cache only
+    # ---------------------------------------
+    def test_router_uses_cached_ids(self):
+        self._connect_all()
+        conn = mqtt_service._connections[("localhost", 1883)]
+        mqtt_service.resolve_device_id("dev-a")  # warm the cache
+
+        with mock.patch.object(mqtt_service, "_load_device_cache") as loader:
+            for _ in range(20):
+                conn._on_message(conn.client, None, SimpleNamespace(
+                    topic="francauto/devices/dev-a", payload=b'{"t": 20}'))
+            # dev-c is real but connected through another broker; ghost is unknown
+            conn._on_message(conn.client, None, SimpleNamespace(
+                topic="francauto/devices/dev-c", payload=b"{}"))
+            conn._on_message(conn.client, None, SimpleNamespace(
+                topic="francauto/devices/ghost", payload=b"{}"))
+            loader.assert_not_called()
+
+        self.assertEqual(conn.stats()["messages"], 22)
+        self.assertEqual(conn.stats()["unrouted"], 2)
+        self.assertIsNone(mqtt_service.route_topic("other/devices/dev-a"))
+
+    # ---------------------------------------
+    # ✅ Test 4: Adding / deleting a device invalidates the router cache
+    # ---------------------------------------
+    def test_device_routes_invalidate_cache(self):
+        client = self.app.test_client()
+        self.assertIsNone(mqtt_service.resolve_device_id("dev-new"))
+
+        client.post("/api/devices", json={"name": "dev-new", "host": "localhost"})
+        new_id = mqtt_service.resolve_device_id("dev-new")
+        self.assertIsNotNone(new_id)
+
+        client.delete(f"/api/devices/{new_id}")
+        self.assertIsNone(mqtt_service.resolve_device_id("dev-new"))
+
+    # ---------------------------------------
+    # ✅ Test 5: Last device out closes the shared connection
+    # ---------------------------------------
+    def test_disconnect_closes_idle_connection(self):
+        self._connect_all()
+        with self.app.app_context():
+            mqtt_service.stop_mqtt_client(Device.query.filter_by(name="dev-c").first())
+            self.assertEqual(mqtt_service.get_connection_stats()["connections"], 1)
+
+            mqtt_service.stop_mqtt_client(Device.query.filter_by(name="dev-a").first())
+            stats = mqtt_service.get_connection_stats()
+            self.assertEqual(stats["connections"], 1)
+            self.assertEqual(stats["brokers"][0]["fan_in"], 1)
+            self.assertEqual(Device.query.filter_by(name="dev-a").first().status, "offline")
+
+
+if __name__ == "__main__":
+    unittest.main()
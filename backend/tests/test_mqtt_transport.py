@@ -0,0 +1,131 @@
+import json
+import os
+import tempfile
+import unittest
+
+from backend import mqtt_service, mqtt_transport
+from backend.app import create_app
+from backend.broadcast_service import flush_broadcasts
+from backend.config import Config
+from backend.extensions import db, socketio
+from backend.ingest_service import flush_ingest_queue
+from backend.models import Device, History
+from backend.mqtt_transport import MemoryClient, get_broker, topic_matches
+
+
+def _recorder(client):
+    got = []
+    client.on_message = lambda c, userdata, msg: got.append((msg.topic, msg.payload, msg.qos))
+    return got
+
+
+class MqttTransportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+        mqtt_service._flask_app = self.app
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(Device(name="dev-a", host="broker.local"))
+            db.session.add(Device(name="dev-b", host="broker.local"))
+            db.session.commit()
+        self._transport = Config.MQTT_TRANSPORT
+        Config.MQTT_TRANSPORT = "memory"
+        mqtt_transport.reset_brokers()
+
+    def tearDown(self):
+        mqtt_service.reset_all_mqtt_state()
+        flush_ingest_queue()
+        Config.MQTT_TRANSPORT = self._transport
+        mqtt_transport.reset_brokers()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        mqtt_service._flask_app = None
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    # ✅ Test 1: "+" / "#" wildcards, "$" topics and subscriber fan-out
+    def test_wildcard_routing(self):
+        self.assertTrue(topic_matches("francauto/devices/+", "francauto/devices/dev-a"))
+        self.assertFalse(topic_matches("francauto/devices/+", "francauto/devices/dev-a/raw"))
+        self.assertTrue(topic_matches("francauto/#", "francauto/devices/dev-a/raw"))
+        self.assertTrue(topic_matches("francauto/#", "francauto"))
+        self.assertFalse(topic_matches("#", "$SYS/broker/uptime"))
+
+        one, many, pub = MemoryClient("one"), MemoryClient("many"), MemoryClient("pub")
+        got_one, got_many = _recorder(one), _recorder(many)
+        for c in (one, many, pub):
+            c.connect("broker.local")
+        one.subscribe("francauto/devices/+")
+        many.subscribe("francauto/#")
+        with self.assertRaises(ValueError):
+            many.subscribe("francauto/#/raw")
+
+        pub.publish("francauto/devices/dev-a", b"1")
+        pub.publish("francauto/devices/dev-a/raw", "2")
+        pub.publish("other/topic", b"3")
+        self.assertEqual([t for t, _, _ in got_one], ["francauto/devices/dev-a"])
+        self.assertEqual([p for _, p, _ in got_many], [b"1", b"2"])
+
+    # ✅ Test 2: QoS 1 is queued for an offline persistent session, QoS 0 is not
+    def test_qos_and_persistent_session(self):
+        published = []
+        pub = MemoryClient("pub")
+        pub.on_publish = lambda c, userdata, mid: published.append(mid)
+        pub.connect("broker.local")
+        sub = MemoryClient("sub", clean_session=False)
+        got = _recorder(sub)
+        sub.connect("broker.local")
+        sub.subscribe("sensors/#", qos=1)
+        pub.publish("sensors/a", b"live", qos=0)
+        sub.disconnect()
+
+        pub.publish("sensors/a", b"lost", qos=0)
+        pub.publish("sensors/a", b"kept", qos=1)
+        pub.publish("sensors/b", b"retained", qos=1, retain=True)
+        info = pub.publish("sensors/a", b"late", qos=1)
+        self.assertEqual(info.rc, 0)
+        self.assertEqual(published, [1, 2, 3, 4, 5])
+        self.assertEqual(get_broker("broker.local").stats()["queued"], 3)
+
+        sub.connect("broker.local")      # session resumes: queued QoS 1 messages arrive in order
+        self.assertEqual([p for _, p, _ in got], [b"live", b"kept", b"retained", b"late"])
+        self.assertEqual([q for _, _, q in got], [0, 1, 1, 1])
+        self.assertEqual(get_broker("broker.local").stats()["dropped"], 1)
+
+        late = MemoryClient("late")
+        got_late = _recorder(late)
+        late.connect("broker.local")
+        late.subscribe("sensors/+")     # retained message, downgraded to the subscription's QoS 0
+        self.assertEqual(got_late, [("sensors/b", b"retained", 0)])
+
+    # ✅ Test 3: The whole pipeline offline — connect, publish, store, broadcast
+    def test_pipeline_end_to_end(self):
+        with self.app.app_context():
+            for d in Device.query.order_by(Device.id).all():
+                self.assertTrue(mqtt_service.start_mqtt_client(d))
+        self.assertEqual(mqtt_service.get_connection_stats()["connections"], 1)
+        flush_broadcasts()                # drop readings other tests left pending
+        listener = socketio.test_client(self.app)
+        listener.get_received()
+
+        pub = MemoryClient("field-gateway")
+        pub.connect("broker.local")
+        for name, temp in (("dev-a", 21.5), ("dev-b", 23.0), ("unknown", 1.0)):
+            pub.publish(f"francauto/devices/{name}", json.dumps({"temperature": temp, "humidity": 40}))
+        flush_ingest_queue()
+        flush_broadcasts()
+
+        with self.app.app_context():
+            rows = sorted((h.device_id, h.temperature) for h in History.query.all())
+        self.assertEqual(rows, [(1, 21.5), (2, 23.0)])
+        readings = [r for m in listener.get_received() if m["name"] == "sensor_batch" for r in m["args"][0]["readings"]]
+        self.assertEqual(sorted(r["device_id"] for r in readings), [1, 2])
+        listener.disconnect()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from datetime import datetime, timedelta
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Device
+from backend.ingest_service import Reading, write_readings
+from backend.timeseries import SegmentStore, set_store
+from backend.utils import parquet_export
+
+START = datetime(2025, 3, 1)
+
+
+@unittest.skipUnless(parquet_export.available(), "pyarrow not installed")
+class ParquetExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+
+        with self.app.app_context():
+            db.create_all()
+            devices = [Device(name="pq-a"), Device(name="pq-b")]
+            db.session.add_all(devices)
+            db.session.commit()
+            self.ids = [d.id for d in devices]
+
+            # 2 days, one reading per device every 10 minutes; one NULL humidity
+            readings = [
+                Reading(device_id, "t", None, 20.5 + i % 5, None if i == 3 else 50.0, 1000.0,
+                        START + timedelta(minutes=10 * i))
+                for i in range(2 * 144)
+                for device_id in self.ids
+            ]
+            write_readings(readings)
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    # ---------------------------------------
+    # ✅ Test 1: Single file has typed columns and correct instants
+    # ---------------------------------------
+    def test_single_file_schema_and_values(self):
+        pa, pq = parquet_export.pa, parquet_export.pq
+        res = self.client.get("/api/history/export/parquet", query_string={"date": "2025-03-01"})
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("history_2025-03-01.parquet", res.headers["Content-Disposition"])
+        table = pq.read_table(io.BytesIO(res.data))
+        res.close()
+
+        self.assertEqual(table.num_rows, 2 * 144)
+        self.assertEqual(table.schema.field("temperature").type, pa.float32())
+        self.assertEqual(table.schema.field("device_id").type, pa.int32())
+        first = table.column("timestamp")[0].as_py()
+        # stored wall time 2025-03-01 00:00 IST
+        self.assertEqual(first.isoformat(), "2025-03-01T00:00:00+05:30")
+        self.assertEqual(table.column("humidity").null_count, 2)
+
+    # ---------------------------------------
+    # ✅ Test 2: Partitioned export by device and day (API zip + direct)
+    # ---------------------------------------
+    def test_partitioned(self):
+        with self.app.app_context():
+            root = os.path.join(self.tmpdir.name, "tree")
+            written = parquet_export.write_partitioned(
+                root, START, START + timedelta(days=2), chunk=100
+            )
+        self.assertEqual(len(written), 4)
+        self.assertEqual(set(written.values()), {144})
+        path = os.path.join(f"device_id={self.ids[1]}", "date=2025-03-02", "part-0.parquet")
+        self.assertIn(path, written)
+        part = parquet_export.pq.read_table(os.path.join(root, path))
+        self.assertEqual(set(part.column("device_id").to_pylist()), {self.ids[1]})
+
+        res = self.client.get("/api/history/export/parquet", query_string={
+            "from": "2025-03-01", "to": "2025-03-02", "partition": "day"})
+        self.assertEqual(res.mimetype, "application/zip")
+        names = zipfile.ZipFile(io.BytesIO(res.data)).namelist()
+        res.close()
+        self.assertEqual(sorted(names), ["date=2025-03-01/part-0.parquet", "date=2025-03-02/part-0.parquet"])
+
+    # ---------------------------------------
+    # ✅ Test 3: Exports read through the configured store (segment backend)
+    # ---------------------------------------
+    def test_segment_backend(self):
+        store = SegmentStore(os.path.join(self.tmpdir.name, "segments"))
+        with self.app.app_context():
+            store.append_batch([
+                Reading(self.ids[0], "t", None, 30.0, 40.0, 990.0, START + timedelta(hours=h)) for h in range(30)
+            ])
+            db.session.commit()
+        previous = set_store(store)
+        try:
+            res = self.client.get("/api/history/export/parquet", query_string={"date": "2025-03-02"})
+            table = parquet_export.pq.read_table(io.BytesIO(res.data))
+            res.close()
+            with self.app.app_context():
+                written = parquet_export.write_partitioned(
+                    os.path.join(self.tmpdir.name, "seg-tree"), START, START + timedelta(days=2), chunk=4)
+        finally:
+            set_store(previous)
+        self.assertEqual(table.num_rows, 6)
+        self.assertEqual(set(table.column("temperature").to_pylist()), {30.0})
+        self.assertEqual(sorted(written.values()), [6, 24])
+
+    # ---------------------------------------
+    # ✅ Test 4: Validation
+    # ---------------------------------------
+    def test_validation(self):
+        self.assertEqual(self.client.get("/api/history/export/parquet").status_code, 400)
+        res = self.client.get("/api/history/export/parquet",
+                              query_string={"date": "2025-03-01", "partition": "hour"})
+        self.assertEqual(res.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import json
+import unittest
+
+from backend.utils import payload_parsers as pp
+
+
+class PayloadParserTestCase(unittest.TestCase):
+    # ---------------------------------------
+    # ✅ Test 1: JSON aliases map onto canonical fields
+    # ---------------------------------------
+    def test_json_aliases(self):
+        data = pp.parse_json(b'{"Temp": "21.5", "h": 40, "press": null, "extra": 1}')
+        self.assertEqual(data, {"temperature": 21.5, "humidity": 40.0, "pressure": 0.0})
+
+    # ---------------------------------------
+    # ✅ Test 2: Relaxed JSON and garbage never raise
+    # ---------------------------------------
+    def test_relaxed_and_invalid(self):
+        self.assertEqual(pp.parse_json("{t: 20, h: 30, p: 1000}")["pressure"], 1000.0)
+        self.assertEqual(pp.parse_json(b"not json")["temperature"], 0.0)
+        self.assertEqual(pp.parse_json(b"[1, 2, 3]")["humidity"], 0.0)
+
+    # ---------------------------------------
+    # ✅ Test 3: Binary struct round-trip
+    # ---------------------------------------
+    def test_struct(self):
+        data = pp.parse_struct(pp.encode_struct(25.5, 60.25, 1013.0))
+        self.assertEqual(data, {"temperature": 25.5, "humidity": 60.25, "pressure": 1013.0})
+        self.assertEqual(pp.parse_struct(b"\x00\x01")["temperature"], 0.0)
+
+    # ---------------------------------------
+    # ✅ Test 4: CBOR (when cbor2 is installed) and format selection
+    # ---------------------------------------
+    def test_format_selection(self):
+        self.assertIs(pp.get_parser("struct"), pp.parse_struct)
+        self.assertIs(pp.get_parser("unknown"), pp.parse_json)
+        self.assertIs(pp.get_parser(None), pp.parse_json)
+        if pp.cbor2 is not None:
+            payload = pp.cbor2.dumps({"temperature": 19.0, "humidity": 45.0})
+            self.assertEqual(pp.parse_payload(payload, "cbor")["humidity"], 45.0)
+
+    # ---------------------------------------
+    # ✅ Test 5: Same results as the original JSON path
+    # ---------------------------------------
+    def test_matches_legacy_semantics(self):
+        payload = json.dumps({"temperature": 22.1, "humidity": "bad", "P": 999})
+        self.assertEqual(
+            pp.parse_json(payload),
+            {"temperature": 22.1, "humidity": 0.0, "pressure": 999.0},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from pytz import timezone
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models import Dashboard, DashboardWidget, Device, History, Permission, Role, Sensor, User
+from backend.utils.query_counter import count_queries
+
+INDIA_TZ = timezone("Asia/Kolkata")
+
+ENDPOINTS = [
+    "/api/sensors",
+    "/api/data/recent",
+    "/api/users/all",
+    "/api/dashboards/dashboards?user=admin",
+    "/api/dashboardbuilder/dashboards?user=admin",
+]
+
+
+class QueryCountTestCase(unittest.TestCase):
+    """Listing endpoints must issue the same number of statements for 2 rows or 20."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            admin = Role(name="admin")
+            perm = Permission(name="view")
+            admin.permissions.append(perm)
+            db.session.add_all([admin, perm, User(username="admin", password="x", roles=[admin])])
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _seed(self, n):
+        """n more devices, each with a sensor, a recent reading, a user and a dashboard with widgets."""
+        now = datetime.now(INDIA_TZ).replace(tzinfo=None)
+        with self.app.app_context():
+            admin = Role.query.filter_by(name="admin").one()
+            base = Device.query.count()
+            for i in range(base, base + n):
+                device = Device(name=f"dev-{i}")
+                user = User(username=f"user-{i}", password="x", roles=[admin], devices=[device])
+                dash = Dashboard(name=f"dash-{i}", owner=user)
+                db.session.add_all([device, user, dash])
+                db.session.flush()
+                db.session.add_all([
+                    Sensor(device_id=device.id, topic=f"t/{i}", temperature=20.0),
+                    History(device_id=device.id, temperature=20.0, timestamp=now),
+                    DashboardWidget(dashboard=dash, widget_type="gauge", device_id=device.id),
+                    DashboardWidget(dashboard=dash, widget_type="chart", device_id=device.id),
+                ])
+            db.session.commit()
+
+    def _counts(self):
+        counts = {}
+        with self.app.app_context():
+            for url in ENDPOINTS:
+                self.client.get(url)   # warm-up: connection + first-use queries
+                with count_queries(db.engine) as q:
+                    resp = self.client.get(url)
+                self.assertEqual(resp.status_code, 200, url)
+                counts[url] = (q.count, len(resp.get_json() if isinstance(resp.get_json(), list)
+                                            else next(v for v in resp.get_json().values() if isinstance(v, list))))
+        return counts
+
+    # ✅ Test 1: Statement count does not grow with the number of rows
+    def test_constant_query_count(self):
+        self._seed(2)
+        small = self._counts()
+        self._seed(18)
+        large = self._counts()
+        for url in ENDPOINTS:
+            self.assertGreater(large[url][1], small[url][1], url)
+            self.assertEqual(large[url][0], small[url][0], f"{url}: {small[url][0]} → {large[url][0]} statements")
+
+    # ✅ Test 2: The counter itself sees an N+1
+    def test_counter_detects_lazy_loads(self):
+        self._seed(5)
+        with self.app.app_context():
+            with count_queries(db.engine) as q:
+                for d in Dashboard.query.all():
+                    d.to_dict()
+            self.assertEqual(q.count, 1 + 5)
+            self.assertTrue(all(s.lstrip().upper().startswith("SELECT") for s in q.statements))
+
+    # ✅ Test 3: Payloads keep their shape
+    def test_payloads(self):
+        self._seed(3)
+        sensors = self.client.get("/api/sensors").get_json()
+        self.assertEqual({s["device_name"] for s in sensors}, {"dev-0", "dev-1", "dev-2"})
+        self.assertEqual({(s["name"], s["friendly_name"]) for s in sensors},
+                         {("t/0", None), ("t/1", None), ("t/2", None)})
+        recent = self.client.get("/api/data/recent").get_json()
+        self.assertEqual({r["device_name"] for r in recent}, {"dev-0", "dev-1", "dev-2"})
+        users = {u["username"]: u for u in self.client.get("/api/users/all").get_json()["users"]}
+        self.assertEqual(users["user-1"]["devices"], ["dev-1"])
+        self.assertEqual(users["user-1"]["roles"], ["admin"])
+        dashboards = self.client.get("/api/dashboardbuilder/dashboards?user=admin").get_json()
+        self.assertEqual(sorted(len(d["widgets"]) for d in dashboards), [2, 2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
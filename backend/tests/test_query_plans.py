@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+
+from backend import migrate
+from backend.app import create_app
+from backend.extensions import db
+from backend.utils.query_plans import check_engine, hot_queries
+
+
+class QueryPlanTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+        with self.app.app_context():
+            db.create_all()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    # ---------------------------------------
+    # ✅ Test 1: Model indexes cover every hot query
+    # ---------------------------------------
+    def test_models_have_no_full_scans(self):
+        with self.app.app_context():
+            self.assertEqual(check_engine(db.engine), {})
+
+    # ---------------------------------------
+    # ✅ Test 2: The SQL migrations create the same indexes
+    # ---------------------------------------
+    def test_migrations_have_no_full_scans(self):
+        path = os.path.join(self.tmpdir.name, "migrated.db")
+        with mock.patch.object(migrate, "INSTANCE_DIR", self.tmpdir.name), \
+                mock.patch.object(migrate, "DB_PATH", path):
+            migrate.migrate()
+
+        engine = create_engine(f"sqlite:///{path}")
+        try:
+            self.assertEqual(check_engine(engine), {})
+        finally:
+            engine.dispose()
+
+    # ---------------------------------------
+    # ✅ Test 3: The check actually catches a missing index
+    # ---------------------------------------
+    def test_detects_full_scan(self):
+        with self.app.app_context():
+            for name in ("ix_history_timestamp", "ix_history_device_ts"):
+                db.session.execute(db.text(f"DROP INDEX {name}"))
+            db.session.commit()
+            problems = check_engine(db.engine)
+
+        self.assertIn("history.list_7d", problems)
+        self.assertIn("data.recent", problems)
+        self.assertTrue(set(problems) <= set(hot_queries()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.ingest_service import Reading, write_readings
+from backend.models import Device, History, HistoryRollup, Role, Sensor, User
+from backend import retention_service
+from backend.utils import identity_cache
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+class RetentionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+
+        with self.app.app_context():
+            db.create_all()
+            device = Device(name="ret-a")
+            db.session.add(device)
+            db.session.commit()
+            self.device_id = device.id
+
+            # 60 days back, one reading every 30 minutes (48/day)
+            readings = [
+                Reading(device.id, "t", None, 21.0, 50.0, 1000.0, NOW - timedelta(minutes=30 * i))
+                for i in range(60 * 48)
+            ]
+            write_readings(readings)
+            db.session.add_all([
+                Sensor(device_id=device.id, topic="t", payload="{}", temperature=1.0,
+                       timestamp=NOW - timedelta(days=d))
+                for d in (1, 40, 50)
+            ])
+            db.session.commit()
+
+    def tearDown(self):
+        identity_cache.invalidate_all()     # tokens of this database's users
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _counts(self):
+        return {
+            "history": History.query.count(),
+            "sensors": Sensor.query.count(),
+            "1m": HistoryRollup.query.filter_by(resolution="1m").count(),
+            "1d": HistoryRollup.query.filter_by(resolution="1d").count(),
+        }
+
+    # ---------------------------------------
+    # ✅ Test 1: Policies purge in bounded batches; rollups outlive raw rows
+    # ---------------------------------------
+    def test_batched_purge_per_policy(self):
+        with self.app.app_context():
+            before = self._counts()
+            policies = retention_service.default_policies()
+            policies = [p._replace(days={"history": 30, "rollups_1m": 10}.get(p.name, 730))
+                        for p in policies]
+
+            dry = retention_service.run_retention(policies, now=NOW, dry_run=True, batch_size=100, pause=0)
+            self.assertEqual(self._counts(), before)
+
+            report = retention_service.run_retention(policies, now=NOW, batch_size=100, pause=0)
+            after = self._counts()
+
+        history = report["tables"]["history"]
+        # readings strictly older than 30 days: i > 1440
+        self.assertEqual(history["purged"], 60 * 48 - 1441)
+        self.assertEqual(dry["tables"]["history"]["purged"], history["purged"])
+        self.assertEqual(history["batches"], 15)
+        self.assertEqual(after["history"], 1441)
+        # configured sensors are never aged out
+        self.assertNotIn("sensors", report["tables"])
+        self.assertEqual(after["sensors"], before["sensors"])
+        # minute rollups trimmed to 10 days, daily rollups untouched
+        self.assertLess(after["1m"], before["1m"] / 5)
+        self.assertEqual(after["1d"], before["1d"])
+        self.assertEqual(report["purged_total"], before["history"] + before["1m"] - after["history"] - after["1m"])
+        self.assertIsNotNone(report["db_bytes_after"])
+        self.assertEqual(retention_service.get_last_report(), report)
+
+    # ---------------------------------------
+    # ✅ Test 2: Incremental vacuum shrinks the file (new DBs start incremental)
+    # ---------------------------------------
+    def test_incremental_vacuum(self):
+        with self.app.app_context():
+            History.query.delete()
+            db.session.commit()
+            report = retention_service.run_retention(now=NOW, pause=0)
+            self.assertEqual(report["vacuum"]["mode"], "incremental")
+            self.assertGreater(report["vacuum"]["pages_freed"], 0)
+            self.assertEqual(report["vacuum"]["free_pages"], 0)
+            self.assertLess(report["db_bytes_after"], report["db_bytes_before"])
+
+            # databases created before the tuning profile: nothing until enabled
+            with db.engine.connect() as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("PRAGMA auto_vacuum = NONE")
+                conn.exec_driver_sql("VACUUM")
+            HistoryRollup.query.delete()
+            db.session.commit()
+            report = retention_service.run_retention(now=NOW, pause=0)
+            self.assertEqual(report["vacuum"]["mode"], "none")
+            self.assertEqual(report["vacuum"]["pages_freed"], 0)
+
+            retention_service.enable_incremental_vacuum()
+            report = retention_service.run_retention(now=NOW, pause=0)
+            self.assertEqual(report["vacuum"]["mode"], "incremental")
+
+    # ---------------------------------------
+    # ✅ Test 3: Opt-in defaults; endpoints are admin-only
+    # ---------------------------------------
+    def test_defaults_and_endpoints(self):
+        with self.app.app_context():
+            report = retention_service.run_retention(now=NOW, pause=0)
+            self.assertEqual(report["tables"]["history"]["purged"], 0)     # kept forever by default
+            retention_service.start_retention(self.app)
+            self.assertIsNone(retention_service._thread)                   # job off unless enabled
+
+            db.session.add_all([
+                User(username="root", password="pw", roles=[Role(name="admin")]),
+                User(username="guest", password="pw", roles=[Role(name="user")]),
+            ])
+            db.session.commit()
+
+        client = self.app.test_client()
+
+        def auth(username):
+            token = client.post("/api/auth/login", json={"username": username, "password": "pw"}).get_json()["token"]
+            return {"Authorization": f"Bearer {token}"}
+
+        self.assertEqual(client.post("/api/system/retention/run").status_code, 401)
+        self.assertEqual(client.post("/api/system/retention/run", headers=auth("guest")).status_code, 403)
+        res = client.post("/api/system/retention/run?dry_run=1", headers=auth("root"))
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.get_json()["dry_run"])
+
+        data = client.get("/api/system/retention", headers=auth("root")).get_json()
+        self.assertEqual([p["name"] for p in data["policies"]], ["history", "rollups_1m", "rollups_1h", "rollups_1d"])
+        self.assertTrue(data["last_run"]["dry_run"])
+
+    # ---------------------------------------
+    # ✅ Test 4: Default "now" is India wall time, not the host's local clock
+    # ---------------------------------------
+    def test_cutoff_uses_india_wall_time(self):
+        class UtcHostClock(datetime):
+            """A host running on UTC at the instant NOW is in India."""
+            @classmethod
+            def now(cls, tz=None):
+                instant = datetime(2025, 6, 1, 6, 30, tzinfo=timezone.utc)
+                return instant.astimezone(tz) if tz else instant.replace(tzinfo=None)
+
+        with self.app.app_context(), mock.patch.object(retention_service, "datetime", UtcHostClock):
+            policies = [p._replace(days=30 if p.name == "history" else 0)
+                        for p in retention_service.default_policies()]
+            report = retention_service.run_retention(policies, batch_size=1000, pause=0)
+
+        history = report["tables"]["history"]
+        self.assertEqual(report["started_at"], NOW.isoformat())
+        self.assertEqual(history["cutoff"], (NOW - timedelta(days=30)).isoformat())
+        self.assertEqual(history["purged"], 60 * 48 - 1441)
+
+
+if __name__ == "__main__":
+    unittest.main()
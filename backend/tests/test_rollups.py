@@ -0,0 +1,169 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from pytz import timezone
+
+from backend.app import create_app
+from backend.config import Config
+from backend.extensions import db
+from backend.models import Device, History, HistoryRollup
+from backend.ingest_service import Reading, write_readings
+from backend.rollup_service import choose_resolution, rebuild_rollups
+
+START = datetime(2025, 1, 1, 10, 0, 0)
+INDIA_TZ = timezone("Asia/Kolkata")
+
+
+class RollupTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+
+        with self.app.app_context():
+            db.create_all()
+            device = Device(name="Rollup Device")
+            db.session.add(device)
+            db.session.commit()
+            self.device_id = device.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _ingest(self, seconds, step=10, batch=50):
+        readings = [
+            Reading(self.device_id, "t", None, 20.0 + (i % 7), 50.0, 1000.0 + i % 3,
+                    START + timedelta(seconds=i))
+            for i in range(0, seconds, step)
+        ]
+        with self.app.app_context():
+            for i in range(0, len(readings), batch):
+                write_readings(readings[i:i + batch])
+                db.session.commit()
+        return readings
+
+    def _rollups(self, resolution):
+        return {
+            r.bucket: r
+            for r in HistoryRollup.query.filter_by(resolution=resolution).all()
+        }
+
+    # ---------------------------------------
+    # ✅ Test 1: Ingest keeps 1m / 1h / 1d buckets in step across batches
+    # ---------------------------------------
+    def test_incremental_rollups_match_history(self):
+        readings = self._ingest(2 * 3600, step=10, batch=37)  # odd batches split buckets
+
+        with self.app.app_context():
+            minutes = self._rollups("1m")
+            hours = self._rollups("1h")
+            days = self._rollups("1d")
+
+            self.assertEqual(len(minutes), 120)
+            self.assertEqual(len(hours), 2)
+            self.assertEqual(len(days), 1)
+
+            day = days[datetime(2025, 1, 1)]
+            self.assertEqual(day.count, len(readings))
+            self.assertEqual(day.count, History.query.count())
+            self.assertEqual(day.temp_min, 20.0)
+            self.assertEqual(day.temp_max, 26.0)
+            self.assertAlmostEqual(day.temp_sum, sum(r.temperature for r in readings))
+
+            first_minute = minutes[START]
+            self.assertEqual(first_minute.count, 6)
+            self.assertEqual(sum(h.count for h in hours.values()), len(readings))
+
+            # rebuild from History (time order, committed per chunk) reproduces the
+            # incremental result — including a late reading with the highest id
+            write_readings([Reading(self.device_id, "t", None, 19.0, 50.0, 1000.0, START + timedelta(seconds=31))])
+            db.session.commit()
+            before = {(r.resolution, r.bucket): (r.count, r.temp_sum) for r in HistoryRollup.query}
+            rebuild_rollups(chunk=100)
+            after = {(r.resolution, r.bucket): (r.count, r.temp_sum) for r in HistoryRollup.query}
+            self.assertEqual(before.keys(), after.keys())
+            for key in before:
+                self.assertEqual(before[key][0], after[key][0])
+                self.assertAlmostEqual(before[key][1], after[key][1])
+
+    # ---------------------------------------
+    # ✅ Test 2: Coarsest resolution that still satisfies the point count
+    # ---------------------------------------
+    def test_choose_resolution(self):
+        week = (START, START + timedelta(days=7))
+        self.assertEqual(choose_resolution(*week, points=7), "1d")
+        self.assertEqual(choose_resolution(*week, points=100), "1h")
+        self.assertEqual(choose_resolution(*week, points=500), "1m")
+        self.assertIsNone(choose_resolution(START, START + timedelta(minutes=30), points=500))
+
+    # ---------------------------------------
+    # ✅ Test 3: Range endpoint + 7-day listing come from rollups
+    # ---------------------------------------
+    def test_history_endpoints(self):
+        self._ingest(3 * 3600, step=30)
+        client = self.app.test_client()
+
+        res = client.get(
+            f"/api/history/rollups?device_id={self.device_id}"
+            f"&from={START.isoformat()}&to={(START + timedelta(hours=3)).isoformat()}&points=3"
+        ).json
+        self.assertEqual(res["resolution"], "1h")
+        self.assertEqual(res["count"], 3)
+        self.assertEqual(res["data"][0]["count"], 120)
+
+        res = client.get(
+            f"/api/history/rollups?from={START.isoformat()}"
+            f"&to={(START + timedelta(minutes=5)).isoformat()}&points=100"
+        ).json
+        self.assertEqual(res["resolution"], "raw")
+        self.assertEqual(res["count"], 10)
+
+        bad = client.get("/api/history/rollups?from=2025-01-02&to=2025-01-01")
+        self.assertEqual(bad.status_code, 400)
+
+        now = datetime.now(INDIA_TZ)
+        with self.app.app_context():
+            write_readings([Reading(self.device_id, "t", None, 25.0, 50.0, 1000.0, now)])
+            db.session.commit()
+        listing = client.get("/api/history/").json["data"]
+        self.assertEqual(list(listing), [now.strftime("%Y-%m-%d")])  # 2025 data is outside 7 days
+        self.assertEqual(listing[now.strftime("%Y-%m-%d")][0]["count"], 1)
+
+    # ---------------------------------------
+    # ✅ Test 4: Raw reads on the range endpoint stay inside the row budget
+    # ---------------------------------------
+    def test_raw_row_budget(self):
+        self._ingest(3 * 3600, step=30)                    # 360 readings
+        client = self.app.test_client()
+        window = f"from={START.isoformat()}&to={(START + timedelta(hours=3)).isoformat()}"
+
+        budget = Config.SERIES_MAX_SOURCE_ROWS
+        Config.SERIES_MAX_SOURCE_ROWS = 200
+        try:
+            # too short for a rollup by points, too many rows for raw → 1m buckets
+            res = client.get(f"/api/history/rollups?{window}&points=500").json
+            self.assertEqual(res["resolution"], "1m")
+            self.assertEqual(res["count"], 180)
+
+            forced = client.get(f"/api/history/rollups?{window}&resolution=raw")
+            self.assertEqual(forced.status_code, 400)
+            self.assertIn("limit 200", forced.json["message"])
+
+            small = client.get(
+                f"/api/history/rollups?from={START.isoformat()}"
+                f"&to={(START + timedelta(minutes=30)).isoformat()}&resolution=raw"
+            ).json
+            self.assertEqual((small["resolution"], small["count"]), ("raw", 60))
+        finally:
+            Config.SERIES_MAX_SOURCE_ROWS = budget
+
+
+if __name__ == "__main__":
+    unittest.main()
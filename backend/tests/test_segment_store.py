@@ -0,0 +1,148 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.ingest_service import Reading
+from backend.models import HistoryRollup
+from backend.rollup_service import rebuild_rollups
+from backend.timeseries import set_store
+from backend.timeseries.segment_store import INDEX, SegmentStore, to_ms
+
+START = datetime(2025, 3, 1)
+
+
+def _readings(device_id, seconds):
+    return [Reading(device_id, "t", None, 20.0 + s % 7, None if s % 5 == 0 else 50.0, 1000.0,
+                    START + timedelta(seconds=s)) for s in seconds]
+
+
+class SegmentStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        # rollups go to history_rollups, so appends need a database too
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmp, 'test.db')}"
+        self.app = create_app()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        # tiny stride so a few dozen rows span several index blocks
+        self.store = SegmentStore(os.path.join(self.tmp, "segments"), index_stride=4)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.ctx.pop()
+        os.environ.pop("DATABASE_URL", None)
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _append(self, readings):
+        self.store.append_batch(readings)
+        db.session.commit()
+
+    # ✅ Test 1: Sparse index grows with appends and range cuts land on exact rows
+    def test_index_lookup(self):
+        for chunk in range(0, 60, 7):   # uneven batches straddle stride boundaries
+            self._append(_readings(1, range(chunk * 10, min(chunk + 7, 60) * 10, 10)))
+
+        day = START.strftime("%Y-%m-%d")
+        index = np.fromfile(self.store._path(1, day, ".idx"), dtype=INDEX)
+        data, _ = self.store._open(1, day)
+        self.assertIsInstance(data, np.memmap)
+        self.assertEqual(len(data), 60)
+        np.testing.assert_array_equal(index, np.asarray(data["ts"][::4]))
+
+        for lo, hi in [(0, 600), (35, 125), (40, 41), (41, 49), (590, 900)]:
+            rows = self.store.read(1, to_ms(START + timedelta(seconds=lo)), to_ms(START + timedelta(seconds=hi)))
+            expected = [s for s in range(0, 600, 10) if lo <= s < hi]
+            self.assertEqual([(int(t) - to_ms(START)) // 1000 for t in rows["ts"]], expected)
+
+    # ✅ Test 2: Late readings rewrite the segment sorted and rebuild its index
+    def test_out_of_order_append(self):
+        self._append(_readings(1, range(100, 200, 10)))
+        self.store.read(1)   # map is cached before the rewrite
+        self._append(_readings(1, [5, 155, 300]))
+
+        data = self.store.read(1)
+        self.assertEqual(len(data), 13)
+        self.assertTrue((np.diff(data["ts"]) >= 0).all())
+        index = np.fromfile(self.store._path(1, START.strftime("%Y-%m-%d"), ".idx"), dtype=INDEX)
+        np.testing.assert_array_equal(index, data["ts"][::4])
+        self.assertEqual(self.store.latest()[1].timestamp, START + timedelta(seconds=300))
+        self.assertEqual(self.store.count(1, START, START + timedelta(seconds=101)), 2)
+        self.assertIsNone(self.store.range(START, START + timedelta(seconds=6))[0].humidity)
+
+    # ✅ Test 3: purge_before drops whole day files (and honours dry runs)
+    def test_purge_before(self):
+        for day in range(3):
+            self._append(_readings(2, range(day * 86400, day * 86400 + 50, 10)))
+        cutoff = START + timedelta(days=2, hours=6)
+
+        self.assertEqual(self.store.purge_before(cutoff, dry_run=True), 10)
+        self.assertEqual(len(self.store.days(2)), 3)
+        self.assertEqual(self.store.purge_before(cutoff), 10)
+        self.assertEqual(self.store.days(2), [(START + timedelta(days=2)).strftime("%Y-%m-%d")])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.store.root, "2"))), ["2025-03-03.idx", "2025-03-03.seg"])
+        self.assertEqual(self.store.count(2, START, cutoff), 5)
+
+    # ✅ Test 4: scan() streams chunk-sized blocks merged across devices and days
+    def test_scan_streams(self):
+        self._append(_readings(1, range(0, 2 * 86400, 3600)))          # 48 rows, 2 days
+        self._append(_readings(2, range(1800, 2 * 86400, 7200)))       # 24 rows, offset
+        end = START + timedelta(days=2)
+
+        blocks = list(self.store._stream(START, end, None, 10))
+        self.assertEqual([len(d) for _, d in blocks], [10] * 7 + [2])
+        merged = [(int(t), int(d)) for dev, data in blocks for d, t in zip(dev, data["ts"])]
+        self.assertEqual(merged, sorted(merged))
+        self.assertEqual([(r.device_id, r.timestamp) for c in self.store.scan(START, end, chunk=10) for r in c],
+                         [(r.device_id, r.timestamp) for r in self.store.range(START, end)])
+
+        # lazy: the first block needs only the first view of each device, not the range
+        pulled = []
+        chunks = self.store._device_chunks
+        self.store._device_chunks = lambda *a: (pulled.append(len(c)) or c for c in chunks(*a))
+        first = next(self.store._stream(START, end, None, 10))
+        self.assertEqual(len(first[1]), 10)
+        self.assertLessEqual(len(pulled), 4)
+
+    # ✅ Test 5: Files are written on COMMIT only; aggregates come from history_rollups
+    def test_transaction_and_rollups(self):
+        self.store.append_batch(_readings(3, range(0, 600, 10)))
+        db.session.rollback()
+        self.assertEqual(self.store.devices(), [])
+        self.assertEqual(HistoryRollup.query.count(), 0)
+
+        self.store.append_batch(_readings(3, range(0, 7200, 10)))         # 720 rows, 2 hours
+        self.assertEqual(self.store.devices(), [])                        # nothing before COMMIT
+        db.session.commit()
+        self.assertEqual(self.store.count(3, START, START + timedelta(hours=2)), 720)
+
+        hours = self.store.aggregate(START, START + timedelta(hours=2), "1h")
+        self.assertEqual([r["count"] for r in hours], [360, 360])
+        self.assertEqual(hours[0]["temperature_max"], 26.0)
+        minutes = self.store.columns(3, START, START + timedelta(hours=2), ["humidity"], "1m")
+        self.assertEqual(len(minutes["t"]), 120)
+
+        # answered from the rollup table, not by scanning the raw segments
+        self.store.read = None
+        self.assertEqual(len(self.store.aggregate(START, START + timedelta(days=1), "1d")), 1)
+        del self.store.read
+
+        # and rebuilt from the segment files when the rollups are recomputed
+        previous = set_store(self.store)
+        try:
+            rebuild_rollups(chunk=100)
+        finally:
+            set_store(previous)
+        self.assertEqual(self.store.aggregate(START, START + timedelta(hours=2), "1h"), hours)
+
+
+if __name__ == "__main__":
+    unittest.main()
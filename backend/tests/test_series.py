@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+
+from backend.app import create_app
+from backend.config import Config
+from backend.extensions import db
+from backend.models import Device
+from backend.ingest_service import Reading, write_readings
+from backend.utils.downsample import lttb, minmax
+
+START = datetime(2025, 1, 1, 0, 0, 0)
+
+
+class DownsampleTestCase(unittest.TestCase):
+    # ---------------------------------------
+    # ✅ Test 1: LTTB keeps endpoints and the obvious peak
+    # ---------------------------------------
+    def test_lttb(self):
+        x = np.arange(10000, dtype=float)
+        y = np.zeros(10000)
+        y[4321] = 50.0
+        idx = lttb(x, y, 100)
+
+        self.assertEqual(len(idx), 100)
+        self.assertEqual((idx[0], idx[-1]), (0, 9999))
+        self.assertIn(4321, idx)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+        self.assertEqual(len(lttb(x[:50], y[:50], 100)), 50)
+
+    # ---------------------------------------
+    # ✅ Test 2: Min/max bucketing never drops an extreme
+    # ---------------------------------------
+    def test_minmax(self):
+        rng = np.random.default_rng(7)
+        y = rng.normal(size=20000)
+        y[1234], y[17777] = 99.0, -99.0
+        idx = minmax(np.arange(20000), y, 200)
+
+        self.assertLessEqual(len(idx), 200)
+        self.assertIn(1234, idx)
+        self.assertIn(17777, idx)
+        self.assertTrue(np.all(np.diff(idx) > 0))
+
+
+class SeriesEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+
+        with self.app.app_context():
+            db.create_all()
+            device = Device(name="Series Device")
+            db.session.add(device)
+            db.session.commit()
+            self.device_id = device.id
+
+            # two days at one reading per 10 s, with one spike
+            readings = [
+                Reading(self.device_id, "t", None, 99.0 if i == 5000 else 20.0 + (i % 60) / 10,
+                        50.0, 1000.0, START + timedelta(seconds=10 * i))
+                for i in range(2 * 8640)
+            ]
+            for i in range(0, len(readings), 500):
+                write_readings(readings[i:i + 500])
+            db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _series(self, **params):
+        query = {"device_id": self.device_id, "from": START.isoformat(),
+                 "to": (START + timedelta(days=2)).isoformat(), **params}
+        return self.client.get("/api/history/series", query_string=query)
+
+    # ---------------------------------------
+    # ✅ Test 3: Raw source within budget, at most N points
+    # ---------------------------------------
+    def test_raw_source(self):
+        res = self._series(points=300, fields="temperature").json
+        self.assertEqual(res["source"], "raw")
+        self.assertEqual(res["source_rows"], 2 * 8640)
+
+        pts = res["series"]["temperature"]
+        self.assertEqual(len(pts), 300)
+        self.assertIn(99.0, [v for _, v in pts])
+        # epoch ms in UTC: India midnight is 18:30 the previous day
+        self.assertEqual(pts[0][0], (datetime(2024, 12, 31, 18, 30) - datetime(1970, 1, 1))
+                         // timedelta(milliseconds=1))
+
+    # ---------------------------------------
+    # ✅ Test 4: Over budget → rollups, min/max keeps the spike
+    # ---------------------------------------
+    def test_rollup_source_when_over_budget(self):
+        with mock.patch.object(Config, "SERIES_MAX_SOURCE_ROWS", 5000):
+            res = self._series(points=200, method="minmax").json
+
+        self.assertEqual(res["source"], "1m")
+        self.assertEqual(res["source_rows"], 2 * 1440)
+        self.assertLessEqual(len(res["series"]["temperature"]), 200)
+        self.assertIn(99.0, [v for _, v in res["series"]["temperature"]])
+        self.assertEqual(set(res["series"]), {"temperature", "humidity", "pressure"})
+
+    # ---------------------------------------
+    # ✅ Test 5: Validation
+    # ---------------------------------------
+    def test_validation(self):
+        self.assertEqual(self.client.get("/api/history/series").status_code, 400)
+        self.assertEqual(self._series(method="avg").status_code, 400)
+        self.assertEqual(self._series(fields="voltage").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+
+from backend.app import create_app
+from backend.extensions import db, socketio
+from backend.models import Dashboard, DashboardWidget, Device, User
+from backend.broadcast_service import BroadcastScheduler
+from backend.utils.socket_rooms import ROOM_ALL, room_occupied
+
+
+def _payload(device_id, temperature=21.0):
+    return {
+        "device_id": device_id,
+        "device_name": f"dev-{device_id}",
+        "temperature": temperature,
+        "humidity": 50.0,
+        "pressure": 1000.0,
+        "status": "online",
+        "timestamp": "2025-01-01T00:00:00+05:30",
+        "devices_online": 1,
+    }
+
+
+def _batch_ids(received):
+    ids = []
+    for m in received:
+        if m["name"] == "sensor_batch":
+            ids.extend(r["device_id"] for r in m["args"][0]["readings"])
+    return sorted(ids)
+
+
+class SocketRoomsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+
+        with self.app.app_context():
+            db.create_all()
+            owner = User(username="owner", password="x")
+            devices = [Device(name=f"dev-{i}") for i in (1, 2, 3)]
+            db.session.add_all([owner, *devices])
+            db.session.flush()
+            dash = Dashboard(name="Plant", owner_id=owner.id)
+            db.session.add(dash)
+            db.session.flush()
+            db.session.add_all([
+                DashboardWidget(dashboard_id=dash.id, widget_type="gauge", device_id=devices[1].id),
+                DashboardWidget(dashboard_id=dash.id, widget_type="chart", device_id=devices[2].id),
+            ])
+            db.session.commit()
+            self.dashboard_id = dash.id
+
+        self.clients = []
+
+    def tearDown(self):
+        for c in self.clients:
+            if c.is_connected():
+                c.disconnect()
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    def _client(self):
+        c = socketio.test_client(self.app)
+        c.get_received()
+        self.clients.append(c)
+        return c
+
+    def _flush_all(self, sched):
+        for device_id in (1, 2, 3):
+            sched.publish(_payload(device_id))
+        sched.flush()
+
+    # ---------------------------------------
+    # ✅ Test 1: Unsubscribed clients keep receiving everything
+    # ---------------------------------------
+    def test_default_room_receives_all(self):
+        legacy = self._client()
+        self._flush_all(BroadcastScheduler(hz=10, legacy_events=[]))
+        self.assertEqual(_batch_ids(legacy.get_received()), [1, 2, 3])
+
+    # ---------------------------------------
+    # ✅ Test 2: Device / dashboard subscribers only get their devices
+    # ---------------------------------------
+    def test_subscriptions_scope_traffic(self):
+        legacy = self._client()
+        one = self._client()
+        dash = self._client()
+
+        ack = one.emit("subscribe", {"devices": [1]}, callback=True)
+        self.assertEqual(ack["rooms"], ["device:1"])
+        ack = dash.emit("subscribe", {"dashboards": [self.dashboard_id]}, callback=True)
+        self.assertEqual(ack["rooms"], sorted(["device:2", "device:3", f"dashboard:{self.dashboard_id}"]))
+
+        self._flush_all(BroadcastScheduler(hz=10, legacy_events=[]))
+        self.assertEqual(_batch_ids(legacy.get_received()), [1, 2, 3])
+        self.assertEqual(_batch_ids(one.get_received()), [1])
+        self.assertEqual(_batch_ids(dash.get_received()), [2, 3])
+
+        # Dropping the last subscription falls back to the firehose
+        ack = one.emit("unsubscribe", {"devices": [1]}, callback=True)
+        self.assertEqual(ack["rooms"], [ROOM_ALL])
+
+    # ---------------------------------------
+    # ✅ Test 3: Nobody listening → nothing encoded or sent
+    # ---------------------------------------
+    def test_empty_rooms_are_skipped(self):
+        only = self._client()
+        only.emit("subscribe", {"devices": [1]}, callback=True)
+        self.assertFalse(room_occupied(ROOM_ALL))
+
+        sched = BroadcastScheduler(hz=10, legacy_events=[])
+        sched.publish(_payload(2))
+        sched.publish(_payload(3))
+        self.assertEqual(sched.flush(), 0)
+        self.assertEqual(only.get_received(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from collections import deque
+from unittest import mock
+
+from backend.app import create_app
+from backend.config import Config
+from backend.extensions import db
+from backend.models import Device
+from backend.utils import sql_metrics
+from backend.tests.helpers import admin_headers
+
+
+class SqlMetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.create_all()
+            db.session.add_all([Device(name=f"dev-{i}") for i in range(3)])
+            db.session.commit()
+        sql_metrics.reset()
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+        sql_metrics.reset()
+
+    def _route(self, key):
+        return next(r for r in sql_metrics.get_sql_stats()["routes"] if r["route"] == key)
+
+    # ✅ Test 1: Statements and DB time are booked per route (and echoed in headers)
+    def test_per_route_stats(self):
+        for _ in range(3):
+            resp = self.client.get("/api/sensors")
+        stats = self._route("GET /api/sensors")
+        self.assertEqual(stats["requests"], 3)
+        self.assertGreaterEqual(stats["statements"], 3)
+        self.assertEqual(stats["statements"], 3 * int(resp.headers["X-DB-Statements"]))
+        self.assertGreater(stats["db_ms"], 0)
+        self.assertTrue(stats["slowest_statement"].startswith("SELECT sensors.id"))
+        self.assertEqual(sql_metrics.get_sql_stats()["slow_queries"], [])
+
+    # ✅ Test 2: Slow statements land in a bounded ring buffer with their route
+    def test_slow_query_log(self):
+        with mock.patch.object(Config, "SQL_SLOW_QUERY_MS", 0), \
+                mock.patch.object(sql_metrics, "_slow", deque(maxlen=3)):
+            for _ in range(2):
+                self.client.get("/api/sensors")
+            with self.app.app_context():
+                db.session.execute(db.select(Device)).all()   # outside a request
+                db.session.remove()
+            stats = sql_metrics.get_sql_stats()
+
+        self.assertEqual(len(stats["slow_queries"]), 3)
+        self.assertGreaterEqual(stats["slow_total"], 3)
+        self.assertEqual(stats["slow_queries"][0]["route"], sql_metrics.BACKGROUND)
+        self.assertEqual(stats["slow_queries"][-1]["route"], "GET /api/sensors")
+        self.assertEqual(self._route(sql_metrics.BACKGROUND)["requests"], 0)
+
+    # ✅ Test 3: Admin endpoints — JSON, Prometheus text, reset
+    def test_endpoints(self):
+        self.assertEqual(self.client.get("/api/system/sql").status_code, 401)
+        self.assertEqual(self.client.delete("/api/system/sql").status_code, 401)
+        admin = admin_headers(self.app)
+        self.client.get("/api/sensors")
+        data = self.client.get("/api/system/sql?top=1", headers=admin).get_json()
+        self.assertEqual(len(data["routes"]), 1)
+
+        resp = self.client.get("/api/system/sql/metrics", headers=admin)
+        self.assertTrue(resp.content_type.startswith("text/plain"))
+        text = resp.get_data(as_text=True)
+        self.assertIn("# TYPE franc_sql_statements_total counter", text)
+        self.assertIn('franc_sql_requests_total{route="GET /api/sensors"} 1', text)
+
+        self.client.delete("/api/system/sql", headers=admin)
+        self.assertEqual(sql_metrics.get_sql_stats()["slow_total"], 0)
+        self.assertNotIn("GET /api/sensors",
+                         self.client.get("/api/system/sql/metrics", headers=admin).get_data(as_text=True))
+
+    # ✅ Test 4: A failing statement does not leave its start time on the connection
+    def test_failed_statement(self):
+        with self.app.app_context():
+            with db.engine.connect() as conn:
+                for _ in range(3):
+                    with self.assertRaises(Exception):
+                        conn.exec_driver_sql("SELECT * FROM no_such_table")
+                self.assertEqual(conn.info.get("_sql_metrics_start"), [])
+                with mock.patch.object(Config, "SQL_SLOW_QUERY_MS", 0):
+                    conn.exec_driver_sql("SELECT 1").all()
+                self.assertEqual(conn.info.get("_sql_metrics_start"), [])
+        self.assertEqual(sql_metrics.get_sql_stats()["slow_queries"][0]["statement"], "SELECT 1")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from backend.app import create_app
+from backend.config import Config
+from backend.extensions import db
+from backend.utils import sqlite_tuning
+from backend.tests.helpers import admin_headers
+
+
+class SqliteTuningTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self._profile = Config.SQLITE_PROFILE
+
+    def tearDown(self):
+        Config.SQLITE_PROFILE = self._profile
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    # ---------------------------------------
+    # ✅ Test 1: Balanced profile is applied to every connection
+    # ---------------------------------------
+    def test_balanced_profile(self):
+        Config.SQLITE_PROFILE = "balanced"
+        self.app = create_app()
+        with self.app.app_context():
+            db.create_all()
+        data = self.app.test_client().get("/api/system/sqlite", headers=admin_headers(self.app)).get_json()
+
+        self.assertEqual(data["journal_mode"], "wal")
+        self.assertEqual(data["synchronous"], 1)      # NORMAL
+        self.assertEqual(data["busy_timeout"], 5000)
+        self.assertEqual(data["temp_store"], 2)       # MEMORY
+        self.assertEqual(data["auto_vacuum"], 2)      # INCREMENTAL
+        self.assertEqual(data["cache_size"], -65536)
+
+    # ---------------------------------------
+    # ✅ Test 2: "default" leaves SQLite's own settings alone
+    # ---------------------------------------
+    def test_default_profile(self):
+        Config.SQLITE_PROFILE = "default"
+        self.app = create_app()
+        with self.app.app_context(), db.engine.connect() as conn:
+            pragmas = sqlite_tuning.current(conn)
+        self.assertEqual(pragmas["journal_mode"], "delete")
+        self.assertEqual(pragmas["synchronous"], 2)   # FULL
+
+    # ---------------------------------------
+    # ✅ Test 3: Overrides merge on top; bad names are rejected
+    # ---------------------------------------
+    def test_resolve(self):
+        self.app = create_app()
+        pragmas = sqlite_tuning.resolve("balanced", sqlite_tuning.parse_overrides("mmap_size=0, synchronous=FULL"))
+        self.assertEqual(pragmas["mmap_size"], "0")
+        self.assertEqual(pragmas["synchronous"], "FULL")
+        self.assertEqual(list(pragmas)[:2], ["auto_vacuum", "journal_mode"])
+        with self.assertRaises(ValueError):
+            sqlite_tuning.resolve("turbo", {})
+        with self.assertRaises(ValueError):
+            sqlite_tuning.parse_overrides("locking_mode=EXCLUSIVE")
+
+
+if __name__ == "__main__":
+    unittest.main()
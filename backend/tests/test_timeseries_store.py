@@ -0,0 +1,161 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.ingest_service import Reading
+from backend.models import Device
+from backend.timeseries import SegmentStore, SqlStore, set_store
+
+START = datetime(2025, 4, 1)
+
+
+class StoreConformance:
+    """Behaviour every TimeSeriesStore must share; subclasses provide make_store()."""
+
+    def make_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(self.tmpdir.name, 'test.db')}"
+        self.app = create_app()
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        devices = [Device(name="ts-a"), Device(name="ts-b")]
+        db.session.add_all(devices)
+        db.session.commit()
+        self.a, self.b = (d.id for d in devices)
+
+        self.store = self.make_store()
+        self.previous = set_store(self.store)
+        # 3 hours, a reading every 10 minutes per device; device b late and out of order
+        readings = [Reading(self.a, "t", None, 20.0 + i % 4, 50.0, 1000.0, START + timedelta(minutes=10 * i))
+                    for i in range(18)]
+        readings += [Reading(self.b, "t", None, 30.5, None if i == 0 else 60.25, 990.0,
+                             START + timedelta(minutes=10 * i + 5)) for i in reversed(range(6))]
+        self.store.append_batch(readings[:10])
+        self.store.append_batch(readings[10:])
+        db.session.commit()
+
+    def tearDown(self):
+        set_store(self.previous)
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.ctx.pop()
+        os.environ.pop("DATABASE_URL", None)
+        self.tmpdir.cleanup()
+
+    # ---------------------------------------
+    # ✅ Test 1: latest() is the newest reading per device
+    # ---------------------------------------
+    def test_latest(self):
+        latest = self.store.latest()
+        self.assertEqual(set(latest), {self.a, self.b})
+        self.assertEqual(latest[self.a].timestamp, START + timedelta(minutes=170))
+        self.assertEqual(latest[self.a].temperature, 21.0)
+        self.assertEqual(latest[self.b].timestamp, START + timedelta(minutes=55))
+        self.assertEqual(list(self.store.latest([self.b])), [self.b])
+
+    # ---------------------------------------
+    # ✅ Test 2: range() — half-open bounds, filters, ordering, limit
+    # ---------------------------------------
+    def test_range(self):
+        rows = self.store.range(START, START + timedelta(hours=1))
+        self.assertEqual(len(rows), 12)
+        self.assertEqual([r.timestamp for r in rows], sorted(r.timestamp for r in rows))
+        self.assertEqual(rows[0].device_id, self.a)
+        self.assertEqual(rows[1].device_id, self.b)
+        self.assertIsNone(rows[1].humidity)
+        self.assertEqual(rows[3].humidity, 60.25)
+
+        only_b = self.store.range(START, START + timedelta(hours=3), [self.b])
+        self.assertEqual({r.device_id for r in only_b}, {self.b})
+        self.assertEqual(len(only_b), 6)
+
+        newest = self.store.range(limit=3, newest_first=True)
+        self.assertEqual([r.timestamp for r in newest],
+                         [START + timedelta(minutes=m) for m in (170, 160, 150)])
+        self.assertEqual(len(self.store.range(START + timedelta(hours=2), None)), 6)
+        self.assertEqual(self.store.range(START - timedelta(days=1), START), [])
+
+    # ---------------------------------------
+    # ✅ Test 3: aggregate() buckets like the rollup tables
+    # ---------------------------------------
+    def test_aggregate(self):
+        rows = self.store.aggregate(START, START + timedelta(hours=3), "1h")
+        self.assertEqual([(r["timestamp"], r["device_id"]) for r in rows[:3]],
+                         [(START.isoformat(), self.a), (START.isoformat(), self.b),
+                          ((START + timedelta(hours=1)).isoformat(), self.a)])
+        first = rows[0]
+        self.assertEqual(first["count"], 6)
+        self.assertEqual(first["temperature_min"], 20.0)
+        self.assertEqual(first["temperature_max"], 23.0)
+        self.assertAlmostEqual(first["temperature"], (20 + 21 + 22 + 23 + 20 + 21) / 6)
+        b = rows[1]
+        self.assertEqual(b["count"], 6)
+        self.assertEqual(b["humidity_min"], 60.25)
+        self.assertIsNotNone(b["humidity"])
+
+        daily = self.store.aggregate(START, START + timedelta(days=1), "1d", [self.a])
+        self.assertEqual(len(daily), 1)
+        self.assertEqual(daily[0]["count"], 18)
+
+    # ---------------------------------------
+    # ✅ Test 4: scan() / scan_columns() chunks add up to range(); columns() and count()
+    # ---------------------------------------
+    def test_scan_columns_count(self):
+        end = START + timedelta(hours=3)
+        chunks = list(self.store.scan(START, end, chunk=5))
+        self.assertTrue(all(len(c) <= 5 for c in chunks))
+        self.assertEqual([(r.device_id, r.timestamp) for c in chunks for r in c],
+                         [(r.device_id, r.timestamp) for r in self.store.range(START, end)])
+        blocks = list(self.store.scan_columns(START, end, chunk=5))
+        self.assertEqual(np.concatenate([b["device_id"] for b in blocks]).tolist(),
+                         [r.device_id for c in chunks for r in c])
+        humidity = np.concatenate([b["humidity"] for b in blocks])
+        self.assertEqual(int(np.isnan(humidity).sum()), 1)          # device b's NULL
+
+        self.assertEqual(self.store.count(self.a, START, end), 18)
+        cols = self.store.columns(self.a, START, end, ["temperature"])
+        self.assertEqual(len(cols["t"]), 18)
+        # UTC epoch ms of 00:00 India time
+        utc = START - timedelta(hours=5, minutes=30) - datetime(1970, 1, 1)
+        self.assertEqual(int(cols["t"][0]), utc // timedelta(milliseconds=1))
+        hourly = self.store.columns(self.a, START, end, ["temperature"], "1h")
+        self.assertEqual(len(hourly["t"]), 3)
+        self.assertTrue(np.all(np.diff(hourly["t"]) == 3600000))
+        self.assertEqual(float(hourly["temperature_max"][0]), 23.0)
+
+    # ---------------------------------------
+    # ✅ Test 5: Routes go through the configured store
+    # ---------------------------------------
+    def test_routes_use_store(self):
+        client = self.app.test_client()
+        res = client.get("/api/history/rollups", query_string={
+            "device_id": self.b, "from": START.isoformat(), "to": (START + timedelta(hours=1)).isoformat(),
+            "resolution": "raw"})
+        data = res.get_json()["data"]
+        self.assertEqual(len(data), 6)
+        self.assertEqual(data[0]["timestamp"], (START + timedelta(minutes=5)).isoformat())
+        self.assertEqual(len(client.get("/api/data/all").get_json()), 24)
+
+
+class SqlStoreTestCase(StoreConformance, unittest.TestCase):
+    def make_store(self):
+        return SqlStore()
+
+
+class SegmentStoreTestCase(StoreConformance, unittest.TestCase):
+    def make_store(self):
+        return SegmentStore(os.path.join(self.tmpdir.name, "segments"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# ==========================================================
+# backend/timeseries — Pluggable reading storage
+# ==========================================================
+# The ingest writer and the history / data / dashboard routes talk to
+# get_store(); TIMESERIES_BACKEND picks the implementation:
+#
+#   sql      SqlStore      history + history_rollups via SQLAlchemy (default)
+#   segment  SegmentStore  append-only per-device, per-day files under TIMESERIES_DIR
+#                          (aggregates still from history_rollups)
+# ==========================================================
+import threading
+
+from backend.config import Config
+from backend.timeseries.base import Sample, TimeSeriesStore
+from backend.timeseries.segment_store import SegmentStore
+from backend.timeseries.sql_store import SqlStore
+
+BACKENDS = {"sql": SqlStore, "segment": SegmentStore}
+
+_store = None
+_lock = threading.Lock()
+
+
+def create_store(name=None, root=None):
+    name = name or Config.TIMESERIES_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown time-series backend '{name}' (choose from {', '.join(BACKENDS)})")
+    if name == "segment":
+        return SegmentStore(root or Config.TIMESERIES_DIR)
+    return BACKENDS[name]()
+
+
+def get_store():
+    global _store
+    with _lock:
+        if _store is None:
+            _store = create_store()
+        return _store
+
+
+def set_store(store):
+    """Swap the process-wide store (tests, benchmarks). Returns the previous one."""
+    global _store
+    with _lock:
+        previous, _store = _store, store
+        return previous
+
+
+__all__ = [
+    "Sample",
+    "TimeSeriesStore",
+    "SqlStore",
+    "SegmentStore",
+    "BACKENDS",
+    "create_store",
+    "get_store",
+    "set_store",
+]
@@ -0,0 +1,125 @@
+# ==========================================================
+# backend/timeseries/base.py — TimeSeriesStore interface
+# ==========================================================
+# Every reading read/write outside the ORM admin tables goes through one
+# of these. Timestamps going in may be aware or naive; everything coming
+# out is naive India wall time, the same clock History has always used.
+# ==========================================================
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+
+from backend.rollup_service import IST_OFFSET_MS, RESOLUTION_SECONDS, SERIES_FIELDS, wall_time
+
+_Sample = namedtuple(
+    "Sample", ["device_id", "timestamp", "temperature", "humidity", "pressure", "id"]
+)
+
+
+class Sample(_Sample):
+    """One stored reading. `id` is the History row id where the store has one."""
+    __slots__ = ()
+
+    def __new__(cls, device_id, timestamp, temperature, humidity, pressure, id=None):
+        return super().__new__(cls, device_id, timestamp, temperature, humidity, pressure, id)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "device_id": self.device_id,
+            "temperature": self.temperature,
+            "humidity": self.humidity,
+            "pressure": self.pressure,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+        }
+
+
+class TimeSeriesStore:
+    """
+    append_batch / latest / range / aggregate are the contract; scan,
+    scan_columns, columns and count have generic versions built on them
+    that backends override with something faster.
+    """
+
+    name = "abstract"
+
+    # ------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------
+    def append_batch(self, readings):
+        """Store readings (device_id, temperature, humidity, pressure, timestamp). Returns count."""
+        raise NotImplementedError
+
+    # ------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------
+    def latest(self, device_ids=None):
+        """{device_id: Sample} with the newest reading of each device."""
+        raise NotImplementedError
+
+    def range(self, start=None, end=None, device_ids=None, limit=None, newest_first=False):
+        """Samples with start <= timestamp < end (None = open), ordered by time."""
+        raise NotImplementedError
+
+    def aggregate(self, start, end, resolution, device_ids=None):
+        """Per-device buckets ("1m"/"1h"/"1d") as rollup dicts, ordered by bucket then device."""
+        raise NotImplementedError
+
+    def scan(self, start, end, device_ids=None, chunk=2000):
+        """Yield lists of at most `chunk` Samples in time order (exports)."""
+        rows = self.range(start, end, device_ids)
+        for i in range(0, len(rows), chunk):
+            yield rows[i:i + chunk]
+
+    def scan_columns(self, start, end, device_ids=None, chunk=2000):
+        """
+        scan() as NumPy columns (columnar exports): {"device_id": int64,
+        "t": int64 epoch ms, field: float64 with NaN for NULL}. Rows without a device are skipped.
+        """
+        for rows in self.scan(start, end, device_ids, chunk):
+            rows = [r for r in rows if r.device_id is not None]
+            if not rows:
+                continue
+            out = {"device_id": np.array([r.device_id for r in rows], dtype=np.int64),
+                   "t": _epoch_ms([r.timestamp for r in rows])}
+            for f in SERIES_FIELDS:
+                out[f] = np.array([np.nan if getattr(r, f) is None else getattr(r, f) for r in rows],
+                                  dtype=np.float64)
+            yield out
+
+    def count(self, device_id, start, end):
+        """Readings of one device (None = all devices) in [start, end); may be an estimate."""
+        return len(self.range(start, end, None if device_id is None else [device_id]))
+
+    def columns(self, device_id, start, end, fields, resolution="raw"):
+        """
+        Columnar NumPy arrays for one device: {"t": int64 epoch ms, field: float64}.
+        Rollup resolutions also carry "<field>_min" / "<field>_max".
+        """
+        if resolution == "raw":
+            rows = self.range(start, end, [device_id])
+            out = {"t": _epoch_ms([r.timestamp for r in rows])}
+            for f in fields:
+                out[f] = np.array([np.nan if getattr(r, f) is None else getattr(r, f) for r in rows],
+                                  dtype=np.float64)
+            return out
+
+        rows = self.aggregate(start, end, resolution, [device_id])
+        out = {"t": _epoch_ms([datetime.fromisoformat(r["timestamp"]) for r in rows])}
+        for f in fields:
+            for key in (f, f"{f}_min", f"{f}_max"):
+                out[key] = np.array([np.nan if r[key] is None else r[key] for r in rows], dtype=np.float64)
+        return out
+
+
+def _epoch_ms(wall_times):
+    """Naive India wall times → UTC epoch milliseconds."""
+    wall = np.array([wall_time(t) for t in wall_times], dtype="datetime64[ms]")
+    return wall.astype(np.int64) - IST_OFFSET_MS
+
+
+def check_resolution(resolution):
+    if resolution not in RESOLUTION_SECONDS:
+        raise ValueError(f"Unknown resolution {resolution}")
+    return RESOLUTION_SECONDS[resolution]
@@ -0,0 +1,407 @@
+# ==========================================================
+# backend/timeseries/segment_store.py — Memory-mapped append-only segments
+# ==========================================================
+# Raw readings live in files, outside the database:
+#
+#   <root>/<device_id>/<YYYY-MM-DD>.seg   fixed-width records, time-ordered
+#   <root>/<device_id>/<YYYY-MM-DD>.idx   sparse time index (int64)
+#
+# Aggregates do not: append_batch() folds each batch into history_rollups
+# in the caller's transaction (as SqlStore does), and aggregate() / rollup
+# columns() read that table, so their cost follows the bucket count, not
+# the raw volume. The files are written when that transaction commits and
+# never on rollback, so a batch the ingest writer reports as failed has
+# left no readings behind.
+#
+# A record (RECORD, 20 bytes) is int64 wall-time epoch ms + float32
+# temperature/humidity/pressure, NULL stored as NaN. The index holds the
+# timestamp of every INDEX_STRIDE-th record, so a range lookup is a
+# binary search over the index and then over one stride of the segment.
+#
+# Reads are zero-copy: segments are opened with np.memmap and sliced, so
+# only the pages a query touches are read; scan() (exports) merges devices
+# from chunk-sized views instead of materialising the range. Appends are
+# one write() per (device, day) per batch; a late reading older than the
+# segment's tail rewrites that one segment sorted (atomic replace).
+# ==========================================================
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.extensions import db
+from backend.rollup_service import IST_OFFSET_MS, load_series, read_rollups, upsert_rollups, wall_time
+from backend.timeseries.base import Sample, TimeSeriesStore, check_resolution
+
+RECORD = np.dtype([("ts", "<i8"), ("temperature", "<f4"), ("humidity", "<f4"), ("pressure", "<f4")])
+INDEX = np.dtype("<i8")
+FIELDS = ("temperature", "humidity", "pressure")
+SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+INDEX_STRIDE = 256
+MAX_OPEN_MAPS = 256
+
+_EPOCH = datetime(1970, 1, 1)
+_DAY_MS = 86400000
+_EMPTY = np.empty(0, dtype=RECORD)
+_PENDING = "segment_store_pending"   # session.info key: [(store, groups), ...] awaiting COMMIT
+
+
+def to_ms(ts):
+    """Aware/naive datetime → wall-time epoch ms."""
+    return (wall_time(ts) - _EPOCH) // timedelta(milliseconds=1)
+
+
+def from_ms(ms):
+    return _EPOCH + timedelta(milliseconds=int(ms))
+
+
+def _day_of(ms):
+    return from_ms(ms - ms % _DAY_MS).strftime("%Y-%m-%d")
+
+
+def _column(values):
+    """float32 column → Python floats with NaN as None (no per-element NumPy scalars)."""
+    out = np.round(values.astype(np.float64), 6).tolist()
+    return [None if v != v else v for v in out]
+
+
+class SegmentStore(TimeSeriesStore):
+    name = "segment"
+
+    def __init__(self, root, index_stride=INDEX_STRIDE):
+        self.root = str(root)
+        self.stride = index_stride
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.RLock()
+        self._latest = {}            # device_id -> 1-record array, filled lazily
+        self._maps = OrderedDict()   # path -> (size, memmap, index), LRU
+
+    # ------------------------------------------------------
+    # Layout
+    # ------------------------------------------------------
+    def _path(self, device_id, day, suffix=SUFFIX):
+        return os.path.join(self.root, str(device_id), f"{day}{suffix}")
+
+    def devices(self):
+        return sorted(int(d) for d in os.listdir(self.root) if d.isdigit())
+
+    def days(self, device_id):
+        folder = os.path.join(self.root, str(device_id))
+        if not os.path.isdir(folder):
+            return []
+        return sorted(f[: -len(SUFFIX)] for f in os.listdir(folder) if f.endswith(SUFFIX))
+
+    # ------------------------------------------------------
+    # Segment access (memmap + sparse index, cached while unchanged)
+    # ------------------------------------------------------
+    def _open(self, device_id, day):
+        """(records memmap, sparse index) for a segment; re-mapped when the file grew."""
+        path = self._path(device_id, day)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return _EMPTY, np.empty(0, dtype=INDEX)
+        with self._lock:
+            cached = self._maps.get(path)
+            if cached is not None and cached[0] == size:
+                self._maps.move_to_end(path)
+                return cached[1], cached[2]
+            n = size // RECORD.itemsize
+            data = np.memmap(path, dtype=RECORD, mode="r", shape=(n,)) if n else _EMPTY
+            index = self._load_index(device_id, day, data)
+            self._maps[path] = (size, data, index)
+            while len(self._maps) > MAX_OPEN_MAPS:
+                self._maps.popitem(last=False)
+            return data, index
+
+    def _load_index(self, device_id, day, data):
+        path = self._path(device_id, day, INDEX_SUFFIX)
+        expected = -(-len(data) // self.stride)
+        if os.path.exists(path):
+            index = np.fromfile(path, dtype=INDEX)
+            if len(index) == expected:
+                return index
+        # missing or stale (e.g. crash between the two writes) — rebuild it
+        index = np.ascontiguousarray(data["ts"][:: self.stride])
+        index.tofile(path)
+        return index
+
+    def _locate(self, data, index, ts):
+        """First position with data.ts >= ts: index search, then one stride of the segment."""
+        j = int(np.searchsorted(index, ts, "left"))
+        if j == 0:
+            return 0
+        lo = (j - 1) * self.stride
+        hi = min(j * self.stride, len(data))
+        return lo + int(np.searchsorted(data["ts"][lo:hi], ts, "left"))
+
+    # ------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------
+    def append_batch(self, readings):
+        """Rollups now, in the caller's transaction; segment files once it commits."""
+        groups = {}
+        for r in readings:
+            ms = to_ms(r.timestamp)
+            groups.setdefault((r.device_id, _day_of(ms)), []).append(
+                (ms,
+                 np.nan if r.temperature is None else r.temperature,
+                 np.nan if r.humidity is None else r.humidity,
+                 np.nan if r.pressure is None else r.pressure)
+            )
+        if not groups:
+            return 0
+
+        staged = {}
+        for key, rows in groups.items():
+            records = np.array(rows, dtype=RECORD)
+            staged[key] = records[np.argsort(records["ts"], kind="stable")]
+        upsert_rollups(readings)
+        db.session.info.setdefault(_PENDING, []).append((self, staged))
+        return sum(len(rows) for rows in groups.values())
+
+    def _write(self, staged):
+        with self._lock:
+            for (device_id, day), records in staged.items():
+                self._append_segment(device_id, day, records)
+                newest = records[-1:].copy()
+                current = self._latest.get(device_id)
+                if current is not None and newest["ts"][0] >= current["ts"][0]:
+                    self._latest[device_id] = newest
+
+    def _append_segment(self, device_id, day, records):
+        path = self._path(device_id, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data, _ = self._open(device_id, day)
+        n = len(data)
+        if n and records["ts"][0] < data["ts"][n - 1]:
+            self._rewrite(device_id, day, np.concatenate([np.asarray(data), records]))
+            return
+
+        with open(path, "ab") as f:
+            f.write(records.tobytes())
+        # index entries for the new positions that fall on a stride boundary
+        first = -(-n // self.stride) * self.stride
+        marks = records["ts"][first - n:: self.stride]
+        if len(marks):
+            with open(self._path(device_id, day, INDEX_SUFFIX), "ab") as f:
+                f.write(marks.astype(INDEX).tobytes())
+
+    def _rewrite(self, device_id, day, records):
+        """Sort and atomically replace one segment + its index (late arrivals)."""
+        records = records[np.argsort(records["ts"], kind="stable")]
+        path = self._path(device_id, day)
+        index_path = self._path(device_id, day, INDEX_SUFFIX)
+        self._maps.pop(path, None)
+        records.tofile(path + ".tmp")
+        np.ascontiguousarray(records["ts"][:: self.stride]).astype(INDEX).tofile(index_path + ".tmp")
+        os.replace(path + ".tmp", path)
+        os.replace(index_path + ".tmp", index_path)
+
+    def purge_before(self, cutoff, dry_run=False):
+        """Drop whole day segments that end before `cutoff`. Returns readings removed."""
+        cutoff_day = _day_of(to_ms(cutoff))
+        removed = 0
+        with self._lock:
+            for device_id in self.devices():
+                for day in self.days(device_id):
+                    if day >= cutoff_day:
+                        break
+                    path = self._path(device_id, day)
+                    removed += os.path.getsize(path) // RECORD.itemsize
+                    if dry_run:
+                        continue
+                    self._maps.pop(path, None)
+                    os.remove(path)
+                    if os.path.exists(self._path(device_id, day, INDEX_SUFFIX)):
+                        os.remove(self._path(device_id, day, INDEX_SUFFIX))
+            if not dry_run:
+                self._latest.clear()
+        return removed
+
+    # ------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------
+    def _segments(self, device_id, start_ms, end_ms, newest_first=False):
+        """Zero-copy views of the segments overlapping [start_ms, end_ms), cut to the range."""
+        days = self.days(device_id)
+        for day in reversed(days) if newest_first else days:
+            day_ms = to_ms(datetime.strptime(day, "%Y-%m-%d"))
+            if (start_ms is not None and day_ms + _DAY_MS <= start_ms) or (end_ms is not None and day_ms >= end_ms):
+                continue
+            data, index = self._open(device_id, day)
+            lo = 0 if start_ms is None or start_ms <= day_ms else self._locate(data, index, start_ms)
+            hi = len(data) if end_ms is None or end_ms >= day_ms + _DAY_MS else self._locate(data, index, end_ms)
+            if hi > lo:
+                yield data[lo:hi]
+
+    def read(self, device_id, start_ms=None, end_ms=None, last=None):
+        """
+        RECORD array for one device with start_ms <= ts < end_ms, time-ordered.
+        A range inside one day is a view on the mapped file; several days are concatenated.
+        last=n keeps only the newest n, reading day files newest-first until it has them.
+        """
+        parts, have = [], 0
+        for data in self._segments(device_id, start_ms, end_ms, newest_first=last is not None):
+            parts.append(data)
+            have += len(data)
+            if last is not None and have >= last:
+                break
+        if last is not None:
+            parts.reverse()
+        if not parts:
+            return _EMPTY
+        data = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        return data if last is None else data[max(len(data) - last, 0):]
+
+    @staticmethod
+    def _bounds(start, end):
+        return (None if start is None else to_ms(start)), (None if end is None else to_ms(end))
+
+    @staticmethod
+    def _samples(device_ids, data):
+        """Columnar → Sample list (one tolist() per column, not per record)."""
+        ts = data["ts"].astype("datetime64[ms]").astype(object)
+        cols = [_column(data[f]) for f in FIELDS]
+        return [Sample(d, t, a, b, c) for d, t, a, b, c in zip(device_ids, ts, *cols)]
+
+    def latest(self, device_ids=None):
+        out = {}
+        for device_id in (device_ids or self.devices()):
+            rec = self._latest.get(device_id)
+            if rec is None:
+                data = self.read(device_id, last=1)
+                if not len(data):
+                    continue
+                rec = self._latest[device_id] = np.array(data[-1:])
+            out[device_id] = self._samples([device_id], rec)[0]
+        return out
+
+    def _gather(self, start, end, device_ids, limit=None, newest_first=False):
+        """(device id array, records) for all devices in range, time-ordered."""
+        start_ms, end_ms = self._bounds(start, end)
+        ids, parts = [], []
+        for device_id in (device_ids or self.devices()):
+            if newest_first and limit is not None:
+                data = self.read(device_id, start_ms, end_ms, last=limit)
+            else:
+                data = self.read(device_id, start_ms, end_ms)[:limit]
+            parts.append(data)
+            ids.append(np.full(len(data), device_id, dtype=np.int64))
+        if not parts:
+            return np.empty(0, dtype=np.int64), _EMPTY
+        if len(parts) == 1:
+            return ids[0], parts[0]
+        data, dev = np.concatenate(parts), np.concatenate(ids)
+        order = np.lexsort((dev, data["ts"]))
+        return dev[order], data[order]
+
+    def range(self, start=None, end=None, device_ids=None, limit=None, newest_first=False):
+        dev, data = self._gather(start, end, device_ids, limit, newest_first)
+        if newest_first:
+            dev, data = dev[::-1], data[::-1]
+        if limit is not None:
+            dev, data = dev[:limit], data[:limit]
+        return self._samples(dev.tolist(), data)
+
+    def _device_chunks(self, device_id, start_ms, end_ms, chunk):
+        for data in self._segments(device_id, start_ms, end_ms):
+            for i in range(0, len(data), chunk):
+                yield data[i:i + chunk]
+
+    def _stream(self, start, end, device_ids, chunk):
+        """
+        (device id array, records) blocks of `chunk` rows in time order for the
+        exports. Devices are merged from memmap views of at most `chunk` rows
+        each, so memory stays flat however long the range is.
+        """
+        start_ms, end_ms = self._bounds(start, end)
+        heads = {}      # device_id -> [current view, rest of its chunks]
+        for device_id in (device_ids or self.devices()):
+            chunks = self._device_chunks(device_id, start_ms, end_ms, chunk)
+            head = next(chunks, None)
+            if head is not None:
+                heads[device_id] = [head, chunks]
+
+        buf_dev, buf = np.empty(0, dtype=np.int64), _EMPTY
+        while heads:
+            # nothing still unread is older than the earliest view end: emit up to it
+            cutoff = min(head["ts"][-1] for head, _ in heads.values())
+            ids, parts = [buf_dev], [buf]
+            for device_id, entry in list(heads.items()):
+                head = entry[0]
+                n = int(np.searchsorted(head["ts"], cutoff, "right"))
+                if n:
+                    ids.append(np.full(n, device_id, dtype=np.int64))
+                    parts.append(head[:n])
+                if n < len(head):
+                    entry[0] = head[n:]
+                else:
+                    entry[0] = next(entry[1], None)
+                    if entry[0] is None:
+                        del heads[device_id]
+            fresh = len(ids[0])
+            dev, data = np.concatenate(ids), np.concatenate(parts)
+            order = np.lexsort((dev[fresh:], data["ts"][fresh:])) + fresh
+            dev[fresh:], data[fresh:] = dev[order], data[order]
+
+            full = len(data) - len(data) % chunk
+            for i in range(0, full, chunk):
+                yield dev[i:i + chunk], data[i:i + chunk]
+            buf_dev, buf = dev[full:], data[full:]
+        if len(buf):
+            yield buf_dev, buf
+
+    def scan(self, start, end, device_ids=None, chunk=2000):
+        """Export path: streamed merge, Samples built a chunk at a time."""
+        for dev, data in self._stream(start, end, device_ids, chunk):
+            yield self._samples(dev.tolist(), data)
+
+    def scan_columns(self, start, end, device_ids=None, chunk=2000):
+        for dev, data in self._stream(start, end, device_ids, chunk):
+            out = {"device_id": dev, "t": data["ts"] - IST_OFFSET_MS}
+            for f in FIELDS:
+                out[f] = data[f].astype(np.float64)
+            yield out
+
+    def count(self, device_id, start, end):
+        start_ms, end_ms = self._bounds(start, end)
+        device_ids = self.devices() if device_id is None else [device_id]
+        return sum(len(d) for i in device_ids for d in self._segments(i, start_ms, end_ms))
+
+    # ------------------------------------------------------
+    # Aggregates (history_rollups, maintained by append_batch)
+    # ------------------------------------------------------
+    def aggregate(self, start, end, resolution, device_ids=None):
+        check_resolution(resolution)
+        return read_rollups(start, end, resolution, device_ids)
+
+    def columns(self, device_id, start, end, fields, resolution="raw"):
+        if resolution != "raw":
+            check_resolution(resolution)
+            return load_series(device_id, start, end, resolution, fields)
+        start_ms, end_ms = self._bounds(start, end)
+        data = self.read(device_id, start_ms, end_ms)
+        out = {"t": data["ts"] - IST_OFFSET_MS}
+        for f in fields:
+            out[f] = data[f].astype(np.float64)
+        return out
+
+
+# ==========================================================
+# Transaction hooks — segment writes follow the DB transaction
+# ==========================================================
+@event.listens_for(Session, "after_commit")
+def _write_pending(session):
+    for store, staged in session.info.pop(_PENDING, ()):
+        store._write(staged)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,116 @@
+# ==========================================================
+# backend/timeseries/sql_store.py — SQLAlchemy-backed TimeSeriesStore
+# ==========================================================
+# Raw readings in `history`, aggregates from the incrementally maintained
+# `history_rollups`. Writes join the caller's transaction (no commit here),
+# so the ingest writer still stores a batch + rollups + device status
+# atomically.
+# ==========================================================
+import numpy as np
+from sqlalchemy import String, func, insert, select, type_coerce
+
+from backend.extensions import db
+from backend.models import History
+from backend.rollup_service import (
+    IST_OFFSET_MS,
+    estimate_rows,
+    load_series,
+    read_rollups,
+    upsert_rollups,
+    wall_time,
+)
+from backend.timeseries.base import Sample, TimeSeriesStore, check_resolution
+
+_c = History.__table__.c
+_COLUMNS = (_c.device_id, _c.timestamp, _c.temperature, _c.humidity, _c.pressure, _c.id)
+
+
+def _filtered(stmt, start, end, device_ids):
+    if start is not None:
+        stmt = stmt.where(_c.timestamp >= wall_time(start))
+    if end is not None:
+        stmt = stmt.where(_c.timestamp < wall_time(end))
+    if device_ids:
+        stmt = stmt.where(_c.device_id.in_(device_ids))
+    return stmt
+
+
+class SqlStore(TimeSeriesStore):
+    name = "sql"
+
+    def append_batch(self, readings):
+        rows = [
+            {"device_id": r.device_id, "temperature": r.temperature, "humidity": r.humidity,
+             "pressure": r.pressure, "timestamp": r.timestamp}
+            for r in readings
+        ]
+        if rows:
+            db.session.execute(insert(History), rows)
+            upsert_rollups(readings)
+        return len(rows)
+
+    def latest(self, device_ids=None):
+        newest = select(_c.device_id, func.max(_c.timestamp).label("ts")).where(_c.device_id.isnot(None))
+        if device_ids:
+            newest = newest.where(_c.device_id.in_(device_ids))
+        newest = newest.group_by(_c.device_id).subquery()
+        stmt = select(*_COLUMNS).join(
+            newest, (_c.device_id == newest.c.device_id) & (_c.timestamp == newest.c.ts)
+        )
+        return {row[0]: Sample(*row) for row in db.session.execute(stmt)}
+
+    def range(self, start=None, end=None, device_ids=None, limit=None, newest_first=False):
+        order = (_c.timestamp.desc(), _c.id.desc()) if newest_first else (_c.timestamp, _c.id)
+        stmt = _filtered(select(*_COLUMNS), start, end, device_ids).order_by(*order)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return [Sample(*row) for row in db.session.execute(stmt)]
+
+    def scan(self, start, end, device_ids=None, chunk=2000):
+        """Streams with a yield_per cursor — Core tuples, never the whole range."""
+        stmt = (
+            _filtered(select(*_COLUMNS), start, end, device_ids)
+            .order_by(_c.timestamp, _c.id)
+            .execution_options(yield_per=chunk)
+        )
+        result = db.session.execute(stmt)
+        try:
+            for rows in result.partitions():
+                yield [Sample(*row) for row in rows]
+        finally:
+            result.close()
+
+    def scan_columns(self, start, end, device_ids=None, chunk=2000):
+        """Timestamps fetched as text and parsed by NumPy — no datetime or Sample per row."""
+        stmt = (
+            _filtered(select(_c.device_id, type_coerce(_c.timestamp, String), _c.temperature,
+                             _c.humidity, _c.pressure), start, end, device_ids)
+            .where(_c.device_id.isnot(None))
+            .order_by(_c.timestamp, _c.id)
+            .execution_options(yield_per=chunk)
+        )
+        result = db.session.execute(stmt)
+        try:
+            for rows in result.partitions():
+                device, ts, temp, hum, press = zip(*rows)
+                yield {
+                    "device_id": np.array(device, dtype=np.int64),
+                    "t": np.array(ts, dtype="datetime64[ms]").astype(np.int64) - IST_OFFSET_MS,
+                    # SQL NULL → NaN in the float cast
+                    "temperature": np.array(temp, dtype=np.float64),
+                    "humidity": np.array(hum, dtype=np.float64),
+                    "pressure": np.array(press, dtype=np.float64),
+                }
+        finally:
+            result.close()
+
+    def aggregate(self, start, end, resolution, device_ids=None):
+        check_resolution(resolution)
+        return read_rollups(start, end, resolution, device_ids)
+
+    def count(self, device_id, start, end):
+        # from the hourly rollup: <= span/1h rows read whatever the raw volume
+        return estimate_rows(device_id, start, end)
+
+    def columns(self, device_id, start, end, fields, resolution="raw"):
+        return load_series(device_id, start, end, resolution, fields)
@@ -0,0 +1,311 @@
+# ==========================================================
+# backend/utils/authz.py — Compiled role → permission → widget matrix
+# ==========================================================
+# Authorization used to be re-derived in every route: lazy-load
+# user.roles, take roles[0].name, compare against hard-coded role names
+# (and a hard-coded widget list per role). This module compiles the
+# roles / permissions / role_permissions / user_roles / user_devices
+# tables once into plain dicts:
+#
+#   permission name → bit        role → bitmask        user → bitmask
+#   user → primary role name     user → granted device ids
+#
+# so "may user X do Y (on device Z)" is two dict lookups and an AND.
+#
+# Permission vocabulary: any name in the permissions table, plus
+#   manage_dashboards   see / open / delete every user's dashboards
+#   all_devices         act on every device, not only user_devices grants
+#   widget:<type>       place a <type> widget on a dashboard
+# The role-name rules that used to live in the routes are kept as
+# DEFAULT_ROLE_PERMISSIONS and merged with whatever the tables grant.
+#
+# Freshness: ORM flushes that touch a Role, Permission or User mark those
+# rows stale; after COMMIT the next check refreshes just them (one role →
+# its users, one user → its roles + devices). The same commit drops the
+# affected identity_cache entries, so @roles_required (which reads cached
+# role names) never outlives a revoked role. Changes made with raw SQL
+# need invalidate(). A new engine (another app / database) rebuilds.
+# ==========================================================
+import threading
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from backend.extensions import db
+from backend.models import Permission, Role, User, role_permissions, user_devices, user_roles
+from backend.utils import identity_cache
+
+MANAGE_DASHBOARDS = "manage_dashboards"
+ALL_DEVICES = "all_devices"
+WIDGET_PREFIX = "widget:"
+WIDGET_TYPES = (
+    "line",
+    "gauge",
+    "pressure_chart",
+    "temperature_chart",
+    "humidity_chart",
+    "table",
+    "onoff",
+)
+DEFAULT_ROLE = "user"
+
+_ADMIN = frozenset({MANAGE_DASHBOARDS, ALL_DEVICES, *(WIDGET_PREFIX + w for w in WIDGET_TYPES)})
+DEFAULT_ROLE_PERMISSIONS = {
+    "superadmin": _ADMIN,
+    "admin": _ADMIN,
+    "user1": frozenset({"widget:temperature_chart"}),
+    "user2": frozenset({"widget:humidity_chart"}),
+    "user3": frozenset({"widget:pressure_chart"}),
+    "user4": frozenset({"widget:temperature_chart", "widget:pressure_chart"}),
+}
+
+_lock = threading.RLock()
+_bits = {}              # permission name -> 1 << n
+_role_names = {}        # role id -> name
+_role_masks = {}        # role id -> bitmask
+_role_users = {}        # role id -> {user id, ...}
+_user_roles = {}        # user id -> (role id, ...) ordered by id (roles[0] is the primary)
+_user_masks = {}        # user id -> bitmask
+_user_devices = {}      # user id -> frozenset(device id)
+_engine = None          # engine the matrix was compiled from
+_stale_roles = set()
+_stale_users = set()
+_stale_all = False
+_stats = {"builds": 0, "role_refreshes": 0, "user_refreshes": 0}
+
+
+# ==========================================================
+# Compilation
+# ==========================================================
+def _bit(name):
+    bit = _bits.get(name)
+    if bit is None:
+        bit = _bits[name] = 1 << len(_bits)
+    return bit
+
+
+def _mask(names):
+    mask = 0
+    for name in names:
+        mask |= _bit(name)
+    return mask
+
+
+def _user_mask(role_ids):
+    mask = 0
+    for rid in role_ids:
+        mask |= _role_masks.get(rid, 0)
+    return mask
+
+
+def _build():
+    """Full compile from the five tables (needs an app context)."""
+    global _engine, _stale_all
+    session = db.session
+    for name in sorted(set().union(*DEFAULT_ROLE_PERMISSIONS.values())):
+        _bit(name)
+    perm_names = dict(session.execute(select(Permission.id, Permission.name)).all())
+    for name in sorted(perm_names.values()):
+        _bit(name)
+
+    role_names = dict(session.execute(select(Role.id, Role.name)).all())
+    granted = {rid: set(DEFAULT_ROLE_PERMISSIONS.get(name, ())) for rid, name in role_names.items()}
+    for rid, pid in session.execute(select(role_permissions.c.role_id, role_permissions.c.permission_id)):
+        if rid in granted and pid in perm_names:
+            granted[rid].add(perm_names[pid])
+
+    members = {}
+    for uid, rid in session.execute(select(user_roles.c.user_id, user_roles.c.role_id)):
+        members.setdefault(uid, []).append(rid)
+    devices = {}
+    for uid, did in session.execute(select(user_devices.c.user_id, user_devices.c.device_id)):
+        devices.setdefault(uid, set()).add(did)
+
+    _role_names.clear()
+    _role_names.update(role_names)
+    _role_masks.clear()
+    _role_masks.update({rid: _mask(names) for rid, names in granted.items()})
+    _role_users.clear()
+    _user_roles.clear()
+    _user_masks.clear()
+    _user_devices.clear()
+    for uid in session.execute(select(User.id)).scalars():
+        rids = tuple(sorted(members.get(uid, ())))
+        _user_roles[uid] = rids
+        _user_masks[uid] = _user_mask(rids)
+        _user_devices[uid] = frozenset(devices.get(uid, ()))
+        for rid in rids:
+            _role_users.setdefault(rid, set()).add(uid)
+
+    _engine = db.engine
+    _stale_all = False
+    _stale_roles.clear()
+    _stale_users.clear()
+    _stats["builds"] += 1
+
+
+def _refresh_users(uids):
+    """Recompile a set of users: three IN queries whatever their number."""
+    if not uids:
+        return
+    session = db.session
+    uids = list(uids)
+    for uid in uids:
+        for rid in _user_roles.get(uid, ()):
+            _role_users.get(rid, set()).discard(uid)
+    existing = set(session.execute(select(User.id).where(User.id.in_(uids))).scalars())
+    members, devices = {}, {}
+    for uid, rid in session.execute(
+            select(user_roles.c.user_id, user_roles.c.role_id).where(user_roles.c.user_id.in_(uids))):
+        members.setdefault(uid, []).append(rid)
+    for uid, did in session.execute(
+            select(user_devices.c.user_id, user_devices.c.device_id).where(user_devices.c.user_id.in_(uids))):
+        devices.setdefault(uid, set()).add(did)
+    for uid in uids:
+        if uid not in existing:
+            for table in (_user_roles, _user_masks, _user_devices):
+                table.pop(uid, None)
+            continue
+        rids = tuple(sorted(members.get(uid, ())))
+        _user_roles[uid] = rids
+        _user_masks[uid] = _user_mask(rids)
+        _user_devices[uid] = frozenset(devices.get(uid, ()))
+        for rid in rids:
+            _role_users.setdefault(rid, set()).add(uid)
+    _stats["user_refreshes"] += len(uids)
+
+
+def _refresh_role(rid):
+    """Recompile one role; returns the users that have (or had) it."""
+    session = db.session
+    role = session.get(Role, rid)
+    affected = set(_role_users.get(rid, ()))
+    if role is None:
+        _role_names.pop(rid, None)
+        _role_masks.pop(rid, None)
+        _role_users.pop(rid, None)
+    else:
+        names = set(DEFAULT_ROLE_PERMISSIONS.get(role.name, ()))
+        names.update(session.execute(
+            select(Permission.name)
+            .join(role_permissions, role_permissions.c.permission_id == Permission.id)
+            .where(role_permissions.c.role_id == rid)
+        ).scalars())
+        _role_names[rid] = role.name
+        _role_masks[rid] = _mask(names)
+        affected.update(session.execute(
+            select(user_roles.c.user_id).where(user_roles.c.role_id == rid)).scalars())
+    _stats["role_refreshes"] += 1
+    return affected
+
+
+def _ensure():
+    """Compile on first use / new engine, apply pending changes. Cheap when nothing changed."""
+    if _engine is db.engine and not (_stale_all or _stale_roles or _stale_users):
+        return
+    with _lock:
+        if _engine is not db.engine or _stale_all:
+            _build()
+            return
+        users = set(_stale_users)
+        _stale_users.clear()
+        while _stale_roles:
+            users |= _refresh_role(_stale_roles.pop())
+        _refresh_users(users)
+
+
+def invalidate():
+    """Recompile everything on the next check (after raw-SQL changes to the tables)."""
+    global _stale_all
+    _stale_all = True
+    identity_cache.invalidate_all()
+
+
+# ==========================================================
+# Change tracking (ORM)
+# ==========================================================
+@event.listens_for(Session, "after_flush")
+def _track_flush(session, flush_context):
+    pending = session.info.setdefault("authz_pending", [set(), set(), False])
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Role):
+            pending[0].add(obj.id)
+        elif isinstance(obj, User):
+            pending[1].add(obj.id)
+        elif isinstance(obj, Permission) and obj in session.deleted:
+            pending[2] = True       # a role may have lost it; rare, so recompile
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_commit(session):
+    global _stale_all
+    pending = session.info.pop("authz_pending", None)
+    if pending:
+        with _lock:
+            _stale_roles.update(pending[0])
+            _stale_users.update(pending[1])
+            _stale_all = _stale_all or pending[2]
+        # cached identities carry role names: a role change may touch anyone
+        if pending[0] or pending[2]:
+            identity_cache.invalidate_all()
+        else:
+            for uid in pending[1]:
+                identity_cache.invalidate_user(uid)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rollback(session):
+    session.info.pop("authz_pending", None)
+
+
+# ==========================================================
+# Checks — O(1)
+# ==========================================================
+def can(user_id, permission):
+    """Does any of the user's roles grant `permission`?"""
+    _ensure()
+    bit = _bits.get(permission)
+    return bool(bit and _user_masks.get(user_id, 0) & bit)
+
+
+def can_on_device(user_id, permission, device_id):
+    """`permission` on one device: granted in user_devices, or all_devices."""
+    _ensure()
+    mask = _user_masks.get(user_id, 0)
+    bit = _bits.get(permission)
+    if not (bit and mask & bit):
+        return False
+    return bool(mask & _bits[ALL_DEVICES]) or device_id in _user_devices.get(user_id, ())
+
+
+def can_use_widget(user_id, widget_type):
+    return can(user_id, WIDGET_PREFIX + str(widget_type))
+
+
+def allowed_widgets(user_id):
+    _ensure()
+    mask = _user_masks.get(user_id, 0)
+    return [w for w in WIDGET_TYPES if mask & _bits[WIDGET_PREFIX + w]]
+
+
+def primary_role(user_id):
+    """Name of the user's first role (what the UI shows), or "user"."""
+    _ensure()
+    rids = _user_roles.get(user_id)
+    return _role_names.get(rids[0], DEFAULT_ROLE) if rids else DEFAULT_ROLE
+
+
+def device_ids(user_id):
+    _ensure()
+    return _user_devices.get(user_id, frozenset())
+
+
+def stats():
+    _ensure()
+    with _lock:
+        return {
+            "permissions": len(_bits),
+            "roles": len(_role_masks),
+            "users": len(_user_masks),
+            **_stats,
+        }
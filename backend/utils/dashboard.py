@@ -1,8 +1,10 @@
 # ==========================================================
 # backend/utils/dashboard.py — Enhanced live dashboard emitter (India Time)
 # ==========================================================
-from backend.models import Sensor, Device
+from backend.models import Device
+from backend.utils import latest_cache
 from backend.extensions import socketio
+from backend.utils.socket_rooms import NAMESPACE, ROOM_ALL, dashboard_room, device_dashboard_ids
 from datetime import datetime
 from pytz import timezone
 
@@ -12,39 +14,37 @@ INDIA_TZ = timezone("Asia/Kolkata")
 
 def emit_dashboard_update(device_id=None):
     """
-    Emit real-time dashboard data to all connected clients.
+    Emit real-time dashboard data to "devices:all" and to the rooms of
+    dashboards that show the device whose reading is used.
     If device_id is given, only that device’s latest data is used.
     Otherwise, aggregates across all online devices.
     The dashboard will correctly show 'offline' when no devices are active.
     """
 
     # ----------------------------------------------------------
-    # Get device(s)
+    # Get device id(s)
     # ----------------------------------------------------------
     if device_id:
-        device = Device.query.get(device_id)
-        devices = [device] if device else []
+        device_ids = [device_id]
     else:
-        devices = Device.query.filter_by(status="online").all()
+        device_ids = [
+            row[0] for row in Device.query.with_entities(Device.id).filter_by(status="online").all()
+        ]
 
     # ----------------------------------------------------------
-    # Collect latest readings
+    # Latest reading — O(1) per device from the last-value cache
     # ----------------------------------------------------------
     temperature = None
     humidity = None
     pressure = None
+    source_id = None
 
-    for dev in devices:
-        latest_sensor = (
-            Sensor.query.filter_by(device_id=dev.id)
-            .order_by(Sensor.timestamp.desc())
-            .first()
-        )
-        if latest_sensor:
-            temperature = latest_sensor.temperature
-            humidity = latest_sensor.humidity
-            pressure = latest_sensor.pressure
-            break  # ✅ Use latest available reading
+    latest = latest_cache.first_of(device_ids)
+    if latest:
+        temperature = latest.temperature
+        humidity = latest.humidity
+        pressure = latest.pressure
+        source_id = latest.device_id
 
     # ----------------------------------------------------------
     # Devices count
@@ -66,6 +66,9 @@ def emit_dashboard_update(device_id=None):
     # ----------------------------------------------------------
     # Emit via Socket.IO
     # ----------------------------------------------------------
-    socketio.emit("dashboard_update", data)
+    rooms = [ROOM_ALL]
+    if source_id is not None:
+        rooms += [dashboard_room(d) for d in device_dashboard_ids(source_id)]
+    socketio.emit("dashboard_update", data, to=rooms, namespace=NAMESPACE)
     print(f"[DASHBOARD] 📤 Emitted dashboard_update: {data}")
 
@@ -1,8 +1,7 @@
 import jwt
 from functools import wraps
 from flask import request, jsonify, current_app
-from models import User
-from werkzeug.security import check_password_hash
+from backend.utils import identity_cache
 
 def token_required(f):
     @wraps(f)
@@ -17,12 +16,13 @@ def token_required(f):
             return jsonify({"message": "Token is missing!"}), 401
 
         try:
-            payload = jwt.decode(token, current_app.config["JWT_SECRET"], algorithms=[current_app.config.get("JWT_ALGORITHM","HS256")])
-            username = payload.get("sub")
-            user = User.query.filter_by(username=username).first()
+            # cached per token: no decode / users query after the first request
+            user = identity_cache.resolve(token)
             if not user:
                 return jsonify({"message": "User not found"}), 401
-            # attach user to request context
+            if not user.is_active:
+                return jsonify({"message": "User account is inactive"}), 403
+            # attach the resolved identity (id, username, roles, device_ids) to the request
             request.user = user
         except jwt.ExpiredSignatureError:
             return jsonify({"message": "Token expired, please login again"}), 401
@@ -40,7 +40,7 @@ def roles_required(allowed_roles):
             user = getattr(request, "user", None)
             if not user:
                 return jsonify({"message": "Authentication required"}), 401
-            if user.role not in allowed_roles:
+            if not any(role in allowed_roles for role in user.roles):
                 return jsonify({"message": "Permission denied"}), 403
             return fn(*args, **kwargs)
         return decorated
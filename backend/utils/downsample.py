@@ -0,0 +1,82 @@
+# ==========================================================
+# backend/utils/downsample.py — Chart downsampling over NumPy arrays
+# ==========================================================
+# Both functions take columnar arrays (x ascending, y same length) and
+# return the INDICES of the points to keep, so callers can slice any
+# number of parallel columns with the same selection.
+#
+#   • lttb    — Largest-Triangle-Three-Buckets: keeps visual shape
+#   • minmax  — min and max of each bucket: keeps every spike/dip
+# ==========================================================
+import numpy as np
+
+METHODS = ("lttb", "minmax")
+
+
+def _all(n):
+    return np.arange(n, dtype=np.int64)
+
+
+def lttb(x, y, threshold):
+    """Indices of at most `threshold` points chosen by LTTB."""
+    n = len(x)
+    if threshold >= n:
+        return _all(n)
+    if threshold < 3:
+        return np.asarray([0, n - 1][: max(threshold, 0)], dtype=np.int64)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket edges for the n-2 interior points; first and last are always kept
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    out = np.empty(threshold, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+
+    # Average point of every bucket, precomputed (used as the "next" vertex)
+    csx = np.concatenate(([0.0], np.cumsum(x)))
+    csy = np.concatenate(([0.0], np.cumsum(y)))
+    lo, hi = edges[:-1], edges[1:]
+    count = hi - lo
+    avg_x = (csx[hi] - csx[lo]) / count
+    avg_y = (csy[hi] - csy[lo]) / count
+    # the last bucket's "next" is the final point
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    a = 0
+    for i in range(threshold - 2):
+        s, e = lo[i], hi[i]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area (a, candidate, next-average); argmax picks the point
+        area = np.abs((ax - next_x[i]) * (y[s:e] - ay) - (ax - x[s:e]) * (next_y[i] - ay))
+        a = s + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax(x, y, threshold):
+    """Indices of the min and max of each of threshold/2 buckets, in x order."""
+    n = len(x)
+    if threshold >= n:
+        return _all(n)
+    buckets = max(threshold // 2, 1)
+
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    keep = []
+    for s, e in zip(edges[:-1], edges[1:]):
+        if e <= s:
+            continue
+        seg = y[s:e]
+        i_min = s + int(np.argmin(seg))
+        i_max = s + int(np.argmax(seg))
+        keep.extend(sorted({i_min, i_max}))
+    return np.asarray(keep, dtype=np.int64)
+
+
+def downsample(x, y, threshold, method="lttb"):
+    if method == "minmax":
+        return minmax(x, y, threshold)
+    return lttb(x, y, threshold)
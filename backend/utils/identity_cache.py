@@ -0,0 +1,152 @@
+# ==========================================================
+# backend/utils/identity_cache.py — Decoded JWT identities, per token
+# ==========================================================
+# whoami / @token_required used to jwt.decode() the token, query the
+# user and lazy-load its roles on every call. The first request with a
+# token now does that once and keeps the result (user id, role names,
+# device grants) in a bounded LRU; later requests are a dict lookup.
+#
+# An entry lives until AUTH_CACHE_TTL seconds pass or the token's own
+# "exp" claim, whichever comes first. Routes that change a user, role or
+# permission call invalidate_user() / invalidate_all(); in a multi-process
+# deployment the other workers catch up within the TTL.
+# ==========================================================
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import jwt
+from sqlalchemy.orm import selectinload
+
+from backend.config import Config
+from backend.models import User
+
+ALGORITHM = "HS256"
+
+
+class Identity(namedtuple("Identity", ["user_id", "username", "roles", "device_ids", "is_active"])):
+    """What a request needs to know about its user — no ORM instance, safe to share."""
+
+    __slots__ = ()
+
+    @property
+    def role(self):
+        """Primary role: the lowest role id, as login (authz.primary_role) reports it."""
+        return self.roles[0] if self.roles else "user"
+
+
+_lock = threading.Lock()
+_entries = OrderedDict()    # token -> (Identity, deadline epoch seconds), oldest first
+_by_user = {}               # user_id -> {token, ...}
+_generation = 0             # bumped by every invalidation
+_hits = 0
+_misses = 0
+
+
+def _secret():
+    """Same key auth_routes signs with."""
+    return getattr(Config, "SECRET_KEY", None) or os.environ.get("SECRET_KEY", "franc-secret")
+
+
+def _drop(token):
+    identity, _ = _entries.pop(token)
+    tokens = _by_user.get(identity.user_id)
+    if tokens is not None:
+        tokens.discard(token)
+        if not tokens:
+            del _by_user[identity.user_id]
+
+
+def _load(claims):
+    """Resolve token claims to an Identity (needs an app context)."""
+    query = User.query.options(selectinload(User.roles), selectinload(User.devices))
+    if claims.get("user_id") is not None:
+        user = query.filter(User.id == claims["user_id"]).first()
+    elif claims.get("sub"):
+        user = query.filter(User.username == claims["sub"]).first()
+    else:
+        user = None
+    if user is None:
+        return None
+    return Identity(
+        user.id,
+        user.username,
+        tuple(r.name for r in sorted(user.roles, key=lambda r: r.id)),   # authz.primary_role order
+        frozenset(d.id for d in user.devices),
+        bool(user.is_active),
+    )
+
+
+# ==========================================================
+# Lookup
+# ==========================================================
+def resolve(token):
+    """
+    Identity for a token, or None if its user no longer exists.
+    Raises jwt.ExpiredSignatureError / jwt.InvalidTokenError like jwt.decode().
+    """
+    global _hits, _misses
+    now = time.time()
+    with _lock:
+        entry = _entries.get(token)
+        if entry is not None:
+            if entry[1] > now:
+                _entries.move_to_end(token)
+                _hits += 1
+                return entry[0]
+            _drop(token)
+        _misses += 1
+        generation = _generation
+
+    claims = jwt.decode(token, _secret(), algorithms=[ALGORITHM])
+    identity = _load(claims)
+    if identity is None:
+        return None
+
+    deadline = now + Config.AUTH_CACHE_TTL
+    if claims.get("exp") is not None:
+        deadline = min(deadline, float(claims["exp"]))
+    with _lock:
+        # an invalidation while we were reading the DB makes this result stale
+        if generation == _generation and Config.AUTH_CACHE_SIZE > 0:
+            if token in _entries:
+                _drop(token)
+            _entries[token] = (identity, deadline)
+            _by_user.setdefault(identity.user_id, set()).add(token)
+            while len(_entries) > Config.AUTH_CACHE_SIZE:
+                _drop(next(iter(_entries)))
+    return identity
+
+
+# ==========================================================
+# Invalidation
+# ==========================================================
+def invalidate_user(user_id):
+    """Forget every token of one user (profile, roles or device grants changed)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        for token in list(_by_user.get(user_id, ())):
+            _drop(token)
+
+
+def invalidate_all():
+    """Forget everything (a role or permission changed — it may affect anyone)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        _entries.clear()
+        _by_user.clear()
+
+
+def stats():
+    with _lock:
+        return {
+            "entries": len(_entries),
+            "users": len(_by_user),
+            "hits": _hits,
+            "misses": _misses,
+            "ttl_s": Config.AUTH_CACHE_TTL,
+            "max_entries": Config.AUTH_CACHE_SIZE,
+        }
@@ -0,0 +1,121 @@
+# ==========================================================
+# backend/utils/latest_cache.py — Process-wide last-value cache
+# ==========================================================
+# Newest reading per device, updated by the ingest path on every reading
+# and rebuilt from the time-series store at startup. Replaces the
+# "ORDER BY timestamp DESC LIMIT 1" scans in the dashboard / live-data
+# endpoints, which grew with the size of the readings table.
+# ==========================================================
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from pytz import timezone
+
+from backend.extensions import db
+from backend.timeseries import get_store
+from backend.utils.audit import log_info
+
+INDIA_TZ = timezone("Asia/Kolkata")
+
+LatestReading = namedtuple(
+    "LatestReading", ["device_id", "temperature", "humidity", "pressure", "timestamp"]
+)
+
+_lock = threading.Lock()
+_latest = {}          # device_id -> LatestReading
+_newest_id = None     # device_id of the newest reading overall
+
+
+def _aware(dt):
+    """Readings are stored as India wall time; SQLite hands them back naive."""
+    if isinstance(dt, datetime) and dt.tzinfo is None:
+        return INDIA_TZ.localize(dt)
+    return dt
+
+
+def _recompute_newest():
+    global _newest_id
+    _newest_id = max(_latest, key=lambda k: _latest[k].timestamp) if _latest else None
+
+
+# ==========================================================
+# Writers
+# ==========================================================
+def update(device_id, temperature, humidity, pressure, timestamp):
+    """Record a reading if it is newer than what we hold for the device."""
+    global _newest_id
+    ts = _aware(timestamp)
+    with _lock:
+        current = _latest.get(device_id)
+        if current is not None and current.timestamp > ts:
+            return False
+        _latest[device_id] = LatestReading(device_id, temperature, humidity, pressure, ts)
+        newest = _latest.get(_newest_id)
+        if newest is None or ts >= newest.timestamp:
+            _newest_id = device_id
+        return True
+
+
+def discard(device_id):
+    """Forget a device (e.g. after it is deleted)."""
+    with _lock:
+        if _latest.pop(device_id, None) is not None and device_id == _newest_id:
+            _recompute_newest()
+
+
+def clear():
+    global _newest_id
+    with _lock:
+        _latest.clear()
+        _newest_id = None
+
+
+def rebuild():
+    """Reload the newest reading per device from the store (needs an app context)."""
+    samples = get_store().latest()
+    with _lock:
+        _latest.clear()
+        for device_id, s in samples.items():
+            _latest[device_id] = LatestReading(device_id, s.temperature, s.humidity, s.pressure, _aware(s.timestamp))
+        _recompute_newest()
+        return len(_latest)
+
+
+def warm(app):
+    """Startup hook: rebuild from the DB, or start empty if tables aren't there yet."""
+    with app.app_context():
+        try:
+            count = rebuild()
+            log_info(f"[CACHE] ⚡ Latest-reading cache warmed ({count} device(s))")
+        except Exception as e:
+            clear()
+            log_info(f"[CACHE] ⚠️ Latest-reading cache starts empty ({e.__class__.__name__})")
+        finally:
+            db.session.remove()
+
+
+# ==========================================================
+# Readers — O(1)
+# ==========================================================
+def get(device_id):
+    return _latest.get(device_id)
+
+
+def newest():
+    """Newest reading across all devices, or None."""
+    with _lock:
+        return _latest.get(_newest_id)
+
+
+def first_of(device_ids):
+    """Reading for the first of device_ids that has one (dashboard aggregate)."""
+    for device_id in device_ids:
+        reading = _latest.get(device_id)
+        if reading is not None:
+            return reading
+    return None
+
+
+def size():
+    return len(_latest)
@@ -0,0 +1,255 @@
+# ==========================================================
+# backend/utils/metrics.py — In-process metrics registry (Prometheus text)
+# ==========================================================
+# Counters, gauges and histograms for the hot paths, rendered at /metrics:
+#
+#   • MQTT messages received / parsed / failed per device
+#   • ingest commit latency (histogram) + readings written / dropped
+#   • Socket.IO emits per event + connected clients
+#   • HTTP latency per route (histogram) + requests per status
+#
+# Updates take no lock: a sample is a plain attribute increment on a
+# pre-created child, which cannot be interrupted by another greenlet
+# (the app runs on eventlet, so every "thread" is one). Label children
+# are created with dict.setdefault, which is atomic in CPython.
+# ==========================================================
+import time
+from bisect import bisect_left
+
+from flask import g, request
+
+# Seconds; ingest commits and HTTP requests share one bucket layout
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+# ==========================================================
+# Metric types
+# ==========================================================
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self.reset()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _new_child(self):
+        return _Value()
+
+    def labels(self, *values):
+        key = tuple(values)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def reset(self):
+        self._children.clear()
+        if not self.labelnames:
+            self.labels()    # unlabelled metrics always report (0 before the first sample)
+
+    def samples(self):
+        """[(suffix, label values, extra label, value)]"""
+        return [("", key, None, child.value) for key, child in list(self._children.items())]
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            out.append(f"{self.name}{suffix}{_labels(self.labelnames, key, extra)} {_fmt(value)}")
+        return out
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._func = None
+
+    def set_function(self, func):
+        """Read the (unlabelled) value from func() at scrape time."""
+        self._func = func
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def samples(self):
+        if self._func is not None:
+            return [("", (), None, self._func())]
+        return super().samples()
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets))   # before reset() creates the first child
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def samples(self):
+        out = []
+        for key, child in list(self._children.items()):
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), child.counts):
+                running += n
+                out.append(("_bucket", key, ("le", _fmt(float(bound))), running))
+            out.append(("_sum", key, None, round(child.sum, 6)))
+            out.append(("_count", key, None, child.count))
+        return out
+
+
+# ==========================================================
+# Registry
+# ==========================================================
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def add_collector(self, func):
+        """func() → extra exposition lines (e.g. sql_metrics.prometheus_lines)."""
+        if func not in self._collectors:
+            self._collectors.append(func)
+
+    def get(self, name):
+        return next((m for m in self._metrics if m.name == name), None)
+
+    def reset(self):
+        for m in self._metrics:
+            m.reset()
+
+    def render(self):
+        lines = []
+        for m in self._metrics:
+            lines += m.render()
+        for func in self._collectors:
+            lines += func()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# ==========================================================
+# Application metrics
+# ==========================================================
+MQTT_RECEIVED = Counter("franc_mqtt_messages_received_total", "MQTT messages routed to a device.", ["device"])
+MQTT_PARSED = Counter("franc_mqtt_messages_parsed_total", "MQTT payloads decoded into a reading.", ["device"])
+MQTT_FAILED = Counter("franc_mqtt_messages_failed_total", "MQTT payloads that could not be decoded.", ["device"])
+MQTT_UNROUTED = Counter("franc_mqtt_messages_unrouted_total", "MQTT messages on topics with no known device.")
+
+INGEST_COMMIT_SECONDS = Histogram("franc_ingest_commit_seconds", "Ingest batch write + commit latency.")
+INGEST_WRITTEN = Counter("franc_ingest_readings_written_total", "Readings committed by the ingest writer.")
+INGEST_DROPPED = Counter("franc_ingest_readings_dropped_total", "Readings dropped (queue full or failed batch).")
+INGEST_QUEUE_DEPTH = Gauge("franc_ingest_queue_depth", "Readings waiting in the ingest queue.")
+
+SOCKETIO_EMITS = Counter("franc_socketio_emits_total", "Socket.IO emits by event name.", ["event"])
+SOCKETIO_CLIENTS = Gauge("franc_socketio_connected_clients", "Connected Socket.IO clients.")
+
+HTTP_SECONDS = Histogram("franc_http_request_duration_seconds", "HTTP request latency by route.", ["method", "route"])
+HTTP_REQUESTS = Counter("franc_http_requests_total", "HTTP requests by route and status.", ["method", "route", "status"])
+
+
+# ==========================================================
+# HTTP hooks
+# ==========================================================
+def _before_request():
+    g._metrics_started = time.perf_counter()
+
+
+def _after_request(response):
+    started = g.pop("_metrics_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        HTTP_SECONDS.labels(request.method, route).observe(time.perf_counter() - started)
+        HTTP_REQUESTS.labels(request.method, route, str(response.status_code)).inc()
+    return response
+
+
+def install(app):
+    """Time every request of one app (call once per create_app)."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+
+def render():
+    return REGISTRY.render()
+
+
+__all__ = ["Counter", "Gauge", "Histogram", "REGISTRY", "install", "render"]
@@ -0,0 +1,133 @@
+# ==========================================================
+# backend/utils/parquet_export.py — Columnar (Parquet) history export
+# ==========================================================
+# Reads readings through the time-series store (get_store().scan_columns,
+# so the sql and segment backends both export) in chunks, wraps each chunk
+# in an Arrow record batch and writes Parquet: float32 readings, int32
+# device_id and a tz-aware timestamp.
+# Optionally partitioned Hive-style:  device_id=3/date=2025-11-21/part-0.parquet
+#
+# Requires pyarrow (optional dependency):  pip install pyarrow
+# ==========================================================
+import os
+
+import numpy as np
+
+from backend.timeseries import get_store
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional export format
+    pa = pq = None
+
+IST_OFFSET = np.timedelta64(19800, "s")  # stores hand out India wall time (+05:30, no DST)
+PARTITION_KEYS = ("device", "day")
+DEFAULT_CHUNK = 50000
+COMPRESSION = "zstd"
+
+
+def available():
+    return pa is not None
+
+
+def schema():
+    return pa.schema([
+        ("device_id", pa.int32()),
+        ("timestamp", pa.timestamp("ms", tz="Asia/Kolkata")),
+        ("temperature", pa.float32()),
+        ("humidity", pa.float32()),
+        ("pressure", pa.float32()),
+    ])
+
+
+def _floats(values):
+    """float32 Arrow array; NaN (SQL NULL) becomes a Parquet null."""
+    return pa.array(np.asarray(values, dtype=np.float32), from_pandas=True)
+
+
+def iter_batches(start, end, device_ids=None, chunk=DEFAULT_CHUNK, by_device=False):
+    """
+    Yield pyarrow.RecordBatch objects of up to `chunk` rows, in time order
+    (by_device: device by device, each in time order).
+    """
+    store = get_store()
+    if by_device:
+        scans = (store.scan_columns(start, end, [d], chunk) for d in sorted(device_ids or store.latest()))
+    else:
+        scans = [store.scan_columns(start, end, device_ids or None, chunk)]
+
+    sch = schema()
+    for scan in scans:
+        for cols in scan:
+            yield pa.RecordBatch.from_arrays([
+                pa.array(cols["device_id"].astype(np.int32)),
+                pa.array(cols["t"], type=pa.int64()).cast(sch.field("timestamp").type),
+                _floats(cols["temperature"]),
+                _floats(cols["humidity"]),
+                _floats(cols["pressure"]),
+            ], schema=sch)
+
+
+def write_parquet(sink, start, end, device_ids=None, chunk=DEFAULT_CHUNK):
+    """Write one Parquet file (path or file object). Returns rows written."""
+    rows = 0
+    with pq.ParquetWriter(sink, schema(), compression=COMPRESSION) as writer:
+        for batch in iter_batches(start, end, device_ids, chunk):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def _partition_path(root, partition_by, device_id, day):
+    parts = []
+    if "device" in partition_by:
+        parts.append(f"device_id={device_id}")
+    if "day" in partition_by:
+        parts.append(f"date={day}")
+    return os.path.join(root, *parts, "part-0.parquet")
+
+
+def write_partitioned(root, start, end, device_ids=None, partition_by=PARTITION_KEYS, chunk=DEFAULT_CHUNK):
+    """
+    Write one file per partition under `root`. Rows arrive ordered by the
+    partition keys, so only one writer is open at a time.
+    Returns {relative path: rows}.
+    """
+    partition_by = tuple(p for p in PARTITION_KEYS if p in partition_by)
+    os.makedirs(root, exist_ok=True)
+    if not partition_by:
+        path = os.path.join(root, "history.parquet")
+        return {"history.parquet": write_parquet(path, start, end, device_ids, chunk)}
+
+    written = {}
+    writer, current, rel = None, None, None
+    by_device, by_day = "device" in partition_by, "day" in partition_by
+    try:
+        for batch in iter_batches(start, end, device_ids, chunk, by_device=by_device):
+            device = batch.column(0).to_numpy()
+            # India calendar day of each row, as the partition value
+            utc = batch.column(1).cast(pa.int64()).to_numpy().astype("datetime64[ms]")
+            day = (utc + IST_OFFSET).astype("datetime64[D]")
+            keys = np.zeros(len(device), dtype=np.int64)
+            if by_device:
+                keys += device.astype(np.int64) << 32
+            if by_day:
+                keys += day.astype(np.int64)
+            # boundaries where the partition key changes inside this batch
+            cuts = np.flatnonzero(np.diff(keys)) + 1
+            for lo, hi in zip(np.r_[0, cuts], np.r_[cuts, len(keys)]):
+                if keys[lo] != current:
+                    if writer is not None:
+                        writer.close()
+                    path = _partition_path(root, partition_by, int(device[lo]), str(day[lo]))
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    writer = pq.ParquetWriter(path, schema(), compression=COMPRESSION)
+                    current, rel = keys[lo], os.path.relpath(path, root)
+                    written[rel] = 0
+                writer.write_batch(batch.slice(lo, hi - lo))
+                written[rel] += int(hi - lo)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
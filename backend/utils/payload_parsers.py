@@ -0,0 +1,156 @@
+# ==========================================================
+# backend/utils/payload_parsers.py — Pluggable MQTT payload parsers
+# ==========================================================
+# Every parser takes the raw MQTT payload (bytes or str) and returns
+# {"temperature": float, "humidity": float, "pressure": float}.
+#
+# Formats (selected per device via Device.payload_format):
+#   • json    — JSON object with any known alias ("temp", "t", "hum", ...).
+#               Uses orjson when installed, falls back to unquoted-key JSON.
+#   • struct  — 12 bytes, little-endian float32 temperature/humidity/pressure.
+#   • cbor    — CBOR map with the same keys as JSON (requires cbor2).
+# ==========================================================
+import json
+import re
+import struct
+
+try:
+    import orjson
+except ImportError:  # optional speed-up
+    orjson = None
+
+try:
+    import cbor2
+except ImportError:  # optional binary format
+    cbor2 = None
+
+FIELDS = ("temperature", "humidity", "pressure")
+
+# Precompiled alias table: lower-cased payload key → canonical field
+FIELD_ALIASES = {
+    "temperature": "temperature", "temp": "temperature", "t": "temperature",
+    "humidity": "humidity", "hum": "humidity", "h": "humidity",
+    "pressure": "pressure", "press": "pressure", "p": "pressure",
+}
+
+STRUCT_FORMAT = struct.Struct("<fff")
+
+_UNQUOTED_KEY = re.compile(r'(\w+)\s*:')
+_loads = orjson.loads if orjson else json.loads
+
+# Schema cache: tuple of payload keys → [(key, canonical field), ...]
+_SCHEMA_CACHE_MAX = 256
+_schema_cache = {}
+
+
+def _num(value):
+    try:
+        return float(value or 0.0)
+    except Exception:
+        return 0.0
+
+
+def _empty():
+    return {"temperature": 0.0, "humidity": 0.0, "pressure": 0.0}
+
+
+class Unparsed(dict):
+    """All-zero reading returned for a payload that could not be decoded."""
+
+
+def _unparsed():
+    return Unparsed(_empty())
+
+
+def _field_map(keys):
+    """Resolve which payload keys feed which field, once per distinct key set."""
+    mapping = _schema_cache.get(keys)
+    if mapping is None:
+        mapping = []
+        for k in keys:
+            canonical = FIELD_ALIASES.get(str(k).lower())
+            if canonical:
+                mapping.append((k, canonical))
+        if len(_schema_cache) >= _SCHEMA_CACHE_MAX:
+            _schema_cache.clear()
+        _schema_cache[keys] = mapping
+    return mapping
+
+
+def normalize(data):
+    """Map a decoded dict onto the three canonical numeric fields."""
+    norm = _empty()
+    if not isinstance(data, dict):
+        return norm
+    for key, canonical in _field_map(tuple(data)):
+        norm[canonical] = _num(data[key])
+    return norm
+
+
+# ==========================================================
+# Parsers
+# ==========================================================
+def parse_json(payload):
+    try:
+        data = _loads(payload)
+    except Exception:
+        text = payload.decode(errors="ignore") if isinstance(payload, (bytes, bytearray)) else str(payload)
+        try:
+            data = json.loads(_UNQUOTED_KEY.sub(r'"\1":', text))
+        except Exception:
+            return _unparsed()
+    return normalize(data)
+
+
+def parse_struct(payload):
+    if isinstance(payload, str):
+        payload = payload.encode("latin-1", errors="ignore")
+    if len(payload) < STRUCT_FORMAT.size:
+        return _unparsed()
+    t, h, p = STRUCT_FORMAT.unpack_from(payload)
+    return {"temperature": t, "humidity": h, "pressure": p}
+
+
+def parse_cbor(payload):
+    if isinstance(payload, str):
+        payload = payload.encode("latin-1", errors="ignore")
+    try:
+        data = cbor2.loads(payload)
+    except Exception:
+        return _unparsed()
+    return normalize(data)
+
+
+PARSERS = {
+    "json": parse_json,
+    "struct": parse_struct,
+}
+if cbor2 is not None:
+    PARSERS["cbor"] = parse_cbor
+
+DEFAULT_FORMAT = "json"
+
+
+def register_parser(name, func):
+    """Plug in an additional payload format."""
+    PARSERS[name] = func
+
+
+def available_formats():
+    return sorted(PARSERS)
+
+
+def get_parser(fmt):
+    """Parser for a device's payload_format; unknown/unavailable formats use JSON."""
+    return PARSERS.get(fmt or DEFAULT_FORMAT, PARSERS[DEFAULT_FORMAT])
+
+
+def parse_payload(payload, fmt=DEFAULT_FORMAT):
+    return get_parser(fmt)(payload)
+
+
+# ==========================================================
+# Encoders (firmware reference + benchmarks)
+# ==========================================================
+def encode_struct(temperature, humidity, pressure):
+    return STRUCT_FORMAT.pack(temperature, humidity, pressure)
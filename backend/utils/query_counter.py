@@ -0,0 +1,40 @@
+# ==========================================================
+# backend/utils/query_counter.py — Count SQL statements issued in a block
+# ==========================================================
+# Used by the tests to pin the number of statements an endpoint runs, so
+# an N+1 (a lazy load or lookup per row) shows up as a count that grows
+# with the data:
+#
+#   with count_queries(db.engine) as q:
+#       client.get("/api/sensors")
+#   assert q.count == 1, q.statements
+# ==========================================================
+from sqlalchemy import event
+
+
+class QueryCounter:
+    """Records every statement the engine sends to the DBAPI while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._before_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._before_execute)
+        return False
+
+
+def count_queries(engine):
+    return QueryCounter(engine)
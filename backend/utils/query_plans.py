@@ -0,0 +1,120 @@
+# ==========================================================
+# backend/utils/query_plans.py — Query-plan check for hot reading queries
+# ==========================================================
+# Runs EXPLAIN QUERY PLAN for the queries behind the history, data and
+# dashboard endpoints and reports any that fall back to a full table scan
+# of sensors / history / history_rollups (i.e. a missing or unusable index).
+#
+#   python -m backend.utils.query_plans          # exit 1 on a full scan
+# ==========================================================
+import re
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from backend.models import History, HistoryRollup
+
+WATCHED_TABLES = ("sensors", "history", "history_rollups")
+
+_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(.*)$")
+
+
+def hot_queries(now=None):
+    """name → SELECT mirroring the statements the routes issue."""
+    now = now or datetime.utcnow()
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    newest = (
+        select(History.device_id, func.max(History.timestamp).label("ts"))
+        .group_by(History.device_id)
+        .subquery()
+    )
+    return {
+        # history_routes
+        "history.list_7d": select(History)
+        .where(History.timestamp >= now - timedelta(days=7))
+        .order_by(History.timestamp.desc()),
+        "history.export_day": select(History)
+        .where(History.timestamp >= day, History.timestamp < day + timedelta(days=1)),
+        "history.device_range": select(History)
+        .where(History.device_id == 1, History.timestamp >= day - timedelta(days=1),
+               History.timestamp < day)
+        .order_by(History.timestamp),
+        "history.rollups_7d": select(HistoryRollup)
+        .where(HistoryRollup.resolution == "1d", HistoryRollup.bucket >= day - timedelta(days=6),
+               HistoryRollup.bucket < day + timedelta(days=1)),
+        "history.device_rollups": select(HistoryRollup)
+        .where(HistoryRollup.device_id == 1, HistoryRollup.resolution == "1h",
+               HistoryRollup.bucket >= day - timedelta(days=7), HistoryRollup.bucket < day)
+        .order_by(HistoryRollup.bucket),
+        # data_routes
+        "data.recent": select(History)
+        .where(History.timestamp >= now - timedelta(minutes=10))
+        .order_by(History.timestamp.desc())
+        .limit(50),
+        "data.history_7d": select(History)
+        .where(History.timestamp >= now - timedelta(days=7))
+        .order_by(History.timestamp.desc()),
+        # dashboard_routes
+        "dashboard.chart": select(History).order_by(History.timestamp.desc()).limit(50),
+        # retention_service.purge (id batch selected per DELETE)
+        "retention.history_batch": select(History.id)
+        .where(History.timestamp < now - timedelta(days=30)).limit(5000),
+        "retention.rollups_batch": select(HistoryRollup.id)
+        .where(HistoryRollup.resolution == "1m", HistoryRollup.bucket < now - timedelta(days=90))
+        .limit(5000),
+        # latest_cache.rebuild (startup)
+        "latest.rebuild": select(History.device_id, History.timestamp).join(
+            newest, (History.device_id == newest.c.device_id) & (History.timestamp == newest.c.ts)
+        ),
+    }
+
+
+def explain(conn, stmt):
+    """EXPLAIN QUERY PLAN detail lines for a SQLAlchemy statement."""
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = compiled.params
+    args = tuple(params[k] for k in compiled.positiontup) if compiled.positiontup else params
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled), args).fetchall()
+    return [row[-1] for row in rows]
+
+
+def full_scans(plan):
+    """Plan lines that read a watched table without any index."""
+    bad = []
+    for detail in plan:
+        m = _SCAN.match(detail)
+        if m and m.group(1) in WATCHED_TABLES and "USING" not in m.group(2):
+            bad.append(detail)
+    return bad
+
+
+def check_engine(engine):
+    """Returns {query name: [offending plan lines]} — empty when all good."""
+    problems = {}
+    with engine.connect() as conn:
+        for name, stmt in hot_queries().items():
+            bad = full_scans(explain(conn, stmt))
+            if bad:
+                problems[name] = bad
+    return problems
+
+
+def main():
+    from backend.app import create_app
+    from backend.extensions import db
+
+    app = create_app()
+    with app.app_context():
+        problems = check_engine(db.engine)
+
+    if problems:
+        for name, lines in problems.items():
+            print(f"❌ {name}: {'; '.join(lines)}")
+        return 1
+    print(f"✅ {len(hot_queries())} hot queries use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+# ==========================================================
+# backend/utils/socket_rooms.py — Socket.IO room naming + lookups
+# ==========================================================
+# Clients start in ROOM_ALL (every device, legacy behaviour). Once they
+# subscribe to specific devices/dashboards they leave it and only receive
+# traffic for "device:<id>" / "dashboard:<id>" rooms they joined.
+# ==========================================================
+from backend.extensions import db, socketio
+from backend.models import DashboardWidget
+
+NAMESPACE = "/"
+ROOM_ALL = "devices:all"
+
+
+def device_room(device_id):
+    return f"device:{device_id}"
+
+
+def dashboard_room(dashboard_id):
+    return f"dashboard:{dashboard_id}"
+
+
+def room_occupied(room):
+    """True if anyone is in the room — lets emitters skip encoding for nobody."""
+    try:
+        rooms = socketio.server.manager.rooms.get(NAMESPACE, {})
+    except AttributeError:  # socketio not initialised (scripts / tests)
+        return False
+    if isinstance(room, (list, tuple)):
+        return any(rooms.get(r) for r in room)
+    return bool(rooms.get(room))
+
+
+def dashboard_device_ids(dashboard_id):
+    """Device ids referenced by a dashboard's widgets."""
+    rows = (
+        db.session.query(DashboardWidget.device_id)
+        .filter(DashboardWidget.dashboard_id == dashboard_id, DashboardWidget.device_id.isnot(None))
+        .distinct()
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def device_dashboard_ids(device_id):
+    """Dashboards that show a device (for dashboard-level events)."""
+    rows = (
+        db.session.query(DashboardWidget.dashboard_id)
+        .filter(DashboardWidget.device_id == device_id)
+        .distinct()
+        .all()
+    )
+    return [r[0] for r in rows]
+
+
+def device_rooms(device_id):
+    """Rooms that should receive a device's live readings."""
+    return [ROOM_ALL, device_room(device_id)]
@@ -0,0 +1,205 @@
+# ==========================================================
+# backend/utils/sql_metrics.py — Per-route SQL instrumentation + slow-query log
+# ==========================================================
+# Engine events time every statement; Flask request hooks attribute them
+# to the route that issued them:
+#
+#   • per request: statement count, total DB time, slowest statement
+#   • per route (aggregated): requests, statements, DB time, worst request
+#   • a ring buffer of statements slower than SQL_SLOW_QUERY_MS, with route
+#
+# Statements outside a request (ingest writer, retention, rollups) are
+# booked under BACKGROUND. Exposed (admin token required) at
+# /api/system/sql (JSON) and /api/system/sql/metrics (Prometheus text).
+# ==========================================================
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from backend.config import Config
+
+BACKGROUND = "<background>"
+MAX_STATEMENT_CHARS = 500
+
+_lock = threading.Lock()
+_routes = {}                     # route -> aggregate dict
+_slow = deque(maxlen=Config.SQL_SLOW_LOG_SIZE)
+_slow_total = 0
+
+
+def _route_key():
+    rule = request.url_rule.rule if request.url_rule else "<unmatched>"
+    return f"{request.method} {rule}"
+
+
+def _new_route():
+    return {"requests": 0, "statements": 0, "db_ms": 0.0, "max_request_db_ms": 0.0,
+            "max_statements": 0, "slowest_ms": 0.0, "slowest_statement": None}
+
+
+def _book(route, statements, db_ms, slowest_ms, slowest_sql, requests=1):
+    with _lock:
+        agg = _routes.get(route)
+        if agg is None:
+            agg = _routes[route] = _new_route()
+        agg["requests"] += requests
+        agg["statements"] += statements
+        agg["db_ms"] += db_ms
+        agg["max_request_db_ms"] = max(agg["max_request_db_ms"], db_ms)
+        agg["max_statements"] = max(agg["max_statements"], statements)
+        if slowest_ms > agg["slowest_ms"]:
+            agg["slowest_ms"] = slowest_ms
+            agg["slowest_statement"] = slowest_sql
+
+
+# ==========================================================
+# Engine events
+# ==========================================================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_sql_metrics_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    global _slow_total
+    starts = conn.info.get("_sql_metrics_start")
+    if not starts:
+        return
+    ms = (time.perf_counter() - starts.pop()) * 1000
+    statement = statement[:MAX_STATEMENT_CHARS]
+
+    in_request = has_request_context()
+    if in_request:
+        stats = g.get("_sql_stats")
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += ms
+            if ms > stats[2]:
+                stats[2], stats[3] = ms, statement
+    else:
+        _book(BACKGROUND, 1, ms, ms, statement, requests=0)
+
+    if ms >= Config.SQL_SLOW_QUERY_MS:
+        route = _route_key() if in_request else BACKGROUND
+        with _lock:
+            _slow_total += 1
+            _slow.append({
+                "at": datetime.now().isoformat(timespec="milliseconds"),
+                "ms": round(ms, 2),
+                "route": route,
+                "statement": statement,
+            })
+
+
+def _handle_error(exception_context):
+    """A failed statement never reaches after_cursor_execute — drop its start time."""
+    conn = exception_context.connection
+    if conn is None or exception_context.statement is None:
+        return
+    starts = conn.info.get("_sql_metrics_start")
+    if starts:
+        starts.pop()
+
+
+# ==========================================================
+# Request hooks
+# ==========================================================
+def _before_request():
+    g._sql_stats = [0, 0.0, 0.0, None]    # statements, db ms, slowest ms, slowest sql
+
+
+def _after_request(response):
+    stats = g.pop("_sql_stats", None)
+    if stats is not None:
+        _book(_route_key(), stats[0], stats[1], stats[2], stats[3])
+        response.headers["X-DB-Statements"] = str(stats[0])
+        response.headers["X-DB-Time-ms"] = f"{stats[1]:.2f}"
+    return response
+
+
+def install(app, engine):
+    """Hook one engine and one app (call once per create_app)."""
+    if not Config.SQL_METRICS_ENABLED:
+        return False
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    return True
+
+
+# ==========================================================
+# Read-out
+# ==========================================================
+def get_sql_stats(top=None):
+    """Per-route aggregates (by total DB time) + the slow-query log, newest first."""
+    with _lock:
+        routes = [dict(agg, route=route) for route, agg in _routes.items()]
+        slow = list(reversed(_slow))
+        slow_total = _slow_total
+    for r in routes:
+        n = r["requests"] or 1
+        r["avg_statements"] = round(r["statements"] / n, 2)
+        r["avg_db_ms"] = round(r["db_ms"] / n, 3)
+        r["db_ms"] = round(r["db_ms"], 3)
+        r["max_request_db_ms"] = round(r["max_request_db_ms"], 3)
+        r["slowest_ms"] = round(r["slowest_ms"], 3)
+    routes.sort(key=lambda r: r["db_ms"], reverse=True)
+    return {
+        "slow_threshold_ms": Config.SQL_SLOW_QUERY_MS,
+        "slow_total": slow_total,
+        "routes": routes[:top] if top else routes,
+        "slow_queries": slow,
+    }
+
+
+def reset():
+    global _slow_total
+    with _lock:
+        _routes.clear()
+        _slow.clear()
+        _slow_total = 0
+
+
+def _label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_lines():
+    """Prometheus exposition-format lines."""
+    with _lock:
+        routes = {route: dict(agg) for route, agg in _routes.items()}
+        slow_total = _slow_total
+    out = [
+        "# HELP franc_sql_statements_total SQL statements executed, by originating route.",
+        "# TYPE franc_sql_statements_total counter",
+    ]
+    out += [f'franc_sql_statements_total{{route="{_label(r)}"}} {a["statements"]}' for r, a in routes.items()]
+    out += [
+        "# HELP franc_sql_time_seconds_total Time spent in SQL statements, by originating route.",
+        "# TYPE franc_sql_time_seconds_total counter",
+    ]
+    out += [f'franc_sql_time_seconds_total{{route="{_label(r)}"}} {a["db_ms"] / 1000:.6f}' for r, a in routes.items()]
+    out += [
+        "# HELP franc_sql_requests_total HTTP requests observed by the SQL instrumentation.",
+        "# TYPE franc_sql_requests_total counter",
+    ]
+    out += [f'franc_sql_requests_total{{route="{_label(r)}"}} {a["requests"]}'
+            for r, a in routes.items() if r != BACKGROUND]
+    out += [
+        "# HELP franc_sql_slow_queries_total Statements slower than SQL_SLOW_QUERY_MS.",
+        "# TYPE franc_sql_slow_queries_total counter",
+        f"franc_sql_slow_queries_total {slow_total}",
+    ]
+    return out
+
+
+def prometheus_text():
+    return "\n".join(prometheus_lines()) + "\n"
+
+
+__all__ = ["install", "get_sql_stats", "reset", "prometheus_text", "BACKGROUND"]
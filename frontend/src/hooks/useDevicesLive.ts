@@ -98,10 +98,11 @@ export function useDevicesLive() {
       updateDevice(data);
     };
 
-    // Bind to all relevant events
-    socket.on("sensor_data", handleUpdate);
-    socket.on("device_data_update", handleUpdate);
-    socket.on("dashboard_update", handleUpdate);
+    // Coalesced frame: one per tick with the latest reading of each device
+    const handleBatch = (batch: any) => {
+      (batch?.readings || []).forEach(handleUpdate);
+    };
+    socket.on("sensor_batch", handleBatch);
 
     // 🔴 Handle explicit offline events
     socket.on("device_status", (data: any) => {
@@ -134,6 +135,7 @@ export function useDevicesLive() {
     });
 
     return () => {
+      socket.off("sensor_batch", handleBatch);
       socket.disconnect();
       console.log("[Socket.IO] 🔌 Disconnected cleanly");
     };
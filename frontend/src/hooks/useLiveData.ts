@@ -26,6 +26,14 @@ export interface SensorData {
   device_id?: string | number;
 }
 
+// Optional room subscription — without it the socket receives every device.
+// No page passes one yet: Dashboard, DashboardPage and LiveDataPage all show
+// every device, so they stay in the backend's "devices:all" room.
+export interface LiveSubscription {
+  devices?: number[];
+  dashboards?: number[];
+}
+
 // -------------------------------
 // Helper: Format to India Time
 // -------------------------------
@@ -47,7 +55,10 @@ function formatIndiaTime(value?: string | number | Date): string {
 // -------------------------------
 // MAIN HOOK
 // -------------------------------
-export function useLiveData(page: "dashboard" | "live" = "dashboard") {
+export function useLiveData(
+  page: "dashboard" | "live" = "dashboard",
+  subscription?: LiveSubscription
+) {
   const [currentData, setCurrentData] = useState<SensorData>({
     temperature: null,
     humidity: null,
@@ -85,6 +96,10 @@ export function useLiveData(page: "dashboard" | "live" = "dashboard") {
     socket.on("connect", () => {
       console.log("[Socket.IO] Connected");
       setConnected(true);
+      // Rooms are per-connection, so re-subscribe after every reconnect
+      if (subscription?.devices?.length || subscription?.dashboards?.length) {
+        socket.emit("subscribe", subscription);
+      }
     });
 
     socket.on("disconnect", () => {
@@ -154,10 +169,11 @@ export function useLiveData(page: "dashboard" | "live" = "dashboard") {
       }, 12000);
     };
 
-    // Socket events
-    ["sensor_data", "device_data_update", "dashboard_update"].forEach((ev) =>
-      socket.on(ev, handlePayload)
-    );
+    // Coalesced frame: latest reading per device for this tick. The legacy
+    // per-reading events carry the same readings, so they are not bound here.
+    socket.on("sensor_batch", (batch: any) => {
+      (batch?.readings || []).forEach(handlePayload);
+    });
 
     // Device manually marked offline
     socket.on("device_status", (data: any) => {
@@ -184,7 +200,7 @@ export function useLiveData(page: "dashboard" | "live" = "dashboard") {
         window.clearTimeout(offlineTimerRef.current);
       }
     };
-  }, []); // Run only once
+  }, [JSON.stringify(subscription ?? {})]); // Re-run only if the subscription changes
 
   // -------------------------------
   // 🕒 POLLING FALLBACK (LIVE PAGE ONLY)
@@ -135,14 +135,16 @@ export default function Devices() {
       }
     };
 
-    socket.on("sensor_data", handleSensorData);
+    const handleSensorBatch = (batch: any) => {
+      (batch?.readings || []).forEach(handleSensorData);
+    };
+
+    socket.on("sensor_batch", handleSensorBatch);
     socket.on("device_status", handleDeviceStatus);
-    socket.on("device_data_update", handleSensorData);
 
     return () => {
-      socket.off("sensor_data", handleSensorData);
+      socket.off("sensor_batch", handleSensorBatch);
       socket.off("device_status", handleDeviceStatus);
-      socket.off("device_data_update", handleSensorData);
       Object.values(offlineTimersRef.current).forEach(clearTimeout);
     };
   }, []);